@@ -0,0 +1,54 @@
+#  ======================================================================
+#                 Series Distance Analysis (Batch Mode)
+#  ======================================================================
+
+# Headless command line runner of the SD analysis for several stations or model variants,
+# e.g. for nightly jobs. The stations are listed in a manifest (see f_read_manifest), each
+# with its time series, event and pairing files and its settings (event or continuous mode,
+# error model, weights, ...). The defaults of the settings are those of the notebooks
+# SD_Analysis_Event and SD_Analysis_Continuous. No plots are made.
+
+# Usage
+#   python SD_Batch.py manifest.json results/ [--workers N] [--force]
+
+# Output (per station, in results/<name>/)
+#  - results/:         all inputs, outputs and parameters as columnar arrays (see f_write_results)
+#  - checkpoint.json:  status of the station ('done' or 'failed'), run time and error message
+#  - run.log:          output of the SD functions
+#  - event_cache/:     results of the single events (event mode, see f_run_events)
+
+# A killed job is resumed by running the same command again: stations that are done
+# (same settings, unchanged input files) are skipped and the finished events of an
+# unfinished station are taken from its event cache. Continuous mode has no checkpoints
+# within a station: an unfinished continuous station is run again from its first split.
+
+import os
+import sys
+import argparse
+
+os.environ.setdefault('MPLBACKEND', 'Agg')  # no display needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'functions Python NEU'))
+
+from f_BatchRun import f_read_manifest, f_run_batch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Series Distance analysis of several stations (headless batch mode)')
+    parser.add_argument('manifest', help='JSON manifest with the stations and their settings (see f_read_manifest)')
+    parser.add_argument('out_dir', help='output directory, one subdirectory per station')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: one per cpu core)')
+    parser.add_argument('--force', action='store_true', help='run all stations again, also those that are done')
+    args = parser.parse_args(argv)
+
+    stations = f_read_manifest(args.manifest)
+    summary = f_run_batch(stations, args.out_dir, args.workers, args.force)
+
+    failed = [name for name, checkpoint in summary.items() if checkpoint['status'] == 'failed']
+    if failed:
+        print(f"failed stations: {', '.join(failed)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
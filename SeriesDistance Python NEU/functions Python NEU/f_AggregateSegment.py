@@ -1,16 +1,21 @@
 import numpy as np
+from f_SegmentTable import f_segment_table
+from f_DiffIndex import f_diff_index, f_segment_dQ
 
-def f_aggregate_segment(segs, hydcase, y, seg2erase=None):
+def f_aggregate_segment(segs, hydcase, y, seg2erase=None, diff_index=None):
     """
     Erases a specified or the least relevant segment of an event. The segment is then merged with its neighbors.
     Uwe Ehret, 15.Nov.2013, modified: Simon Seibert March 3rd 2014
 
     INPUT
-        segs: list of dictionaries, where each dictionary represents a segment found in the entire event
+        segs: SegmentTable (or list of dictionaries) with the segments found in the entire event
         hydcase: (n,1) array with hydrological case: -2=valley -1=drop, 1=rise 2=peak  
+        y: (n,1) array with values
         seg2erase: optional, number of the segment to erase
+        diff_index: optional, cumulative differences of y (see f_diff_index). Build it once per event and pass it on,
+                    otherwise it is built on each call
     OUTPUT
-        segs: list of dictionaries with reduced number of segments and adjusted segment properties 
+        segs: SegmentTable with reduced number of segments and adjusted segment properties 
         hydcase: array with adjusted hydrological cases
     METHOD
         Note: The first or the last segment can ONLY be erased if only two segments are left. This assures that obs and sim event both 
@@ -18,15 +23,20 @@ def f_aggregate_segment(segs, hydcase, y, seg2erase=None):
         - end with the same hydcase (rise or fall)
     """
 
+    # The segment table is not changed in place (merge returns a new table), only the hydcases are copied
+    # (value semantics as in the matlab version: the segments and hydcases of the caller stay unchanged)
+    segs = f_segment_table(segs)
+    hydcase = hydcase.copy()
+    relevance = segs['relevance']
+    start = segs['starttime_local']
+    end = segs['endtime_local']
+
     # Identify the least relevant segment if the segment to erase is not specified
     if seg2erase is None:  # the segment to erase is not specified
         if len(segs) > 2:  # if more than the first and last segment are left ...
-            relevance = [seg['relevance'] for seg in segs]
-            relevance = relevance[1:-1]  # exclude the first and last from deletion
-            seg2erase = relevance.index(min(relevance)) + 1  # find the least relevant segment and adjust index
+            seg2erase = int(np.argmin(relevance[1:-1])) + 1  # find the least relevant segment (exclude the first and last from deletion) and adjust index
         elif len(segs) == 2:  # only the first and last of the segments are left
-            relevance = [seg['relevance'] for seg in segs]
-            seg2erase = relevance.index(min(relevance))  # find the least relevant segment
+            seg2erase = int(np.argmin(relevance))  # find the least relevant segment
         else:  # less than 2 segments left
             raise ValueError('f_AggregateSegment: less than 2 segments left!')
     else:  # the segment to erase is specified
@@ -39,54 +49,37 @@ def f_aggregate_segment(segs, hydcase, y, seg2erase=None):
     # Delete the first segment and join it with the second
     if seg2erase == 0:
         # Adjust the hydrological cases (take over the value of the following segment)
-        hydcase[segs[seg2erase]['starttime_local']:segs[seg2erase]['endtime_local']] = hydcase[segs[seg2erase]['starttime_local'] + 1]
+        hydcase[start[seg2erase]:end[seg2erase]] = hydcase[start[seg2erase] + 1]
 
         # Join 2 segments: the segment to erase, and the following. The following takes it all
-        segs[seg2erase + 1]['starttime_local'] = segs[seg2erase]['starttime_local']
-        segs[seg2erase + 1]['starttime_global'] = segs[seg2erase]['starttime_global']
-        segs[seg2erase + 1]['length'] = segs[seg2erase + 1]['endtime_local'] - segs[seg2erase]['starttime_local']
-        segs[seg2erase + 1]['rel_length'] = (segs[seg2erase + 1]['endtime_local'] - segs[seg2erase]['starttime_local']) / (len(y) - 1)
-        segs[seg2erase + 1]['sum_dQ'] = sum(np.diff(y[segs[seg2erase]['starttime_local']:segs[seg2erase + 1]['endtime_local']]))
-        segs[seg2erase + 1]['rel_dQ'] = sum(abs(np.diff(y[segs[seg2erase]['starttime_local']:segs[seg2erase + 1]['endtime_local']]))) / sum(abs(np.diff(y)))
-        segs[seg2erase + 1]['relevance'] += segs[seg2erase]['relevance']
-
-        # Erase the first segment
-        del segs[seg2erase]
+        first, last = seg2erase, seg2erase + 1
+        new_relevance = relevance[seg2erase + 1] + relevance[seg2erase]
 
     # Delete the last segment and join it with the second last
     elif seg2erase == len(segs) - 1:
         # Adjust the hydrological cases (take over the value of the previous segment)
-        hydcase[segs[seg2erase]['starttime_local']:segs[seg2erase]['endtime_local']] = hydcase[segs[seg2erase]['starttime_local'] - 1]
+        hydcase[start[seg2erase]:end[seg2erase]] = hydcase[start[seg2erase] - 1]
 
         # Join 2 segments: the segment to erase, and the previous. The previous takes it all
-        segs[seg2erase - 1]['endtime_local'] = segs[seg2erase]['endtime_local']
-        segs[seg2erase - 1]['endtime_global'] = segs[seg2erase]['endtime_global']
-        segs[seg2erase - 1]['length'] = segs[seg2erase]['endtime_local'] - segs[seg2erase - 1]['starttime_local']
-        segs[seg2erase - 1]['rel_length'] = (segs[seg2erase]['endtime_local'] - segs[seg2erase - 1]['starttime_local']) / (len(y) - 1)
-        segs[seg2erase - 1]['sum_dQ'] = sum(np.diff(y[segs[seg2erase - 1]['starttime_local']:segs[seg2erase]['endtime_local']]))
-        segs[seg2erase - 1]['rel_dQ'] = sum(abs(np.diff(y[segs[seg2erase - 1]['starttime_local']:segs[seg2erase]['endtime_local']]))) / sum(abs(np.diff(y)))
-        segs[seg2erase - 1]['relevance'] += segs[seg2erase]['relevance']
-
-        # Erase the last segment
-        del segs[seg2erase]
+        first, last = seg2erase - 1, seg2erase
+        new_relevance = relevance[seg2erase - 1] + relevance[seg2erase]
 
     # 3 or more segments are left, join all three of them and update segment properties
     else:
         # Adjust the hydrological cases (take over the value of the previous segment)
-        hydcase[segs[seg2erase]['starttime_local']:segs[seg2erase]['endtime_local']] = hydcase[segs[seg2erase]['starttime_local'] - 1]
+        hydcase[start[seg2erase]:end[seg2erase]] = hydcase[start[seg2erase] - 1]
 
         # Join 3 segments: the segment to erase, the previous and the following. The previous takes it all
-        segs[seg2erase - 1]['endtime_local'] = segs[seg2erase + 1]['endtime_local']
-        segs[seg2erase - 1]['endtime_global'] = segs[seg2erase + 1]['endtime_global']
-        segs[seg2erase - 1]['length'] = segs[seg2erase + 1]['endtime_local'] - segs[seg2erase - 1]['starttime_local']
-        segs[seg2erase - 1]['rel_length'] = (segs[seg2erase + 1]['endtime_local'] - segs[seg2erase - 1]['starttime_local']) / (len(y) - 1)
-        segs[seg2erase - 1]['sum_dQ'] = sum(np.diff(y[segs[seg2erase - 1]['starttime_local']:segs[seg2erase + 1]['endtime_local']]))
-        segs[seg2erase - 1]['rel_dQ'] = sum(abs(np.diff(y[segs[seg2erase - 1]['starttime_local']:segs[seg2erase + 1]['endtime_local']]))) / sum(abs(np.diff(y)))
-        segs[seg2erase - 1]['relevance'] += segs[seg2erase]['relevance'] + segs[seg2erase + 1]['relevance']
+        first, last = seg2erase - 1, seg2erase + 1
+        new_relevance = relevance[seg2erase - 1] + (relevance[seg2erase] + relevance[seg2erase + 1])
+
+    # properties of the joined segment (of y[start:end], i.e. without the end point, as before)
+    if diff_index is None:
+        diff_index = f_diff_index(y)
+    length = end[last] - start[first]
+    sum_dQ, rel_dQ = f_segment_dQ(diff_index, start[first], end[last] - 1)
 
-        # Erase the segment to erase and the following
-        # NOTE: here the order of deletion is important! Work from the end backwards, otherwise enumeration gets screwed up!
-        del segs[seg2erase + 1]
-        del segs[seg2erase]
+    # Replace the joined segments by the new one
+    segs = segs.merge(first, last, length / (len(y) - 1), sum_dQ, rel_dQ, new_relevance)
 
     return segs, hydcase
\ No newline at end of file
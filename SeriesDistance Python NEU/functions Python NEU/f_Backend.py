@@ -0,0 +1,168 @@
+import os
+import warnings
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba is optional, the NumPy implementations are used without it
+    numba = None
+
+BACKENDS = ['numpy', 'numba']
+
+# backend of the inner kernels, preset by the environment variable SD_BACKEND (default='numpy')
+_backend = 'numpy'
+
+
+def f_set_backend(backend):
+    """
+    Selects the backend of the inner kernels (f_calc_hyd_case, f_sd connectors, SD error sums of the coarse-graining candidates)
+
+    INPUT
+        backend: 'numpy' (pure NumPy) or 'numba' (compiled loops, falls back to 'numpy' with a warning if numba is not installed)
+    METHOD
+        Both backends give the same numerical results. The backend is a module setting: worker processes inherit it,
+        or set it again in their initializer (see f_run_events, f_coarse_graining_continuous)
+    """
+
+    global _backend
+
+    if backend not in BACKENDS:
+        raise ValueError(f'backend must be one of {BACKENDS}')
+
+    if backend == 'numba' and numba is None:
+        warnings.warn('numba is not installed, using the numpy backend')
+        backend = 'numpy'
+
+    _backend = backend
+
+
+def f_use_numba():
+    """
+    True if the numba kernels are selected
+    """
+
+    return _backend == 'numba'
+
+
+def _jit(func):
+    return numba.njit(cache=True)(func) if numba is not None else func
+
+
+@_jit
+def _hyd_case_kernel(vals):
+    """
+    Hydrological case of each time step (see f_calc_hyd_case), one pass over the values
+    """
+
+    n = len(vals)
+    hydcase = np.full(n, np.nan)
+    hydcase[0] = -1.0 if (vals[1] - vals[0]) < 0 else 1.0
+    hydcase[n - 1] = -1.0 if (vals[n - 1] - vals[n - 2]) < 0 else 1.0
+
+    for t in range(1, n - 1):
+        dQ_prev = vals[t] - vals[t - 1]
+        dQ_next = vals[t + 1] - vals[t]
+        if dQ_prev < 0 and dQ_next > 0:  # drop-rise: valley
+            hydcase[t] = -2.0
+        elif dQ_prev < 0 and dQ_next < 0:  # drop-drop: drop
+            hydcase[t] = -1.0
+        elif dQ_prev > 0 and dQ_next > 0:  # rise-rise: rise
+            hydcase[t] = 1.0
+        elif dQ_prev > 0 and dQ_next < 0:  # rise-drop: peak
+            hydcase[t] = 2.0
+
+    return hydcase
+
+
+@_jit
+def _interp_kernel(x, y):
+    """
+    y linearly interpolated at position x, with y given at the positions 0 ... len(y)-1 (same as np.interp)
+    """
+
+    j = int(np.floor(x))
+    if j >= len(y) - 1:
+        return y[len(y) - 1]
+    if x == j:
+        return y[j]
+
+    return (y[j + 1] - y[j]) * (x - j) + y[j]
+
+
+@_jit
+def _connector_kernel(start, end, num, j):
+    """
+    Position of connector j of num connectors between start and end (same as np.linspace(start, end, num)[j])
+    """
+
+    if num > 1 and j == num - 1:
+        return float(end)
+
+    step = (end - start) / max(num - 1, 1)
+
+    return j * step + start
+
+
+@_jit
+def _sd_connectors_kernel(y_obs, bounds_obs, y_sim, bounds_sim, num):
+    """
+    Connectors of a set of obs/sim segment pairs, flattened one pair after the other (see f_sd)
+
+    OUTPUT
+        x_obs_global, con_y_obs, x_sim_global, con_y_sim: (sum(num),) arrays with the global positions and values of the connectors
+    """
+
+    total = 0
+    for k in range(len(num)):
+        total += num[k]
+
+    x_obs_global = np.empty(total)
+    con_y_obs = np.empty(total)
+    x_sim_global = np.empty(total)
+    con_y_sim = np.empty(total)
+
+    i = 0
+    for k in range(len(num)):
+        for j in range(num[k]):
+            x_obs_global[i] = _connector_kernel(float(bounds_obs[k, 2]), float(bounds_obs[k, 3]), num[k], j)
+            x_sim_global[i] = _connector_kernel(float(bounds_sim[k, 2]), float(bounds_sim[k, 3]), num[k], j)
+            con_y_obs[i] = _interp_kernel(_connector_kernel(float(bounds_obs[k, 0]), float(bounds_obs[k, 1]), num[k], j), y_obs)
+            con_y_sim[i] = _interp_kernel(_connector_kernel(float(bounds_sim[k, 0]), float(bounds_sim[k, 1]), num[k], j), y_sim)
+            i += 1
+
+    return x_obs_global, con_y_obs, x_sim_global, con_y_sim
+
+
+@_jit
+def _sd_abs_errors_kernel(y_obs, bounds_obs, y_sim, bounds_sim, num, relative):
+    """
+    Absolute SD timing and magnitude errors of all connectors of a set of obs/sim segment pairs (see f_sd_pair_sums),
+    without the temporary arrays of the connector positions and values
+    """
+
+    total = 0
+    for k in range(len(num)):
+        total += num[k]
+
+    abs_e_t = np.empty(total)
+    abs_e_q = np.empty(total)
+
+    i = 0
+    for k in range(len(num)):
+        for j in range(num[k]):
+            e_t = _connector_kernel(float(bounds_obs[k, 2]), float(bounds_obs[k, 3]), num[k], j) - \
+                  _connector_kernel(float(bounds_sim[k, 2]), float(bounds_sim[k, 3]), num[k], j)
+            con_y_obs = _interp_kernel(_connector_kernel(float(bounds_obs[k, 0]), float(bounds_obs[k, 1]), num[k], j), y_obs)
+            con_y_sim = _interp_kernel(_connector_kernel(float(bounds_sim[k, 0]), float(bounds_sim[k, 1]), num[k], j), y_sim)
+            if relative:
+                e_q = (con_y_obs - con_y_sim) / ((con_y_obs + con_y_sim) * 0.5)
+            else:
+                e_q = con_y_obs - con_y_sim
+            abs_e_t[i] = abs(e_t)
+            abs_e_q[i] = abs(e_q)
+            i += 1
+
+    return abs_e_t, abs_e_q
+
+
+f_set_backend(os.environ.get('SD_BACKEND', 'numpy'))
\ No newline at end of file
@@ -0,0 +1,342 @@
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import traceback
+import contextlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from f_ReadInput import f_read_timeseries, f_read_events, f_read_pairing, f_read_splits
+from f_smooth_DP import f_smooth_DP
+from f_ReplaceEqualNeighbours import f_ReplaceEqualNeighbours
+from f_RunEvents import f_run_events
+from f_SD import f_error_models
+from f_SD_1dNoEventError import f_SD_1dNoEventError
+from f_ComputeContingencyTable import f_ComputeContingencyTable
+from f_FindSplitPoints import f_FindSplitPoints
+from f_PlanSplits import f_plan_splits
+from f_CoarseGraining_SD_Continuous import f_coarse_graining_continuous
+from f_ResultStore import f_write_results
+
+# settings of a station that are not given in the manifest (defaults of the notebooks SD_Analysis_Event/ SD_Analysis_Continuous)
+DEFAULTS = {
+    'mode': 'event',  # 'event' or 'continuous'
+    'usecols': [2, 3],  # columns of obs and sim in the time series file (see f_read_timeseries)
+    'skip_rows': None,  # lines skipped at the beginning of the time series file (None: default of the mode, see MODE_DEFAULTS)
+    'max_rows': None,  # maximum number of time steps read (None: all)
+    'events_skip_rows': None,  # lines skipped at the beginning of the event, pairing and split files (None: default of the mode)
+    'smooth_flag': True,
+    'nse_smooth_limit': 0.99,
+    'smooth_criterion': 'numpoints',
+    'error_model': 'relative',
+    'weight_nfc': 1/7,
+    'weight_rds': 1/7,
+    'weight_sdt': 5/7,
+    'weight_sdv': 0,
+    'split_frequency': 250,  # continuous mode, if no split file is given
+    'split_max_num_segs': None,  # continuous mode: if set, the splits are placed by f_plan_splits
+    'backend': None
+}
+# defaults that differ between the notebooks: SD_Analysis_Event skips 2 lines of the time series file and 1 line of the event
+# and pairing files, SD_Analysis_Continuous skips the header line of the time series file and none of the split file
+MODE_DEFAULTS = {
+    'event': {'skip_rows': 2, 'events_skip_rows': 1},
+    'continuous': {'skip_rows': 1, 'events_skip_rows': 0}
+}
+INPUT_FILES = ['timeseries', 'obs_events', 'sim_events', 'pairing', 'splits']  # entries of a station with file names
+CHECKPOINT = 'checkpoint.json'
+
+
+def f_read_manifest(path):
+    """
+    Reads the manifest of a batch run (JSON)
+
+    INPUT
+        path: manifest file, e.g.
+              {"defaults": {"error_model": "relative", "weight_sdt": 0.5},
+               "stations": [{"name": "HOST", "mode": "event", "timeseries": "data/HOST_timeseries.csv",
+                             "obs_events": "data/HOST_obs_events.csv", "sim_events": "data/HOST_sim_events.csv",
+                             "pairing": "data/HOST_event_pairing.csv"},
+                            {"name": "HOST_cont", "mode": "continuous", "timeseries": "data/HOST_timeseries.csv"}]}
+              Every station (or model variant) has a unique name and the settings of DEFAULTS, given by the station,
+              by 'defaults' of the manifest or by MODE_DEFAULTS/ DEFAULTS (in this order). File names are relative to the manifest.
+              The name is the name of the output subdirectory of the station: it must not contain path separators or '..'.
+              Event mode needs 'obs_events', 'sim_events' and 'pairing'; continuous mode takes an optional 'splits' file.
+    OUTPUT
+        stations: list with one dictionary of settings per station (file names absolute)
+    """
+
+    with open(path) as file:
+        manifest = json.load(file)
+
+    base = os.path.dirname(os.path.abspath(path))
+    defaults = {**DEFAULTS, **manifest.get('defaults', {})}
+
+    stations = []
+    for entry in manifest['stations']:
+        station = {**defaults, **entry}
+        for key, value in MODE_DEFAULTS.get(station['mode'], {}).items():
+            if station[key] is None:
+                station[key] = value
+        for key in INPUT_FILES:
+            if station.get(key) is not None:
+                station[key] = os.path.join(base, station[key])
+
+        if 'name' not in station or 'timeseries' not in station:
+            raise ValueError(f"f_read_manifest: every station needs a 'name' and a 'timeseries' file ({entry})")
+        name = station['name']
+        if not isinstance(name, str) or name in ('', '.') or '..' in name or '/' in name or '\\' in name or os.path.isabs(name):
+            raise ValueError(f"f_read_manifest: station name {name!r} must not be empty or contain path separators or '..'")
+        if station['mode'] not in ('event', 'continuous'):
+            raise ValueError(f"f_read_manifest: station {station['name']}: mode must be 'event' or 'continuous'")
+        if station['mode'] == 'event' and any(station.get(key) is None for key in ('obs_events', 'sim_events', 'pairing')):
+            raise ValueError(f"f_read_manifest: station {station['name']}: event mode needs 'obs_events', 'sim_events' and 'pairing'")
+        stations.append(station)
+
+    names = [station['name'] for station in stations]
+    if len(set(names)) != len(names):
+        raise ValueError('f_read_manifest: the station names must be unique')
+
+    return stations
+
+
+def _station_key(station):
+    """
+    Checkpoint key of a station: hash of its settings and of the size and modification time of its input files
+    """
+
+    files = [station[key] for key in INPUT_FILES if station.get(key) is not None]
+    stats = [(os.stat(filename).st_size, os.stat(filename).st_mtime_ns) for filename in files]
+
+    return hashlib.sha256(json.dumps([station, stats], sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _read_checkpoint(station_dir):
+    try:
+        with open(os.path.join(station_dir, CHECKPOINT)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_checkpoint(station_dir, checkpoint):
+    """
+    Writes the checkpoint of a station (temporary file and rename, so a killed job never leaves a partly written checkpoint)
+    """
+
+    fd, tmp_filename = tempfile.mkstemp(dir=station_dir, suffix='.tmp')
+    with os.fdopen(fd, 'w') as file:
+        json.dump(checkpoint, file, indent=1)
+    os.replace(tmp_filename, os.path.join(station_dir, CHECKPOINT))
+
+
+def _preprocess(station):
+    """
+    Reads obs and sim, smooths them and replaces equal neighbours (as the notebooks)
+    """
+
+    obs, sim = f_read_timeseries(station['timeseries'], station['usecols'], station['skip_rows'], station['max_rows'])
+    obs_org = obs.copy()
+    sim_org = sim.copy()
+    if station['smooth_flag']:
+        obs, sim = f_smooth_DP(obs, sim, station['nse_smooth_limit'], station['smooth_criterion'])
+    obs = f_ReplaceEqualNeighbours(obs)
+    sim = f_ReplaceEqualNeighbours(sim)
+
+    return obs_org, obs, sim_org, sim
+
+
+def _run_event_station(station, station_dir, num_workers):
+    """
+    Event mode of one station (see SD_Analysis_Event), returns the result items and the event results
+    """
+
+    obs_org, obs, sim_org, sim = _preprocess(station)
+    obs_events = f_read_events(station['obs_events'], station['events_skip_rows'], len(obs))
+    sim_events = f_read_events(station['sim_events'], station['events_skip_rows'], len(sim))
+    obs_sim_pairing = f_read_pairing(station['pairing'], station['events_skip_rows'], obs_events, sim_events)
+    weights = (station['weight_nfc'], station['weight_rds'], station['weight_sdt'], station['weight_sdv'])
+    error_model = station['error_model']
+
+    # the event cache is the checkpoint of the single events: a killed run recomputes only the events that were not finished
+    segs_obs_opt_all, segs_sim_opt_all, connectors, e_sd_t_rise, e_sd_q_rise, e_sd_t_fall, e_sd_q_fall, seg_raw_statistics, seg_opt_statistics, event_results = \
+        f_run_events(obs, sim, obs_events, sim_events, obs_sim_pairing, *weights, error_model, num_workers, False, station['backend'],
+                     os.path.join(station_dir, 'event_cache'))
+
+    # low-flow errors (keyed by error model, if a set of error models is given; the connectors do not depend on the model)
+    models, keyed = f_error_models(error_model)
+    e_sd_lowFlow = {}
+    for model in models:
+        e_sd_lowFlow[model], cons1D = f_SD_1dNoEventError(obs, sim, obs_events, sim_events, obs_sim_pairing, model)
+    if not keyed:
+        e_sd_lowFlow = e_sd_lowFlow[models[0]]
+    for key in connectors:
+        connectors[key] = np.concatenate((connectors[key], np.ravel(cons1D[key])))
+    contingency_table = f_ComputeContingencyTable(obs_events, sim_events, obs_sim_pairing)
+
+    results = {
+        'obs': obs,
+        'obs_org': obs_org,
+        'obs_events': obs_events,
+        'sim': sim,
+        'sim_org': sim_org,
+        'sim_events': sim_events,
+        'obs_sim_pairing': obs_sim_pairing,
+        'segs_obs_opt_all': segs_obs_opt_all,
+        'segs_sim_opt_all': segs_sim_opt_all,
+        'seg_raw_statistics': seg_raw_statistics,
+        'seg_opt_statistics': seg_opt_statistics,
+        'connectors': connectors,
+        'e_sd_q_rise': e_sd_q_rise,
+        'e_sd_t_rise': e_sd_t_rise,
+        'e_sd_q_fall': e_sd_q_fall,
+        'e_sd_t_fall': e_sd_t_fall,
+        'e_sd_lowFlow': e_sd_lowFlow,
+        'error_model': error_model,
+        'contingency_table': contingency_table
+    }
+
+    return results, event_results
+
+
+def _run_continuous_station(station, num_workers):
+    """
+    Continuous mode of one station (see SD_Analysis_Continuous), returns the result items
+    """
+
+    obs_org, obs, sim_org, sim = _preprocess(station)
+
+    if station.get('splits') is not None:
+        timeseries_splits = f_read_splits(station['splits'], station['events_skip_rows'], len(obs))
+    elif station['split_max_num_segs'] is None:
+        timeseries_splits = f_FindSplitPoints(obs, sim, station['split_frequency'])
+    else:
+        timeseries_splits = f_plan_splits(obs, sim, max_num_segs=station['split_max_num_segs'])['timeseries_splits']
+
+    segs_obs_opt_all, segs_sim_opt_all, connectors, e_sd_t_all, e_sd_q_all = f_coarse_graining_continuous(
+        obs, sim, timeseries_splits, station['weight_nfc'], station['weight_rds'], station['weight_sdt'], station['weight_sdv'],
+        station['error_model'], num_workers, station['backend'])
+
+    results = {
+        'obs': obs,
+        'obs_org': obs_org,
+        'sim': sim,
+        'sim_org': sim_org,
+        'timeseries_splits': timeseries_splits,
+        'segs_obs_opt_all': segs_obs_opt_all,
+        'segs_sim_opt_all': segs_sim_opt_all,
+        'connectors': connectors[0] if connectors else {},
+        'e_sd_t_all': e_sd_t_all,
+        'e_sd_q_all': e_sd_q_all,
+        'error_model': station['error_model']
+    }
+
+    return results
+
+
+def f_run_station(station, out_dir, num_workers=1):
+    """
+    Runs the SD analysis of one station and writes its results to out_dir/<name>/results (see f_write_results)
+
+    INPUT
+        station: dictionary with the settings of the station (see f_read_manifest)
+        out_dir: output directory of the batch run
+        num_workers: number of worker processes of the events or splits of this station (default=1)
+    OUTPUT
+        checkpoint: dictionary with 'key', 'status' ('done' or 'failed'), 'seconds' and, if failed, 'error'
+    METHOD
+        The output of the SD functions is written to out_dir/<name>/run.log. The results are written to a temporary directory
+        that replaces the results directory when it is complete; then the checkpoint (out_dir/<name>/checkpoint.json) is
+        written. Errors are recorded in the checkpoint and the log instead of being raised, so one station cannot stop a batch.
+    """
+
+    station_dir = os.path.join(out_dir, station['name'])
+    os.makedirs(station_dir, exist_ok=True)
+    for tmp_dir in glob.glob(os.path.join(station_dir, 'results.*')):  # left by a killed run
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    checkpoint = {'key': _station_key(station), 'status': 'failed'}
+    start = time.time()
+
+    with open(os.path.join(station_dir, 'run.log'), 'w') as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            parameters = {key: station[key] for key in ('mode', 'error_model', 'weight_nfc', 'weight_rds', 'weight_sdt', 'weight_sdv',
+                                                        'smooth_flag', 'nse_smooth_limit', 'smooth_criterion')}
+            event_results = None
+            if station['mode'] == 'event':
+                results, event_results = _run_event_station(station, station_dir, num_workers)
+            else:
+                results = _run_continuous_station(station, num_workers)
+
+            tmp_dir = tempfile.mkdtemp(dir=station_dir, prefix='results.')
+            f_write_results(tmp_dir, results, parameters, event_results)
+            shutil.rmtree(os.path.join(station_dir, 'results'), ignore_errors=True)
+            os.replace(tmp_dir, os.path.join(station_dir, 'results'))
+            checkpoint['status'] = 'done'
+        except Exception as error:
+            traceback.print_exc()
+            checkpoint['error'] = f'{type(error).__name__}: {error}'
+
+    checkpoint['seconds'] = round(time.time() - start, 3)
+    _write_checkpoint(station_dir, checkpoint)
+
+    return checkpoint
+
+
+def f_run_batch(stations, out_dir, num_workers=None, force=False):
+    """
+    Runs the SD analysis of several stations (or model variants) across a pool of worker processes
+
+    INPUT
+        stations: list with the settings of the stations (see f_read_manifest)
+        out_dir: output directory, one subdirectory per station (see f_run_station)
+        num_workers: number of worker processes (None: one per cpu core, 1: serial)
+        force: True: run all stations again, also those with a valid checkpoint (default=False)
+    OUTPUT
+        summary: dictionary station name --> checkpoint (see f_run_station)
+    METHOD
+        Stations with a checkpoint 'done' of the same key (same settings and unchanged input files) are skipped, so a killed
+        job resumes with the stations that were not finished; within an unfinished station in event mode, the events that were
+        finished are taken from the event cache (see f_run_events). The pending stations are distributed over the worker
+        processes; if there are fewer pending stations than workers, the remaining workers process the events or splits
+        within the stations.
+    """
+
+    os.makedirs(out_dir, exist_ok=True)
+    num_workers = num_workers or os.cpu_count() or 1
+
+    summary = {}
+    pending = []
+    for station in stations:
+        checkpoint = _read_checkpoint(os.path.join(out_dir, station['name']))
+        if not force and checkpoint is not None and checkpoint['status'] == 'done' and checkpoint['key'] == _station_key(station):
+            summary[station['name']] = {**checkpoint, 'status': 'skipped'}
+        else:
+            pending.append(station)
+
+    print(f'{len(stations)} stations, {len(summary)} already done, {len(pending)} to run')
+    if not pending:
+        return summary
+
+    num_pools = min(num_workers, len(pending))
+    inner_workers = max(1, num_workers // num_pools)
+
+    def report(station, checkpoint):
+        summary[station['name']] = checkpoint
+        message = f" ({checkpoint['error']})" if checkpoint['status'] == 'failed' else ''
+        print(f"[{len(summary)}/{len(stations)}] {station['name']}: {checkpoint['status']} in {checkpoint['seconds']} s{message}")
+        sys.stdout.flush()
+
+    if num_pools == 1:
+        for station in pending:
+            report(station, f_run_station(station, out_dir, inner_workers))
+    else:
+        with ProcessPoolExecutor(max_workers=num_pools) as executor:
+            futures = {executor.submit(f_run_station, station, out_dir, inner_workers): station for station in pending}
+            for future in as_completed(futures):
+                report(futures[future], future.result())
+
+    return summary
\ No newline at end of file
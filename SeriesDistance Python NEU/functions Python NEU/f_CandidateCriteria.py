@@ -0,0 +1,43 @@
+from f_CandidateMerges import f_candidate_merges
+from f_CandidateSDErrors import f_candidate_sd_errors
+from f_normalize import f_normalize
+
+def f_candidate_criteria(obs, segs_obs, hydcase_obs, hydcase_obs_orig, sim, segs_sim, hydcase_sim, hydcase_sim_orig, error_model):
+    """
+    Normalized criteria of the objective function for all candidate merges of one coarse-graining step
+
+    INPUT
+        obs, sim: (n,1) arrays with the (trimmed) observed and simulated values
+        segs_obs, segs_sim: SegmentTables with the current segments (m segments each)
+        hydcase_obs, hydcase_sim: arrays with the current hydrological cases
+        hydcase_obs_orig, hydcase_sim_orig: arrays with the hydrological cases before coarse-graining
+        error_model: 'standard' or 'relative' (see f_sd)
+    OUTPUT
+        criteria: tuple with four (m,m) matrices (row: erased obs segment, column: erased sim segment), normalized to 0=best ... 1=worst
+            - percentage of false hydcases (obs + sim)
+            - relevance of the deleted segments (obs + sim)
+            - mean absolute SD timing error
+            - mean absolute SD value error
+        Note: the first and last rows/columns are NaN, as the first and last segment are never erased
+    METHOD
+        The criteria do not depend on the weights of the objective function, so they are computed once per coarse-graining step,
+        also when several weight vectors share the step (see f_weight_sweep)
+    """
+
+    # Error checking
+    if hydcase_obs[0] != hydcase_sim[0] or len(segs_obs) != len(segs_sim):
+        raise ValueError('error in big loop')
+
+    # Evaluate all possible segment reduction combinations: the obs and sim side are aggregated once per segment
+    numfalsecase_obs, rel_del_seg_obs = f_candidate_merges(segs_obs, hydcase_obs, hydcase_obs_orig, obs)
+    numfalsecase_sim, rel_del_seg_sim = f_candidate_merges(segs_sim, hydcase_sim, hydcase_sim_orig, sim)
+
+    # (m,m) matrices for all combinations (first and last segment are never erased --> NaN)
+    tmp_percfalsecase = (numfalsecase_obs[:, None] / len(obs)) + (numfalsecase_sim[None, :] / len(sim))  # percentage of false hydcases (obs + sim)
+    tmp_rel_del_seg = rel_del_seg_obs[:, None] + rel_del_seg_sim[None, :]  # relevance of deleted segments (obs + sim)
+    tmp_mafdist_t, tmp_mafdist_v = f_candidate_sd_errors(obs, segs_obs, sim, segs_sim, error_model)  # timing and value error (SD of all combinations)
+
+    # Normalize the criteria. NOTE: For all criteria: the smaller = the better 0=best, 1=worst
+    criteria = (f_normalize(tmp_percfalsecase), f_normalize(tmp_rel_del_seg), f_normalize(tmp_mafdist_t), f_normalize(tmp_mafdist_v))
+
+    return criteria
\ No newline at end of file
@@ -0,0 +1,47 @@
+import numpy as np
+
+def f_candidate_merges(segs, hydcase, hydcase_orig, y):
+    """
+    Evaluates erasing each segment of one series (obs or sim) for one coarse-graining step
+
+    INPUT
+        segs: SegmentTable with the current segments (m segments)
+        hydcase: (n,1) array with the current hydrological cases
+        hydcase_orig: (n,1) array with the hydrological cases of the original (not coarse-grained) series
+        y: (n,1) array with values
+    OUTPUT
+        numfalsecase: (m,) array with the number of time steps whose hydcase differs from hydcase_orig after erasing segment z
+        rel_del_seg: (m,) array with the relevance of segment z (i.e. the relevance deleted by erasing it)
+        Note: the first and last entries are NaN, as the first and last segment are never erased
+    METHOD
+        The obs and sim side of a candidate (z_obs, z_sim) are independent of each other, so each side is evaluated only once
+        per segment. The (m,m) matrices of the objective function are outer sums of these vectors.
+        Erasing segment z only changes the hydcases of its time steps start ... end-1 to the hydcase at start-1 (as in
+        f_aggregate_segment). The number of false hydcases of each candidate is therefore counted from prefix sums,
+        without copying the segments and hydcases for each candidate.
+    """
+
+    m = len(segs)
+    numfalsecase = np.full(m, np.nan)
+    rel_del_seg = np.full(m, np.nan)
+    if m < 3:  # nothing to erase
+        return numfalsecase, rel_del_seg
+
+    z = np.arange(1, m - 1)  # all segments, except the first and last
+    start = segs['starttime_local'][z]
+    end = segs['endtime_local'][z]
+    new_case = hydcase[start - 1]  # hydcase taken over by the erased time steps
+
+    # prefix sums of the false hydcases and of the time steps of each hydcase in the original series
+    cum_false = np.concatenate(([0], np.cumsum(hydcase_orig != hydcase)))
+    cases = np.unique(hydcase_orig)
+    cum_case = np.concatenate((np.zeros((len(cases), 1), dtype=int), np.cumsum(hydcase_orig[None, :] == cases[:, None], axis=1)), axis=1)
+
+    # time steps of the erased range that have the new hydcase in the original series
+    case_index = np.minimum(np.searchsorted(cases, new_case), len(cases) - 1)
+    num_equal = np.where(cases[case_index] == new_case, cum_case[case_index, end] - cum_case[case_index, start], 0)
+
+    rel_del_seg[z] = segs['relevance'][z]  # the relevance of the erased segment
+    numfalsecase[z] = cum_false[-1] - (cum_false[end] - cum_false[start]) + ((end - start) - num_equal)
+
+    return numfalsecase, rel_del_seg
\ No newline at end of file
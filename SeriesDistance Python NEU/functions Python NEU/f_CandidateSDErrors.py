@@ -0,0 +1,99 @@
+import numpy as np
+from f_SD import f_sd_connector_counts, f_sd_pair_sums
+
+def f_candidate_sd_errors(y_obs, segs_obs, y_sim, segs_sim, error_model):
+    """
+    Mean absolute SD timing and magnitude errors for all candidate merges of one coarse-graining step
+
+    INPUT
+        y_obs: (n,1) array with observed values
+        segs_obs: SegmentTable with the current obs segments (m segments)
+        y_sim: (n,1) array with simulated values
+        segs_sim: SegmentTable with the current sim segments (m segments)
+        error_model: 'standard' or 'relative' (see f_sd)
+    OUTPUT
+        tmp_mafdist_t: (m,m) matrix with the mean absolute SD timing error after erasing obs segment z_obs (row) and sim segment z_sim (column)
+        tmp_mafdist_v: (m,m) matrix with the mean absolute SD magnitude error, same layout
+        Note: first and last rows/columns are NaN, as the first and last segment are never erased
+    METHOD
+        Erasing segment z merges segments z-1, z and z+1. All other segments stay as they are, only the pairing of obs and sim
+        segments between z_obs and z_sim shifts by two. The error sums are therefore computed once per step for
+        - all current pairs (obs z, sim z)
+        - all shifted pairs (obs z+2, sim z) and (obs z, sim z+2)
+        - all pairs involving a merged segment
+        and each candidate is assembled from prefix sums of these terms instead of applying f_sd to the whole candidate segmentation.
+        The result equals the mean(abs(e_t)), mean(abs(e_q)) of f_sd for each candidate (up to rounding).
+    """
+
+    m = len(segs_obs)
+
+    tmp_mafdist_t = np.full((m, m), np.nan)
+    tmp_mafdist_v = np.full((m, m), np.nan)
+    if m < 3:  # nothing to erase
+        return tmp_mafdist_t, tmp_mafdist_v
+
+    # segment boundaries [starttime_local, endtime_local, starttime_global, endtime_global] and relevances
+    bounds_obs = segs_obs.bounds
+    bounds_sim = segs_sim.bounds
+    rel_obs = segs_obs['relevance']
+    rel_sim = segs_sim['relevance']
+
+    # merged segments (erase z --> join z-1, z, z+1), for z = 1 ... m-2 (same update as in f_aggregate_segment)
+    z = np.arange(1, m - 1)
+    merged_bounds_obs = np.column_stack((bounds_obs[z - 1, 0], bounds_obs[z + 1, 1], bounds_obs[z - 1, 2], bounds_obs[z + 1, 3]))
+    merged_bounds_sim = np.column_stack((bounds_sim[z - 1, 0], bounds_sim[z + 1, 1], bounds_sim[z - 1, 2], bounds_sim[z + 1, 3]))
+    merged_rel_obs = rel_obs[z - 1] + (rel_obs[z] + rel_obs[z + 1])
+    merged_rel_sim = rel_sim[z - 1] + (rel_sim[z] + rel_sim[z + 1])
+
+    # the total number of connectors and the overall relevance do not change by merging
+    totnumcons = (len(y_obs) + len(y_sim)) * 0.5
+    sum_rels = np.sum(rel_obs) + np.sum(rel_sim)
+
+    # all segment pairs that can occur in any candidate segmentation
+    k = np.arange(m - 2)
+    pair_bounds_obs = [bounds_obs,              # (obs z, sim z)
+                       bounds_obs[k + 2],       # (obs z+2, sim z)
+                       bounds_obs[k],           # (obs z, sim z+2)
+                       merged_bounds_obs,       # (merged obs z, sim z-1)
+                       merged_bounds_obs,       # (merged obs z, sim z+1)
+                       merged_bounds_obs,       # (merged obs z, merged sim z)
+                       bounds_obs[z + 1],       # (obs z+1, merged sim z)
+                       bounds_obs[z - 1]]       # (obs z-1, merged sim z)
+    pair_bounds_sim = [bounds_sim, bounds_sim[k], bounds_sim[k + 2], bounds_sim[z - 1], bounds_sim[z + 1], merged_bounds_sim, merged_bounds_sim, merged_bounds_sim]
+    pair_rel_obs = [rel_obs, rel_obs[k + 2], rel_obs[k], merged_rel_obs, merged_rel_obs, merged_rel_obs, rel_obs[z + 1], rel_obs[z - 1]]
+    pair_rel_sim = [rel_sim, rel_sim[k], rel_sim[k + 2], rel_sim[z - 1], rel_sim[z + 1], merged_rel_sim, merged_rel_sim, merged_rel_sim]
+
+    num = f_sd_connector_counts(np.concatenate(pair_rel_obs), np.concatenate(pair_rel_sim), totnumcons, sum_rels)
+    sum_e_t, sum_e_q = f_sd_pair_sums(y_obs, np.concatenate(pair_bounds_obs), y_sim, np.concatenate(pair_bounds_sim), num, error_model)
+
+    # split the pair terms again, stacked as [sum_e_t, sum_e_q, num] along the first axis
+    terms = np.split(np.vstack((sum_e_t, sum_e_q, num)), np.cumsum([len(rel) for rel in pair_rel_obs])[:-1], axis=1)
+    same, shift_obs, shift_sim, mobs_prev, mobs_next, mobs_msim, next_msim, prev_msim = terms
+
+    # prefix sums (with a leading zero) of the unchanged and shifted pairs
+    cum_same = np.concatenate((np.zeros((3, 1)), np.cumsum(same, axis=1)), axis=1)
+    cum_shift_obs = np.concatenate((np.zeros((3, 1)), np.cumsum(shift_obs, axis=1)), axis=1)
+    cum_shift_sim = np.concatenate((np.zeros((3, 1)), np.cumsum(shift_sim, axis=1)), axis=1)
+
+    # assemble all candidates (a = erased obs segment, b = erased sim segment), the merged terms are indexed by a-1 resp. b-1
+    a = np.broadcast_to(z[:, None], (m - 2, m - 2))
+    b = np.broadcast_to(z[None, :], (m - 2, m - 2))
+    lo = np.minimum(a, b)  # the first changed pair of the candidate segmentation
+    hi = np.maximum(a, b)  # the last changed pair is hi-1
+
+    # unchanged pairs before lo-1 and after hi+1
+    total = cum_same[:, lo - 1] + (cum_same[:, [m]][:, :, None] - cum_same[:, hi + 2])
+
+    # a < b: (merged obs a, sim a-1), (obs k+2, sim k) for k = a ... b-2, (obs b+1, merged sim b)
+    obs_first = mobs_prev[:, a - 1] + (cum_shift_obs[:, b - 1] - cum_shift_obs[:, a]) + next_msim[:, b - 1]
+    # a > b: (obs b-1, merged sim b), (obs k, sim k+2) for k = b ... a-2, (merged obs a, sim a+1)
+    sim_first = prev_msim[:, b - 1] + (cum_shift_sim[:, a - 1] - cum_shift_sim[:, b]) + mobs_next[:, a - 1]
+    # a == b: (merged obs a, merged sim a)
+    both = mobs_msim[:, a - 1]
+
+    total = total + np.where(a < b, obs_first, np.where(a > b, sim_first, both))
+
+    tmp_mafdist_t[1:-1, 1:-1] = total[0] / total[2]
+    tmp_mafdist_v[1:-1, 1:-1] = total[1] / total[2]
+
+    return tmp_mafdist_t, tmp_mafdist_v
@@ -3,42 +3,23 @@ from f_TrimSeries import f_trim_series
 from f_calc_hyd_case import f_calc_hyd_case
 from f_DefineSegments import f_define_segments
 from f_AggregateSegment import f_aggregate_segment
+from f_DiffIndex import f_diff_index
 from f_normalize import f_normalize
-from f_SD import f_sd
+from f_SD import f_sd, f_error_models
+from f_CandidateCriteria import f_candidate_criteria
+from f_WeightSweep import f_weight_sweep
 from f_SegStats import f_SegStats
 from f_PlotCoarseGrainIntSteps import f_PlotCoarseGrainIntSteps
 
 
-def f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, plot_intermedSteps):
+def _prepare_event(obs, obs_eventindex, sim, sim_eventindex):
     """
-    Apply coarse-graining and SD method to each event.
-
-    Parameters:
-    obs: (n,1) matrix with observed discharge
-    obs_eventindex: index of observed events
-    sim: (n,1) matrix with simulated discharge
-    sim_eventindex: index of simulated events
-    weight_nfc: (1) weighting factor for the number of false hydrological cases, used in the objective function.
-                The higher the more relevant. Recommended value: 1
-    weight_rds: (1) weighting factor for the relevance of the deleted segments, used in the objective function.
-                The higher the more relevant. Recommended value: 1 
-    weight_sdt: (1) weighting factor for the series distance time error, used in the objective function.
-                The higher the more relevant. Recommended value: 5
-    weight_sdv: (1) weighting factor for the series distance value (or magnitude) error, used in the objective function.
-                The higher the more relevant. Recommended value: 0         
-    error_model: (1) sets the way the magnitude distance among obs and sim is computed
-                but only in the last step, (section %%'compute and return the final, optimized series distances'
-                with the optimized set of segments. During optimization, a simple distance (obs - sim) is used
-                if 'true': dist_v = (obs - sim) / ((obs + sim)*0.5)
-                if 'false': dist_v = (obs - sim)
-                Recommended: 'true'    
-    plot_intermedSteps: Plots intermediate coarse graining steps
+    Pre-processing of one event: trims obs and sim, defines the segments and equalizes the # of segments (see f_CoarseGraining_Event)
 
-    Returns:
-    segs_obs_opt, segs_sim_opt, cons, connector_data, ObFuncVal, opt_step, CoarseGrain_segs, seg_raw_statistics
+    OUTPUT
+        obs, sim, hydcase_obs_orig, hydcase_sim_orig, hydcase_obs, hydcase_sim, diff_index_obs, diff_index_sim, segs_obs, segs_sim, seg_raw_statistics
     """
 
-    # Pre-processing
     obs = obs[obs_eventindex]
     sim = sim[sim_eventindex]
 
@@ -52,9 +33,13 @@ def f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc,
     hydcase_obs = hydcase_obs_orig  # will change with increasing segment merging
     hydcase_sim = hydcase_sim_orig  # will change with increasing segment merging
 
+    # Cumulative differences of the two series (segment properties are looked up there during aggregation)
+    diff_index_obs = f_diff_index(obs)
+    diff_index_sim = f_diff_index(sim)
+
     # Define segments in the two time series
-    segs_obs = f_define_segments(x_obs, obs)
-    segs_sim = f_define_segments(x_sim, sim)
+    segs_obs = f_define_segments(x_obs, obs, diff_index_obs)
+    segs_sim = f_define_segments(x_sim, sim, diff_index_sim)
 
     # print('\n')
     # print('Input f_SegStats:')
@@ -91,13 +76,84 @@ def f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc,
     # Equalize the # of segments starting with the least relevant segment in the event which has more segments
     while seg_diff != 0:  # only required if the number of segments differs 
         if seg_diff > 0:  # more obs than sim segments
-            segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs)  # erase the least relevant segment
+            segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs, diff_index=diff_index_obs)  # erase the least relevant segment
         else:  # more sim than obs segments
-            segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim)  # erase the least relevant segment
+            segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim, diff_index=diff_index_sim)  # erase the least relevant segment
         seg_diff = len(segs_obs) - len(segs_sim)  # number of segments still unequal?
 
-    # Cleanup
-    del seg_diff, x_sim, x_obs
+    return obs, sim, hydcase_obs_orig, hydcase_sim_orig, hydcase_obs, hydcase_sim, diff_index_obs, diff_index_sim, segs_obs, segs_sim, seg_raw_statistics
+
+
+def _best_merge(criteria, weights):
+    """
+    Best erase-combination (pos_obs, pos_sim) of one coarse-graining step for the weights (weight_nfc, weight_rds, weight_sdt, weight_sdv)
+    """
+
+    weight_nfc, weight_rds, weight_sdt, weight_sdv = weights
+    norm_tmp_percfalsecase, norm_tmp_rel_del_seg, norm_tmp_mafdist_t, norm_tmp_mafdist_v = criteria
+
+    # Join the criteria to calculate the objective function (euclidean distance)
+    tmp_opt_step = np.sqrt(weight_nfc * norm_tmp_percfalsecase**2 +
+                           weight_rds * norm_tmp_rel_del_seg**2 +
+                           weight_sdt * norm_tmp_mafdist_t**2 +
+                           weight_sdv * norm_tmp_mafdist_v**2)
+
+    # Find the minimum (=best) value (ignoring the NaN of the first and last segment, as min() in matlab)
+    pos_obs, pos_sim = np.unravel_index(np.nanargmin(tmp_opt_step), tmp_opt_step.shape)
+
+    return int(pos_obs), int(pos_sim)
+
+
+def _optimal_step(percfalsecase, mafdist_t, mafdist_v, weights):
+    """
+    Objective function of all coarse graining steps and the optimal step (weight_rds is not used here)
+    """
+
+    weight_nfc, _, weight_sdt, weight_sdv = weights
+    ObFuncVal = np.sqrt(weight_nfc * f_normalize(percfalsecase) ** 2 +
+                        weight_sdt * f_normalize(mafdist_t) ** 2 +
+                        weight_sdv * f_normalize(mafdist_v) ** 2)
+
+    return ObFuncVal, np.argmin(ObFuncVal)
+
+
+def f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, plot_intermedSteps):
+    """
+    Apply coarse-graining and SD method to each event.
+
+    Parameters:
+    obs: (n,1) matrix with observed discharge
+    obs_eventindex: index of observed events
+    sim: (n,1) matrix with simulated discharge
+    sim_eventindex: index of simulated events
+    weight_nfc: (1) weighting factor for the number of false hydrological cases, used in the objective function.
+                The higher the more relevant. Recommended value: 1
+    weight_rds: (1) weighting factor for the relevance of the deleted segments, used in the objective function.
+                The higher the more relevant. Recommended value: 1 
+    weight_sdt: (1) weighting factor for the series distance time error, used in the objective function.
+                The higher the more relevant. Recommended value: 5
+    weight_sdv: (1) weighting factor for the series distance value (or magnitude) error, used in the objective function.
+                The higher the more relevant. Recommended value: 0         
+    error_model: (1) sets the way the magnitude distance among obs and sim is computed
+                but only in the last step, (section %%'compute and return the final, optimized series distances'
+                with the optimized set of segments. During optimization, a simple distance (obs - sim) is used
+                if 'true': dist_v = (obs - sim) / ((obs + sim)*0.5)
+                if 'false': dist_v = (obs - sim)
+                Recommended: 'true'    
+                a set of error models (e.g. ['standard', 'relative']): the coarse-graining is optimized for the first one,
+                the SD errors of all are computed on the optimized segments (see f_run_events)
+    plot_intermedSteps: Plots intermediate coarse graining steps
+
+    Returns:
+    segs_obs_opt, segs_sim_opt, cons, connector_data, ObFuncVal, opt_step, CoarseGrain_segs, seg_raw_statistics
+    """
+
+    # With a set of error models, the coarse-graining is optimized for the first one
+    error_model = f_error_models(error_model)[0][0]
+
+    # Pre-processing: trim, segment and equalize the # of segments of obs and sim
+    obs, sim, hydcase_obs_orig, hydcase_sim_orig, hydcase_obs, hydcase_sim, diff_index_obs, diff_index_sim, segs_obs, segs_sim, seg_raw_statistics = \
+        _prepare_event(obs, obs_eventindex, sim, sim_eventindex)
 
     # print('check 1')
     # print('segs_obs:', segs_obs)
@@ -112,7 +168,7 @@ def f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc,
     percfalsecase = np.full((num_red + 1, 1), np.nan)  # number of wrong hydcase assignments
     mafdist_t = np.full((num_red + 1, 1), np.nan)  # Mean Absolute Time Error of SD [h]
     mafdist_v = np.full((num_red + 1, 1), np.nan)  # Mean Absolute Value Error of SD [m3/s]
-    segment_data = [None] * (num_red + 1)  # (num_red,3) list which contains the best obs and sim segments (col 1 and 2) found for each reduction step and joint SD properties (col 3)
+    segment_data = [None] * (num_red + 1)  # (num_red,3) list which contains the best obs and sim segment tables (col 1 and 2) found for each reduction step and joint SD properties (col 3)
     connector_data = [None] * (num_red + 1)  # list which contains the connectors of the different coarse graining steps
     # NOTE: first entries contain the initial state before coarse graining
 
@@ -144,7 +200,7 @@ def f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc,
     
     # Store segment combinations for initial conditions
     CoarseGrain_segs = []
-    current_segs = np.column_stack((np.ones(len(segs_obs)), [seg['starttime_global'] for seg in segs_obs], [seg['endtime_global'] for seg in segs_obs], [seg['starttime_global'] for seg in segs_sim], [seg['endtime_global'] for seg in segs_sim]))
+    current_segs = np.column_stack((np.ones(len(segs_obs)), segs_obs['starttime_global'], segs_obs['endtime_global'], segs_sim['starttime_global'], segs_sim['endtime_global']))
     CoarseGrain_segs.append(current_segs)
     
     # print('Check store segment')
@@ -161,63 +217,11 @@ def f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc,
 
     # Iterative coarse-graining: Jointly aggregate segments in obs and sim, one by one, until the event is represented by two obs and two sim segments
     for z in range(num_red):  # reduce until only 2 or 3 segments are left (2: when started with even # of segments, 3: when started with odd # of segments)
-        # Error checking
-        if hydcase_obs[0] != hydcase_sim[0] or len(segs_obs) != len(segs_sim):
-            raise ValueError('error in big loop')
-
-        # Initialize temporary variables (temporary for one reduction step)
-        tmp_percfalsecase = np.full((len(segs_obs), len(segs_obs)), np.nan)  # (m,m) matrix with percentage of false hydcases (obs + sim) for all possible reduction combinations
-        tmp_rel_del_seg = np.full((len(segs_obs), len(segs_obs)), np.nan)  # (m,m) matrix with relevance of deleted segments (obs + sim)
-        tmp_mafdist_t = np.full((len(segs_obs), len(segs_obs)), np.nan)  # (m,m) matrix with timing error
-        tmp_mafdist_v = np.full((len(segs_obs), len(segs_obs)), np.nan)  # (m,m) matrix with value error
-    
-        # Loop over all possible segment reduction combinations
-        for z_obs in range(1, len(segs_obs) - 1):  # loop over all observed segments, except the first and last
-            # For each new loop, start with the best selection of the previous z-round
-            tmp_segs_obs = segs_obs.copy()
-            tmp_hydcase_obs = hydcase_obs.copy()
-
-            tmp_rel_obs = tmp_segs_obs[z_obs]['relevance']  # save the relevance of the segment before it is deleted
-            tmp_segs_obs, tmp_hydcase_obs = f_aggregate_segment(tmp_segs_obs, tmp_hydcase_obs, obs, z_obs)  # erase the specified segment
-        
-            for z_sim in range(1, len(segs_sim) - 1):  # loop over all simulated segments, except the first and last
-                # For each new loop, start with the best selection of the previous z-round
-                tmp_segs_sim = segs_sim.copy()
-                tmp_hydcase_sim = hydcase_sim.copy()
-            
-                tmp_rel_sim = tmp_segs_sim[z_sim]['relevance']  # save the relevance of the segment before it is deleted
-                tmp_segs_sim, tmp_hydcase_sim = f_aggregate_segment(tmp_segs_sim, tmp_hydcase_sim, sim, z_sim)  # erase the specified segment
-           
-                # Compute percentage of false hyd. cases and relative importance
-                tmp_percfalsecase[z_obs, z_sim] = (len(np.where(hydcase_obs_orig != tmp_hydcase_obs)[0]) / len(obs)) + \
-                                                  (len(np.where(hydcase_sim_orig != tmp_hydcase_sim)[0]) / len(sim))
-                tmp_rel_del_seg[z_obs, z_sim] = tmp_rel_obs + tmp_rel_sim
-            
-                # Apply SD
-                fdist_q, fdist_t, _, _, _, _, _, _, _, cons, _, _ = f_sd(obs, tmp_segs_obs, sim, tmp_segs_sim, error_model, 'true')
-                tmp_mafdist_t[z_obs, z_sim] = np.mean(np.abs(fdist_t))
-                tmp_mafdist_v[z_obs, z_sim] = np.mean(np.abs(fdist_q))
-        
+        # Evaluate all possible segment reduction combinations (normalized criteria, incl. error checking)
+        criteria = f_candidate_criteria(obs, segs_obs, hydcase_obs, hydcase_obs_orig, sim, segs_sim, hydcase_sim, hydcase_sim_orig, error_model)
+
         # Find the best erase-combination for the given step using an objective function
-        # Normalize and weight the criteria. NOTE: For all criteria: the smaller = the better 0=best, 1=worst
-        norm_tmp_percfalsecase = f_normalize(tmp_percfalsecase)
-        norm_tmp_rel_del_seg = f_normalize(tmp_rel_del_seg)
-        norm_tmp_mafdist_t = f_normalize(tmp_mafdist_t)
-        norm_tmp_mafdist_v = f_normalize(tmp_mafdist_v)
-
-        # Join the criteria to calculate the objective function (euclidean distance)   
-        tmp_opt_step = np.full((len(segs_obs), len(segs_obs)), np.nan)        
-        for yyy in range(len(tmp_opt_step)):
-            for zzz in range(len(tmp_opt_step)):
-                tmp_opt_step[yyy, zzz] = np.sqrt(weight_nfc * norm_tmp_percfalsecase[yyy, zzz]**2 + \
-                                                 weight_rds * norm_tmp_rel_del_seg[yyy, zzz]**2 + \
-                                                 weight_sdt * norm_tmp_mafdist_t[yyy, zzz]**2 + \
-                                                 weight_sdv * norm_tmp_mafdist_v[yyy, zzz]**2)
-
-        # Find the minimum (=best) value
-        pos_obs, pos_sim = np.unravel_index(np.argmin(tmp_opt_step), tmp_opt_step.shape)
-        pos_obs = pos_obs  # reduce to size 1 in case several equally small values were found
-        pos_sim = pos_sim  # reduce to size 1 in case several equally small values were found  
+        pos_obs, pos_sim = _best_merge(criteria, (weight_nfc, weight_rds, weight_sdt, weight_sdv))
 
         # Execute the change on the real events
 
@@ -226,8 +230,8 @@ def f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc,
         # segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim, pos_sim)  # erase the specified segment
 
         try:
-            segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs, pos_obs)  # erase the specified segment
-            segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim, pos_sim)  # erase the specified segment
+            segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs, pos_obs, diff_index=diff_index_obs)  # erase the specified segment
+            segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim, pos_sim, diff_index=diff_index_sim)  # erase the specified segment
         except:
             # segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs)  # erase the specified segment
             # segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim)  # erase the specified segment
@@ -261,7 +265,7 @@ def f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc,
         # CoarseGrain_segs = np.vstack((CoarseGrain_segs, current_segs))
 
         rowindex = (z + 2) * np.ones(len(segs_obs))
-        current_segs = np.column_stack((rowindex, [seg['starttime_global'] for seg in segs_obs], [seg['endtime_global'] for seg in segs_obs], [seg['starttime_global'] for seg in segs_sim], [seg['endtime_global'] for seg in segs_sim]))
+        current_segs = np.column_stack((rowindex, segs_obs['starttime_global'], segs_obs['endtime_global'], segs_sim['starttime_global'], segs_sim['endtime_global']))
         
         # print('rowindex:', rowindex)
         # print('rowindex type:', type(rowindex))
@@ -287,12 +291,9 @@ def f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc,
         # display progress info
         print(f'coarse graining step {z} of {num_red}')
 
-        # Calculate objective function and find the optimal coarse graining step
-        ObFuncVal = np.sqrt(weight_nfc * f_normalize(percfalsecase) ** 2 +
-                            weight_sdt * f_normalize(mafdist_t) ** 2 +
-                            weight_sdv * f_normalize(mafdist_v) ** 2)
-
-        opt_step = np.argmin(ObFuncVal)
+    # Calculate objective function and find the optimal coarse graining step (after all steps are done)
+    if num_red > 0:
+        ObFuncVal, opt_step = _optimal_step(percfalsecase, mafdist_t, mafdist_v, (weight_nfc, weight_rds, weight_sdt, weight_sdv))
         if len(ObFuncVal) > 1:  # display best coarse graining step
             if opt_step == 0:
                 print('selected step # initial conditions')
@@ -300,14 +301,14 @@ def f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc,
                 print(f'selected step # {opt_step}')
 
         # select and return coarse-grained segments and connectors for optimal level of generalization
-        segs_obs_opt = np.array(segment_data[opt_step][0])
-        segs_sim_opt = np.array(segment_data[opt_step][1])
+        segs_obs_opt = segment_data[opt_step][0]
+        segs_sim_opt = segment_data[opt_step][1]
         cons = np.array(connector_data[opt_step][0])
 
     # Code zu Übersetzung hinzugefügt
     if num_red == 0:
-        segs_obs_opt = np.array(segment_data[0][0])
-        segs_sim_opt = np.array(segment_data[0][1])
+        segs_obs_opt = segment_data[0][0]
+        segs_sim_opt = segment_data[0][1]
 
         ObFuncVal = np.empty(0)
 
@@ -319,4 +320,95 @@ def f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc,
     # print('segs_sim_opt:', segs_sim_opt)
     # print('\n')
 
-    return segs_obs_opt, segs_sim_opt, cons, connector_data, ObFuncVal, opt_step, CoarseGrain_segs, seg_raw_statistics
\ No newline at end of file
+    return segs_obs_opt, segs_sim_opt, cons, connector_data, ObFuncVal, opt_step, CoarseGrain_segs, seg_raw_statistics
+
+def f_CoarseGraining_Event_sweep(obs, obs_eventindex, sim, sim_eventindex, weights, error_model):
+    """
+    Apply coarse-graining and SD method to one event for several weight vectors of the objective function.
+
+    Parameters:
+    obs, obs_eventindex, sim, sim_eventindex, error_model: see f_CoarseGraining_Event
+    weights: list with the weight vectors (weight_nfc, weight_rds, weight_sdt, weight_sdv)
+
+    Returns:
+    results: list with one entry per weight vector, each identical to the output of f_CoarseGraining_Event with these weights
+             (segs_obs_opt, segs_sim_opt, cons, connector_data, ObFuncVal, opt_step, CoarseGrain_segs, seg_raw_statistics)
+
+    The pre-processing and the initial conditions are computed once. The criteria of the candidate merges do not depend on the
+    weights, so each coarse-graining step is computed once for all weight vectors that chose the same erase-combinations so far
+    (see f_weight_sweep). Segment tables and connectors of shared steps are shared between the results.
+    """
+
+    # With a set of error models, the coarse-graining is optimized for the first one
+    error_model = f_error_models(error_model)[0][0]
+
+    # Pre-processing: trim, segment and equalize the # of segments of obs and sim
+    obs, sim, hydcase_obs_orig, hydcase_sim_orig, hydcase_obs, hydcase_sim, diff_index_obs, diff_index_sim, segs_obs, segs_sim, seg_raw_statistics = \
+        _prepare_event(obs, obs_eventindex, sim, sim_eventindex)
+
+    # Determine number of reduction steps
+    num_red = (len(segs_obs) // 2) - 1
+
+    # Apply SD for initial conditions (no reduction, only equalized # of segments)
+    fdist_q, fdist_t, _, _, _, _, _, _, _, cons_initial, _, _ = f_sd(obs, segs_obs, sim, segs_sim, error_model, 'false')
+    initial = {
+        'segments': (segs_obs, segs_sim),
+        'connectors': (cons_initial, 0),
+        'percfalsecase': (len(np.where(hydcase_obs_orig != hydcase_obs)[0]) / len(obs)) + (len(np.where(hydcase_sim_orig != hydcase_sim)[0]) / len(sim)),
+        'mafdist_t': np.mean(np.abs(fdist_t)),
+        'mafdist_v': np.mean(np.abs(fdist_q)),
+        'current_segs': np.column_stack((np.ones(len(segs_obs)), segs_obs['starttime_global'], segs_obs['endtime_global'], segs_sim['starttime_global'], segs_sim['endtime_global']))
+    }
+
+    def candidates(state):
+        segs_obs, hydcase_obs, segs_sim, hydcase_sim = state
+        return f_candidate_criteria(obs, segs_obs, hydcase_obs, hydcase_obs_orig, sim, segs_sim, hydcase_sim, hydcase_sim_orig, error_model)
+
+    def step(state, choice, z):
+        segs_obs, hydcase_obs, segs_sim, hydcase_sim = state
+        pos_obs, pos_sim = choice
+
+        # Execute the change (as in f_CoarseGraining_Event: the state is kept if the aggregation fails)
+        try:
+            segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs, pos_obs, diff_index=diff_index_obs)
+            segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim, pos_sim, diff_index=diff_index_sim)
+        except:
+            pass
+
+        fdist_q, fdist_t, _, _, _, _, _, _, _, cons, _, _ = f_sd(obs, segs_obs, sim, segs_sim, error_model)
+        record = {
+            'segments': [segs_obs, segs_sim],
+            'connectors': [cons, z],
+            'percfalsecase': (len(np.where(hydcase_obs_orig != hydcase_obs)[0]) / len(obs)) + (len(np.where(hydcase_sim_orig != hydcase_sim)[0]) / len(sim)),
+            'mafdist_t': np.mean(np.abs(fdist_t)),
+            'mafdist_v': np.mean(np.abs(fdist_q)),
+            'current_segs': np.column_stack(((z + 2) * np.ones(len(segs_obs)), segs_obs['starttime_global'], segs_obs['endtime_global'], segs_sim['starttime_global'], segs_sim['endtime_global']))
+        }
+
+        return (segs_obs, hydcase_obs, segs_sim, hydcase_sim), record
+
+    paths = f_weight_sweep((segs_obs, hydcase_obs, segs_sim, hydcase_sim), num_red, weights, candidates, _best_merge, step)
+
+    # Assemble the results and find the optimal coarse graining step of each weight vector
+    results = []
+    for weight_vector, path in zip(weights, paths):
+        records = [initial] + path
+        segment_data = [record['segments'] for record in records]
+        connector_data = [record['connectors'] for record in records]
+        CoarseGrain_segs = [record['current_segs'] for record in records]
+
+        if num_red > 0:
+            percfalsecase = np.array([[record['percfalsecase']] for record in records])
+            mafdist_t = np.array([[record['mafdist_t']] for record in records])
+            mafdist_v = np.array([[record['mafdist_v']] for record in records])
+            ObFuncVal, opt_step = _optimal_step(percfalsecase, mafdist_t, mafdist_v, weight_vector)
+            cons = np.array(connector_data[opt_step][0])
+        else:
+            opt_step = 0
+            ObFuncVal = np.empty(0)
+            cons = cons_initial
+
+        results.append((segment_data[opt_step][0], segment_data[opt_step][1], cons, connector_data, ObFuncVal,
+                        opt_step if num_red > 0 else None, CoarseGrain_segs, seg_raw_statistics))
+
+    return results
\ No newline at end of file
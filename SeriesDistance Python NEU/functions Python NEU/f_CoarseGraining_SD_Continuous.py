@@ -1,329 +1,509 @@
+import os
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from f_TrimSeries import f_trim_series
 from f_calc_hyd_case import f_calc_hyd_case
 from f_DefineSegments import f_define_segments
 from f_AggregateSegment import f_aggregate_segment
-from f_SD import f_sd
+from f_DiffIndex import f_diff_index
+from f_SD import f_sd, f_error_models
+from f_CandidateCriteria import f_candidate_criteria
+from f_WeightSweep import f_weight_sweep
 from f_normalize import f_normalize
+from f_SegmentTable import SegmentTable
+from f_Backend import f_set_backend
 
-def f_coarse_graining_continuous(obs, sim, timeseries_splits, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model):
+# obs and sim of the worker processes (set once per worker by _init_worker, not sent with every split)
+_obs_org = None
+_sim_org = None
+
+
+def _init_worker(obs, sim, backend=None):
+    global _obs_org, _sim_org
+    _obs_org = obs
+    _sim_org = sim
+    if backend is not None:
+        f_set_backend(backend)
+
+
+def _prepare_split(obs_org, sim_org, i, timeseries_splits):
     """
-    Coarse-graining function for continuous series distance calculation.
+    Pre-processing of time series split i: trims obs and sim, defines the segments and equalizes the # of segments
+    Returns None if the split cannot be trimmed to start and end with the same hydcase in obs and sim
+
+    OUTPUT
+        obs, sim, hydcase_obs_orig, hydcase_sim_orig, hydcase_obs, hydcase_sim, diff_index_obs, diff_index_sim, segs_obs, segs_sim
     """
 
-    # initialize arrays
-    cons_all = []
-    segs_obs_opt_all = []
-    segs_sim_opt_all = []
-    e_sd_rise_all = []
-    e_sd_fall_all = []
-    e_sd_t_all = []
-    e_sd_q_all = []
-    obs_org = obs.copy()
-    sim_org = sim.copy()
+    # create subset/ split the time series
+    obs_split = obs_org[timeseries_splits[i]:timeseries_splits[i + 1]]
+    sim_split = sim_org[timeseries_splits[i]:timeseries_splits[i + 1]]
+
+    # print('\n')
+    # print('Input for f_trim_series')
+    # print('obs_split shape', obs_split.shape)
+    # print('obs_split type', type(obs_split))
+    # print('sim_split shape', sim_split.shape)
+    # print('sim_split type', type(sim_split))
+    # print('\n')
+
+    # Trim sim and obs to ensure that both start and end with either rise or fall (if necessary)
+    # original code der Übersetzung
+    # obs, x_obs, sim, x_sim = f_trim_series(obs_split, np.arange(timeseries_splits[i], timeseries_splits[i + 1]), sim_split, np.arange(timeseries_splits[i], timeseries_splits[i + 1]))
+
+    try:
+        obs, x_obs, sim, x_sim = f_trim_series(obs_split, np.arange(timeseries_splits[i], timeseries_splits[i + 1]), sim_split, np.arange(timeseries_splits[i], timeseries_splits[i + 1]))
+    except:
+        return None
+        
+    # print('Output from f_trim_series/Input for f_define_segments')
+    # print('obs type', type(obs))
+    # print('obs shape', obs.shape)
+    # print('sim type', type(sim))
+    # print('sim shape', sim.shape)
+    # print('\n')
+    # print('x_obs type', type(x_obs))
+    # print('x_obs shape', x_obs.shape)
+    # print('x_sim type', type(x_sim))
+    # print('x_sim shape', x_sim.shape)
+    # print('\n')
+
+    # Determine the hydrological case for each timestep in the original time series
+    hydcase_obs_orig = f_calc_hyd_case(obs)
+    hydcase_sim_orig = f_calc_hyd_case(sim)
+
+    hydcase_obs = hydcase_obs_orig.copy()
+    hydcase_sim = hydcase_sim_orig.copy()
+
+    # cumulative differences of the two series (segment properties are looked up there during aggregation)
+    diff_index_obs = f_diff_index(obs)
+    diff_index_sim = f_diff_index(sim)
+
+    # define segments in the two time series
+    segs_obs = f_define_segments(x_obs, obs, diff_index_obs)
+    segs_sim = f_define_segments(x_sim, sim, diff_index_sim)
+
+    # print('Output from f_define_segments')
+    # # print('segs_obs', segs_obs)
+    # print('segs_obs type', type(segs_obs))
+    # print('segs_obs dtype', type(segs_obs[0]))
+    # print('segs_obs len', len(segs_obs))
+    # # print('segs_sim', segs_sim)
+    # print('segs_sim type', type(segs_sim))
+    # print('segs_sim dtype', type(segs_sim[0]))
+    # print('segs_sim len', len(segs_sim))
+    # print('\n')
+
+    # check for differences in the number of segments in obs and sim
+    seg_diff = len(segs_obs) - len(segs_sim)
+
+    # error checking: events must have either both even or both odd # of segments
+    if seg_diff % 2 != 0:
+        raise ValueError('f_SeriesDistance: events must have either both even or both odd # of segments!')
+
+    # print('Input for f_aggregate_segment')
+    # # print('hydcase_obs', hydcase_obs)
+    # print('hydcase_obs type', type(hydcase_obs))
+    # print('hydcase shape', hydcase_obs.shape)
+    # print('\n')
+    # # print('hydcase_sim', hydcase_sim)
+    # print('hydcase_sim type', type(hydcase_sim))
+    # print('hydcase_sim shape', hydcase_sim.shape)
+    # print('\n')
+
+    # equalize the # of segments starting with the least relevant segment in the time series which has more segments
+    while seg_diff != 0:
+        if seg_diff > 0:  # more obs than sim segments
+            segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs, diff_index=diff_index_obs)
+        else:  # more sim than obs segments
+            segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim, diff_index=diff_index_sim)
+        seg_diff = len(segs_obs) - len(segs_sim)
+
+    # print('Output from f_aggregate_segment')
+    # print('segs_obs type', type(segs_obs))
+    # print('segs_obs dtype', type(segs_obs[0]))
+    # print('segs_obs len', len(segs_obs))
+    # print('\n')
+    # # print('hydcase_obs', hydcase_obs)
+    # print('hydcase_obs type', type(hydcase_obs))
+    # print('hydcase_obs shape', hydcase_obs.shape)
+    # print('\n')
+    
+    # print('segs_sim type', type(segs_sim))
+    # print('segs_sim dtype', type(segs_sim[0]))
+    # print('segs_sim len', len(segs_sim))
+    # print('\n')
+    # # print('hydcase_sim', hydcase_sim)
+    # print('hydcase_sim type', type(hydcase_sim))
+    # print('hydcase_sim shape', hydcase_sim.shape)
+    # print('\n')
+
+    return obs, sim, hydcase_obs_orig, hydcase_sim_orig, hydcase_obs, hydcase_sim, diff_index_obs, diff_index_sim, segs_obs, segs_sim
+
+
+def _best_merge(criteria, weights):
+    """
+    Best erase-combination (pos_obs, pos_sim) of one reduction step for the weights (weight_nfc, weight_rds, weight_sdt, weight_sdv)
+    """
+
+    weight_nfc, weight_rds, weight_sdt, weight_sdv = weights
+    crit_percfalsecase, crit_rel_del_seg, crit_mafdist_t, crit_mafdist_v = criteria
+
+    norm_tmp_percfalsecase = weight_nfc * crit_percfalsecase
+    norm_tmp_rel_del_seg = weight_rds * crit_rel_del_seg
+    norm_tmp_mafdist_t = weight_sdt * crit_mafdist_t
+    norm_tmp_mafdist_v = weight_sdv * crit_mafdist_v
+
+    tmp_opt = np.sqrt(norm_tmp_percfalsecase**2 + norm_tmp_rel_del_seg**2 + norm_tmp_mafdist_t**2 + norm_tmp_mafdist_v**2)
+
+    pos_obs, pos_sim = np.unravel_index(np.nanargmin(tmp_opt), tmp_opt.shape)  # ignore the NaN of the first and last segment
+
+    return int(pos_obs), int(pos_sim)
+
+
+def _optimal_step(percfalsecase, mafdist_t, mafdist_v, weights):
+    """
+    Objective function of all reduction steps and the optimal step (weight_rds is not used here)
+    """
+
+    weight_nfc, _, weight_sdt, weight_sdv = weights
+    ObFuncVal = np.sqrt(weight_nfc * f_normalize(percfalsecase)**2 + weight_sdt * f_normalize(mafdist_t)**2 + weight_sdv * f_normalize(mafdist_v)**2)
+
+    return ObFuncVal, np.argmin(ObFuncVal)
+
 
-    # pre-processing
-    for i in range(len(timeseries_splits) - 1):
-        # display progress information
+def f_coarse_graining_split(obs_org, sim_org, i, timeseries_splits, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, show_progress=True):
+    """
+    Coarse-graining and SD of a single time series split (split i, from timeseries_splits[i] to timeseries_splits[i + 1])
+
+    INPUT
+        obs_org, sim_org: arrays with the observed and simulated discharge of the entire time series
+        weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model: see f_coarse_graining_continuous
+        show_progress: prints the split and reduction step progress (default=True)
+    OUTPUT
+        split_result: dict with 'segs_obs_opt', 'segs_sim_opt', 'cons', 'e_sd_rise_opt', 'e_sd_fall_opt' of the optimal
+                      coarse-graining step, or None if the split cannot be trimmed to start and end with the same hydcase in obs and sim
+    """
+
+    # display progress information
+    if show_progress:
         txt = f'time series split {i} of {len(timeseries_splits) - 1}'
         print(txt)
 
-        # create subset/ split the time series
-        obs_split = obs_org[timeseries_splits[i]:timeseries_splits[i + 1]]
-        sim_split = sim_org[timeseries_splits[i]:timeseries_splits[i + 1]]
+    # trim, segment and equalize the # of segments of obs and sim
+    prepared = _prepare_split(obs_org, sim_org, i, timeseries_splits)
+    if prepared is None:
+        return None
+    obs, sim, hydcase_obs_orig, hydcase_sim_orig, hydcase_obs, hydcase_sim, diff_index_obs, diff_index_sim, segs_obs, segs_sim = prepared
+
+    # with a set of error models, the coarse-graining is optimized for the first one (the SD errors are returned for all)
+    models, keyed = f_error_models(error_model)
+
+    # iterative reduction of segments and calculation of the selected statistics of agreement
+
+    # determine number of reduction steps
+    num_red = (len(segs_obs) // 2) - 1
+
+    # initialize arrays
+    percfalsecase = np.full(num_red + 1, np.nan)
+    mafdist_t = np.full(num_red + 1, np.nan)
+    mafdist_v = np.full(num_red + 1, np.nan)
+    segment_data = [None] * (num_red + 1)
+    connector_data = [None] * (num_red + 1)
+    e_sd_rise = [None] * (num_red + 1)
+    e_sd_fall = [None] * (num_red + 1)
+
+    # Apply SD and calculate all three statistics for the initial conditions (no reduction, only equalized # of segments)
+    fdist_q, fdist_t, _, e_q_rise, e_t_rise, _, e_q_fall, e_t_fall, _, cons, e_rise_MD, e_fall_MD = f_sd(obs, segs_obs, sim, segs_sim, error_model)
+
+    # print('Output from f_sd')
+    # print('fdist_q type', type(fdist_q))
+    # print('fdist_t type', type(fdist_t))
+    # print('e_q_rise type', type(e_q_rise))
+    # print('e_t_rise type', type(e_t_rise))
+    # print('e_q_fall type', type(e_q_fall))
+    # print('e_t_fall type', type(e_t_fall))
+    # print('\n')
+    # print('cons', cons)
+    # print('cons type', type(cons))
+    # print('\n')
+    # print('e_rise_MD type', type(e_rise_MD))
+    # print('e_fall_MD type', type(e_fall_MD))
+    # print('\n')
         
-        print('obs_split', obs_split)
-        raise Exception('FORCED STOP coarsegraining')
-
-        # print('\n')
-        # print('Input for f_trim_series')
-        # print('obs_split shape', obs_split.shape)
-        # print('obs_split type', type(obs_split))
-        # print('sim_split shape', sim_split.shape)
-        # print('sim_split type', type(sim_split))
-        # print('\n')
-
-        # Trim sim and obs to ensure that both start and end with either rise or fall (if necessary)
+    # store segments and connectors for initial conditions
+    segment_data[0] = (segs_obs, segs_sim)
+    connector_data[0] = (cons, 0)
+    e_sd_rise[0] = (e_t_rise, e_q_rise)
+    e_sd_fall[0] = (e_t_fall, e_q_fall)
+
+    # calculate objective function inputs for initial conditions
+    percfalsecase[0] = (np.sum(hydcase_obs_orig != hydcase_obs) / len(obs)) + (np.sum(hydcase_sim_orig != hydcase_sim) / len(sim))
+    mafdist_t[0] = np.mean(np.abs(fdist_t))
+    mafdist_v[0] = np.mean(np.abs(fdist_q[models[0]] if keyed else fdist_q))
+
+    # apply coarse-graining to all time series splits (big for-loop): Jointly reduce obs/sim segments, one by one, until only one obs and one sim segment are left
+    for z in range(num_red):
+        # evaluate all possible segment reduction combinations (normalized criteria)
+        criteria = f_candidate_criteria(obs, segs_obs, hydcase_obs, hydcase_obs_orig, sim, segs_sim, hydcase_sim, hydcase_sim_orig, models[0])
+
+        # find the best erase-combination for the given reduction step
+        pos_obs, pos_sim = _best_merge(criteria, (weight_nfc, weight_rds, weight_sdt, weight_sdv))
+
+        # execute the change on the real events
+
         # original code der Übersetzung
-        # obs, x_obs, sim, x_sim = f_trim_series(obs_split, np.arange(timeseries_splits[i], timeseries_splits[i + 1]), sim_split, np.arange(timeseries_splits[i], timeseries_splits[i + 1]))
+        # segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs, pos_obs)
+        # segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim, pos_sim)
 
         try:
-            obs, x_obs, sim, x_sim = f_trim_series(obs_split, np.arange(timeseries_splits[i], timeseries_splits[i + 1]), sim_split, np.arange(timeseries_splits[i], timeseries_splits[i + 1]))
+            segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs, pos_obs, diff_index=diff_index_obs)
+            segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim, pos_sim, diff_index=diff_index_sim)
         except:
+            # segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs)
+            # segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim)
             continue
-        
-        # print('Output from f_trim_series/Input for f_define_segments')
-        # print('obs type', type(obs))
-        # print('obs shape', obs.shape)
-        # print('sim type', type(sim))
-        # print('sim shape', sim.shape)
-        # print('\n')
-        # print('x_obs type', type(x_obs))
-        # print('x_obs shape', x_obs.shape)
-        # print('x_sim type', type(x_sim))
-        # print('x_sim shape', x_sim.shape)
-        # print('\n')
-
-        # Determine the hydrological case for each timestep in the original time series
-        hydcase_obs_orig = f_calc_hyd_case(obs)
-        hydcase_sim_orig = f_calc_hyd_case(sim)
-
-        hydcase_obs = hydcase_obs_orig.copy()
-        hydcase_sim = hydcase_sim_orig.copy()
-
-        # define segments in the two time series
-        segs_obs = f_define_segments(x_obs, obs)
-        segs_sim = f_define_segments(x_sim, sim)
-
-        # print('Output from f_define_segments')
-        # # print('segs_obs', segs_obs)
-        # print('segs_obs type', type(segs_obs))
-        # print('segs_obs dtype', type(segs_obs[0]))
-        # print('segs_obs len', len(segs_obs))
-        # # print('segs_sim', segs_sim)
-        # print('segs_sim type', type(segs_sim))
-        # print('segs_sim dtype', type(segs_sim[0]))
-        # print('segs_sim len', len(segs_sim))
-        # print('\n')
-
-        # check for differences in the number of segments in obs and sim
-        seg_diff = len(segs_obs) - len(segs_sim)
 
-        # error checking: events must have either both even or both odd # of segments
-        if seg_diff % 2 != 0:
-            raise ValueError('f_SeriesDistance: events must have either both even or both odd # of segments!')
-
-        # print('Input for f_aggregate_segment')
-        # # print('hydcase_obs', hydcase_obs)
-        # print('hydcase_obs type', type(hydcase_obs))
-        # print('hydcase shape', hydcase_obs.shape)
-        # print('\n')
-        # # print('hydcase_sim', hydcase_sim)
-        # print('hydcase_sim type', type(hydcase_sim))
-        # print('hydcase_sim shape', hydcase_sim.shape)
-        # print('\n')
-
-        # equalize the # of segments starting with the least relevant segment in the time series which has more segments
-        while seg_diff != 0:
-            if seg_diff > 0:  # more obs than sim segments
-                segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs)
-            else:  # more sim than obs segments
-                segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim)
-            seg_diff = len(segs_obs) - len(segs_sim)
-
-        # print('Output from f_aggregate_segment')
-        # print('segs_obs type', type(segs_obs))
-        # print('segs_obs dtype', type(segs_obs[0]))
-        # print('segs_obs len', len(segs_obs))
-        # print('\n')
-        # # print('hydcase_obs', hydcase_obs)
-        # print('hydcase_obs type', type(hydcase_obs))
-        # print('hydcase_obs shape', hydcase_obs.shape)
-        # print('\n')
-    
-        # print('segs_sim type', type(segs_sim))
-        # print('segs_sim dtype', type(segs_sim[0]))
-        # print('segs_sim len', len(segs_sim))
-        # print('\n')
-        # # print('hydcase_sim', hydcase_sim)
-        # print('hydcase_sim type', type(hydcase_sim))
-        # print('hydcase_sim shape', hydcase_sim.shape)
-        # print('\n')
-
-        # cleanup
-        del seg_diff
-
-        # iterative reduction of segments and calculation of the selected statistics of agreement
-
-        # determine number of reduction steps
-        num_red = (len(segs_obs) // 2) - 1
-
-        # initialize arrays
-        percfalsecase = np.full(num_red + 1, np.nan)
-        mafdist_t = np.full(num_red + 1, np.nan)
-        mafdist_v = np.full(num_red + 1, np.nan)
-        segment_data = [None] * (num_red + 1)
-        connector_data = [None] * (num_red + 1)
-        e_sd_rise = [None] * (num_red + 1)
-        e_sd_fall = [None] * (num_red + 1)
-
-        # Apply SD and calculate all three statistics for the initial conditions (no reduction, only equalized # of segments)
+        # Calculate Series Distance on the optimized level of aggregated segments return SD errors
         fdist_q, fdist_t, _, e_q_rise, e_t_rise, _, e_q_fall, e_t_fall, _, cons, e_rise_MD, e_fall_MD = f_sd(obs, segs_obs, sim, segs_sim, error_model)
 
-        # print('Output from f_sd')
-        # print('fdist_q type', type(fdist_q))
-        # print('fdist_t type', type(fdist_t))
-        # print('e_q_rise type', type(e_q_rise))
-        # print('e_t_rise type', type(e_t_rise))
-        # print('e_q_fall type', type(e_q_fall))
-        # print('e_t_fall type', type(e_t_fall))
-        # print('\n')
-        # print('cons', cons)
-        # print('cons type', type(cons))
-        # print('\n')
-        # print('e_rise_MD type', type(e_rise_MD))
-        # print('e_fall_MD type', type(e_fall_MD))
-        # print('\n')
-        
-        # store segments and connectors for initial conditions
-        segment_data[0] = (segs_obs, segs_sim)
-        connector_data[0] = (cons, 0)
-        e_sd_rise[0] = (e_t_rise, e_q_rise)
-        e_sd_fall[0] = (e_t_fall, e_q_fall)
-
-        # calculate objective function inputs for initial conditions
-        percfalsecase[0] = (np.sum(hydcase_obs_orig != hydcase_obs) / len(obs)) + (np.sum(hydcase_sim_orig != hydcase_sim) / len(sim))
-        mafdist_t[0] = np.mean(np.abs(fdist_t))
-        mafdist_v[0] = np.mean(np.abs(fdist_q))
-
-        # apply coarse-graining to all time series splits (big for-loop): Jointly reduce obs/sim segments, one by one, until only one obs and one sim segment are left
-        for z in range(num_red):
-            if hydcase_obs[0] != hydcase_sim[0] or len(segs_obs) != len(segs_sim):
-                raise ValueError('error in big loop')
-
-            # initialize temporary variables (temporary for one reduction step)
-            tmp_percfalsecase = np.full((len(segs_obs), len(segs_obs)), np.nan)
-            tmp_rel_del_seg = np.full((len(segs_obs), len(segs_obs)), np.nan)
-            tmp_mafdist_t = np.full((len(segs_obs), len(segs_obs)), np.nan)
-            tmp_mafdist_v = np.full((len(segs_obs), len(segs_obs)), np.nan)
-
-            # loop over all possible segment reduction combinations
-            for z_obs in range(1, len(segs_obs) - 1):
-                tmp_segs_obs = segs_obs.copy()
-                tmp_hydcase_obs = hydcase_obs.copy()
-
-                tmp_rel_obs = tmp_segs_obs[z_obs]['relevance']
-                tmp_segs_obs, tmp_hydcase_obs = f_aggregate_segment(tmp_segs_obs, tmp_hydcase_obs, obs, z_obs)
-
-                for z_sim in range(1, len(segs_sim) - 1):
-                    tmp_segs_sim = segs_sim.copy()
-                    tmp_hydcase_sim = hydcase_sim.copy()
-
-                    tmp_rel_sim = tmp_segs_sim[z_sim]['relevance']
-                    tmp_segs_sim, tmp_hydcase_sim = f_aggregate_segment(tmp_segs_sim, tmp_hydcase_sim, sim, z_sim)
-
-                    # compute the objective function
-                    tmp_percfalsecase[z_obs, z_sim] = (np.sum(hydcase_obs_orig != tmp_hydcase_obs) / len(obs)) + (np.sum(hydcase_sim_orig != tmp_hydcase_sim) / len(sim))
-                    tmp_rel_del_seg[z_obs, z_sim] = tmp_rel_obs + tmp_rel_sim
-
-                    fdist_q, fdist_t, _, _, _, _, _, _, _, cons, _, _ = f_sd(obs, tmp_segs_obs, sim, tmp_segs_sim, error_model, 'true')
-                    tmp_mafdist_t[z_obs, z_sim] = np.mean(np.abs(fdist_t))
-                    tmp_mafdist_v[z_obs, z_sim] = np.mean(np.abs(fdist_q))
-
-            # print('Input for f_normalize')
-            # print('tmp_percfalsecase', tmp_percfalsecase)
-            # print('tmp_percfalsecase type', type(tmp_percfalsecase))
-            # print('\n')
-
-            # find the best erase-combination for the given reduction step
-            norm_tmp_percfalsecase = weight_nfc * f_normalize(tmp_percfalsecase)
-            norm_tmp_rel_del_seg = weight_rds * f_normalize(tmp_rel_del_seg)
-            norm_tmp_mafdist_t = weight_sdt * f_normalize(tmp_mafdist_t)
-            norm_tmp_mafdist_v = weight_sdv * f_normalize(tmp_mafdist_v)
-
-            # print('Output from f_normalize')
-            # print('norm_tmp_percfalsecase', norm_tmp_percfalsecase)
-            # print('norm_tmp_percfalsecase type', type(norm_tmp_percfalsecase))
-            # print('\n')
-
-            tmp_opt = np.sqrt(norm_tmp_percfalsecase**2 + norm_tmp_rel_del_seg**2 + norm_tmp_mafdist_t**2 + norm_tmp_mafdist_v**2)
-
-            pos_obs, pos_sim = np.unravel_index(np.argmin(tmp_opt), tmp_opt.shape)
-            # print('pos_obs', pos_obs)
-            # print('pos_obs type', type(pos_obs))
-            # print('pos_sim', pos_sim)
-            # print('pos_sim type', type(pos_sim))
-            # print('\n')
-
-            # original code der Übersetzung
-            # pos_obs = pos_obs[0]
-            # pos_sim = pos_sim[0]
-            try:
-                pos_obs = pos_obs[0]
-                pos_sim = pos_sim[0]
-            except:
-                pos_obs = pos_obs
-                pos_sim = pos_sim
-
-            # execute the change on the real events
-
-            # original code der Übersetzung
-            # segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs, pos_obs)
-            # segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim, pos_sim)
-
-            try:
-                segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs, pos_obs)
-                segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim, pos_sim)
-            except:
-                # segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs)
-                # segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim)
-                continue
-
-            # Calculate Series Distance on the optimized level of aggregated segments return SD errors
-            fdist_q, fdist_t, _, e_q_rise, e_t_rise, _, e_q_fall, e_t_fall, _, cons, e_rise_MD, e_fall_MD = f_sd(obs, segs_obs, sim, segs_sim, error_model)
-
-            # add segment data, connectors and time/ magnitude errors of the best solution for this time series split to that of the entire time series
-            segment_data[z + 1] = (segs_obs, segs_sim)
-            connector_data[z + 1] = (cons, z)
-            e_sd_rise[z + 1] = (e_t_rise, e_q_rise)
-            e_sd_fall[z + 1] = (e_t_fall, e_q_fall)
-
-            # compute objective function inputs
-            percfalsecase[z + 1] = (np.sum(hydcase_obs_orig != hydcase_obs) / len(obs)) + (np.sum(hydcase_sim_orig != hydcase_sim) / len(sim))
-            mafdist_t[z + 1] = np.mean(np.abs(fdist_t))
-            mafdist_v[z + 1] = np.mean(np.abs(fdist_q))
-
-            # progress info
+        # add segment data, connectors and time/ magnitude errors of the best solution for this time series split to that of the entire time series
+        segment_data[z + 1] = (segs_obs, segs_sim)
+        connector_data[z + 1] = (cons, z)
+        e_sd_rise[z + 1] = (e_t_rise, e_q_rise)
+        e_sd_fall[z + 1] = (e_t_fall, e_q_fall)
+
+        # compute objective function inputs
+        percfalsecase[z + 1] = (np.sum(hydcase_obs_orig != hydcase_obs) / len(obs)) + (np.sum(hydcase_sim_orig != hydcase_sim) / len(sim))
+        mafdist_t[z + 1] = np.mean(np.abs(fdist_t))
+        mafdist_v[z + 1] = np.mean(np.abs(fdist_q[models[0]] if keyed else fdist_q))
+
+        # progress info
+        if show_progress:
             txt = f'reduction step {z} of {num_red}'
             print(txt)
 
-        # Calculate objective function and find the optimal coarse graining step
-        ObFuncVal = np.sqrt(weight_nfc * f_normalize(percfalsecase)**2 + weight_sdt * f_normalize(mafdist_t)**2 + weight_sdv * f_normalize(mafdist_v)**2)
-        opt_step = np.argmin(ObFuncVal)
-        opt_step = opt_step if opt_step == 0 else opt_step[0]
-
-        if len(ObFuncVal) > 1:
-            if opt_step == 0:
-                print('selected step # initial conditions')
-            else:
-                print(f'selected step # {opt_step}')
-
-        # select and return coarse-grained segments and connectors for optimal level of generalization
-        segs_obs_opt = segment_data[opt_step][0]
-        segs_sim_opt = segment_data[opt_step][1]
-        cons = connector_data[opt_step][0]
-        e_sd_rise_opt = e_sd_rise[opt_step]
-        e_sd_fall_opt = e_sd_fall[opt_step]
-        
-        # add segment data and connectors of the splitted subset to that of the entire time series
-        if not cons_all:
-            cons_all.append({
-                # original code der Übersetzung
-                # 'x_match_obs_global': cons[0]['x_match_obs_global'],
-                # 'y_match_obs': cons[0]['y_match_obs'],
-                # 'x_match_sim_global': cons[0]['x_match_sim_global'],
-                # 'y_match_sim': cons[0]['y_match_sim']
-                'x_match_obs_global': cons['x_match_obs_global'],
-                'y_match_obs': cons['y_match_obs'],
-                'x_match_sim_global': cons['x_match_sim_global'],
-                'y_match_sim': cons['y_match_sim']
-            })
+    # Calculate objective function and find the optimal coarse graining step
+    ObFuncVal, opt_step = _optimal_step(percfalsecase, mafdist_t, mafdist_v, (weight_nfc, weight_rds, weight_sdt, weight_sdv))
+
+    if len(ObFuncVal) > 1 and show_progress:
+        if opt_step == 0:
+            print('selected step # initial conditions')
         else:
-            # original code der Übersetzung
-            # cons_all[0]['x_match_obs_global'] += cons[0]['x_match_obs_global']
-            # cons_all[0]['y_match_obs'] += cons[0]['y_match_obs']
-            # cons_all[0]['x_match_sim_global'] += cons[0]['x_match_sim_global']
-            # cons_all[0]['y_match_sim'] += cons[0]['y_match_sim']
-            cons_all[0]['x_match_obs_global'] += cons['x_match_obs_global']
-            cons_all[0]['y_match_obs'] += cons['y_match_obs']
-            cons_all[0]['x_match_sim_global'] += cons['x_match_sim_global']
-            cons_all[0]['y_match_sim'] += cons['y_match_sim']
-
-        segs_obs_opt_all.extend(segs_obs_opt)
-        segs_sim_opt_all.extend(segs_sim_opt)
+            print(f'selected step # {opt_step}')
+
+    # select and return coarse-grained segments and connectors for optimal level of generalization
+    segs_obs_opt = segment_data[opt_step][0]
+    segs_sim_opt = segment_data[opt_step][1]
+    cons = connector_data[opt_step][0]
+    e_sd_rise_opt = e_sd_rise[opt_step]
+    e_sd_fall_opt = e_sd_fall[opt_step]
+
+    return {
+        'segs_obs_opt': segs_obs_opt,
+        'segs_sim_opt': segs_sim_opt,
+        'cons': cons,
+        'e_sd_rise_opt': e_sd_rise_opt,
+        'e_sd_fall_opt': e_sd_fall_opt
+    }
+
+
+def _coarse_graining_split(args):
+    """
+    Coarse-graining and SD of a single time series split, executed in a worker process (see f_coarse_graining_split)
+    """
+
+    i, timeseries_splits, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model = args
+
+    return f_coarse_graining_split(_obs_org, _sim_org, i, timeseries_splits, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model)
+
+
+def _coarse_graining_split_sweep(args):
+    """
+    Coarse-graining and SD of a single time series split for several weight vectors, executed in a worker process
+    Returns a list with the result of each weight vector (as _coarse_graining_split), or None if the split cannot be trimmed
+    """
+
+    i, timeseries_splits, weights, error_model = args
+
+    # display progress information
+    txt = f'time series split {i} of {len(timeseries_splits) - 1}'
+    print(txt)
+
+    # trim, segment and equalize the # of segments of obs and sim
+    prepared = _prepare_split(_obs_org, _sim_org, i, timeseries_splits)
+    if prepared is None:
+        return None
+    obs, sim, hydcase_obs_orig, hydcase_sim_orig, hydcase_obs, hydcase_sim, diff_index_obs, diff_index_sim, segs_obs, segs_sim = prepared
+
+    # with a set of error models, the coarse-graining is optimized for the first one (the SD errors are returned for all)
+    models, keyed = f_error_models(error_model)
+
+    # determine number of reduction steps
+    num_red = (len(segs_obs) // 2) - 1
+
+    def sd_record(segs_obs, hydcase_obs, segs_sim, hydcase_sim):
+        # SD errors and objective function inputs of one reduction step
+        fdist_q, fdist_t, _, e_q_rise, e_t_rise, _, e_q_fall, e_t_fall, _, cons, _, _ = f_sd(obs, segs_obs, sim, segs_sim, error_model)
+        return {
+            'segments': (segs_obs, segs_sim),
+            'cons': cons,
+            'e_sd_rise': (e_t_rise, e_q_rise),
+            'e_sd_fall': (e_t_fall, e_q_fall),
+            'percfalsecase': (np.sum(hydcase_obs_orig != hydcase_obs) / len(obs)) + (np.sum(hydcase_sim_orig != hydcase_sim) / len(sim)),
+            'mafdist_t': np.mean(np.abs(fdist_t)),
+            'mafdist_v': np.mean(np.abs(fdist_q[models[0]] if keyed else fdist_q))
+        }
+
+    def candidates(state):
+        segs_obs, hydcase_obs, segs_sim, hydcase_sim = state
+        return f_candidate_criteria(obs, segs_obs, hydcase_obs, hydcase_obs_orig, sim, segs_sim, hydcase_sim, hydcase_sim_orig, models[0])
+
+    def step(state, choice, z):
+        segs_obs, hydcase_obs, segs_sim, hydcase_sim = state
+        pos_obs, pos_sim = choice
+
+        # execute the change (as in _coarse_graining_split: a failed step has no results)
+        try:
+            segs_obs, hydcase_obs = f_aggregate_segment(segs_obs, hydcase_obs, obs, pos_obs, diff_index=diff_index_obs)
+            segs_sim, hydcase_sim = f_aggregate_segment(segs_sim, hydcase_sim, sim, pos_sim, diff_index=diff_index_sim)
+        except:
+            return (segs_obs, hydcase_obs, segs_sim, hydcase_sim), None
+
+        return (segs_obs, hydcase_obs, segs_sim, hydcase_sim), sd_record(segs_obs, hydcase_obs, segs_sim, hydcase_sim)
+
+    initial = sd_record(segs_obs, hydcase_obs, segs_sim, hydcase_sim)
+    paths = f_weight_sweep((segs_obs, hydcase_obs, segs_sim, hydcase_sim), num_red, weights, candidates, _best_merge, step)
+
+    # find the optimal coarse graining step of each weight vector
+    split_results = []
+    for weight_vector, path in zip(weights, paths):
+        records = [initial] + path
+        percfalsecase = np.array([np.nan if record is None else record['percfalsecase'] for record in records])
+        mafdist_t = np.array([np.nan if record is None else record['mafdist_t'] for record in records])
+        mafdist_v = np.array([np.nan if record is None else record['mafdist_v'] for record in records])
+        _, opt_step = _optimal_step(percfalsecase, mafdist_t, mafdist_v, weight_vector)
+
+        split_results.append({
+            'segs_obs_opt': records[opt_step]['segments'][0],
+            'segs_sim_opt': records[opt_step]['segments'][1],
+            'cons': records[opt_step]['cons'],
+            'e_sd_rise_opt': records[opt_step]['e_sd_rise'],
+            'e_sd_fall_opt': records[opt_step]['e_sd_fall']
+        })
+
+    return split_results
+
+
+def _map_splits(func, tasks, obs, sim, num_workers, backend):
+    """
+    Applies func to all split tasks, serially or in a process pool (see f_coarse_graining_continuous), results in split order
+    """
+
+    if num_workers is None:
+        num_workers = os.cpu_count()
+
+    if num_workers <= 1 or len(tasks) <= 1:
+        _init_worker(obs.copy(), sim.copy(), backend)
+        return [func(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker, initargs=(obs, sim, backend)) as executor:
+        return list(executor.map(func, tasks, chunksize=max(1, len(tasks) // (4 * num_workers))))
+
+
+def f_merge_split_results(split_results, error_model):
+    """
+    Merges the results of the time series splits (in split order) to the results of the entire time series
+    Splits that could not be trimmed (None) are skipped. With a set of error models, e_sd_q_all is a dict keyed by model
+    """
+
+    models, keyed = f_error_models(error_model)
+
+    # initialize arrays (the connectors of the splits are concatenated once at the end)
+    cons_splits = []
+    segs_obs_opt_all = []
+    segs_sim_opt_all = []
+    e_sd_rise_all = []
+    e_sd_fall_all = []
+    e_sd_t_all = []
+    e_sd_q_all = {model: [] for model in models}
+
+    for split_result in split_results:
+        if split_result is None:  # the split could not be trimmed
+            continue
+
+        segs_obs_opt = split_result['segs_obs_opt']
+        segs_sim_opt = split_result['segs_sim_opt']
+        cons = split_result['cons']
+        e_sd_rise_opt = split_result['e_sd_rise_opt']
+        e_sd_fall_opt = split_result['e_sd_fall_opt']
+
+        # add segment data and connectors of the splitted subset to that of the entire time series
+        # original code der Übersetzung
+        # cons_all[0]['x_match_obs_global'] += cons[0]['x_match_obs_global']
+        # cons_all[0]['y_match_obs'] += cons[0]['y_match_obs']
+        # cons_all[0]['x_match_sim_global'] += cons[0]['x_match_sim_global']
+        # cons_all[0]['y_match_sim'] += cons[0]['y_match_sim']
+        cons_splits.append(cons)
+
+        segs_obs_opt_all.append(segs_obs_opt)
+        segs_sim_opt_all.append(segs_sim_opt)
         e_sd_rise_all.extend(e_sd_rise_opt)
         e_sd_fall_all.extend(e_sd_fall_opt)
         e_sd_t_all.extend([e_sd_rise_opt[0], e_sd_fall_opt[0]])
-        e_sd_q_all.extend([e_sd_rise_opt[1], e_sd_fall_opt[1]])
+        for model in models:
+            e_sd_q_all[model].extend([e_sd_rise_opt[1][model], e_sd_fall_opt[1][model]] if keyed else [e_sd_rise_opt[1], e_sd_fall_opt[1]])
+
+    # connectors of the entire time series (new arrays: the connectors of a split may be shared by several weight vectors, see f_coarse_graining_continuous_sweep)
+    cons_all = []
+    if cons_splits:
+        cons_all.append({key: np.concatenate([cons[key] for cons in cons_splits]) for key in cons_splits[0]})
+
+    # coarse-grained segments of the entire time series
+    segs_obs_opt_all = SegmentTable.concatenate(segs_obs_opt_all)
+    segs_sim_opt_all = SegmentTable.concatenate(segs_sim_opt_all)
+
+    if not keyed:  # a single error model: plain list as before
+        e_sd_q_all = e_sd_q_all[models[0]]
+
+    return segs_obs_opt_all, segs_sim_opt_all, cons_all, e_sd_t_all, e_sd_q_all
+
+
+def f_coarse_graining_continuous(obs, sim, timeseries_splits, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, num_workers=None, backend=None):
+    """
+    Coarse-graining function for continuous series distance calculation.
+    The time series splits are independent of each other: they are distributed over num_workers processes
+    (None: one per cpu core, 1: serial run without a process pool) and the results are merged in split order.
+    backend: optional, 'numpy' or 'numba' backend of the inner kernels (see f_set_backend). None: keep the current setting
+    error_model: 'standard', 'relative' or a set of both (see f_sd). With a set, the coarse-graining is optimized for the first
+    error model and e_sd_q_all is a dict keyed by model, with the magnitude errors of all models from the same connectors
+    """
+
+    tasks = [(i, timeseries_splits, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model) for i in range(len(timeseries_splits) - 1)]
+
+    # apply coarse-graining and SD to each split (map returns the results in split order)
+    split_results = _map_splits(_coarse_graining_split, tasks, obs, sim, num_workers, backend)
+
+    # merge the results of the splits
+    return f_merge_split_results(split_results, error_model)
+
+
+def f_coarse_graining_continuous_sweep(obs, sim, timeseries_splits, weights, error_model, num_workers=None, backend=None):
+    """
+    Coarse-graining function for continuous series distance calculation with several weight vectors of the objective function.
+    weights: list with the weight vectors (weight_nfc, weight_rds, weight_sdt, weight_sdv)
+    num_workers, backend: see f_coarse_graining_continuous
+    Returns a list with one entry per weight vector, each identical to the output of f_coarse_graining_continuous with these weights
+    (segs_obs_opt_all, segs_sim_opt_all, cons_all, e_sd_t_all, e_sd_q_all).
+    Within each split, the pre-processing is done once and each reduction step is computed once for all weight vectors
+    that chose the same erase-combinations so far (see f_weight_sweep).
+    """
+
+    tasks = [(i, timeseries_splits, weights, error_model) for i in range(len(timeseries_splits) - 1)]
+
+    # apply coarse-graining and SD to each split, for all weight vectors at once
+    split_results = _map_splits(_coarse_graining_split_sweep, tasks, obs, sim, num_workers, backend)
 
-    return segs_obs_opt_all, segs_sim_opt_all, cons_all, e_sd_t_all, e_sd_q_all
\ No newline at end of file
+    # merge the results of the splits, separately for each weight vector
+    return [f_merge_split_results([None if split_result is None else split_result[k] for split_result in split_results], error_model)
+            for k in range(len(weights))]
\ No newline at end of file
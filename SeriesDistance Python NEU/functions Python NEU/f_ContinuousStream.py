@@ -0,0 +1,206 @@
+import numpy as np
+from f_FindSplitPoints import MAX_NUM_SEGS, PERC
+from f_CountExtremes import f_cum_extremes
+from f_SD import f_error_models
+from f_SegmentTable import SegmentTable
+from f_Backend import f_set_backend
+from f_CoarseGraining_SD_Continuous import f_coarse_graining_split
+
+CON_KEYS = ['x_match_obs_global', 'y_match_obs', 'x_match_sim_global', 'y_match_sim']
+
+
+def f_stream_init(split_frequency, low_flow_limits, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, backend=None):
+    """
+    State of a streaming continuous SD evaluation: new obs/sim samples are appended with f_stream_append
+
+    INPUT
+        split_frequency: distance of the candidate split points (see f_FindSplitPoints)
+        low_flow_limits: (obs, sim) limits of low flow at the split points (values <= limit), fixed for the entire stream, e.g. the
+                         MAX_QUANTILE quantiles of obs and sim of a reference period (f_FindSplitPoints uses those of the entire record)
+        weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, backend: see f_coarse_graining_continuous
+    OUTPUT
+        state: dictionary with the settings, the samples received so far, the closed splits and their accumulated results
+               (segments, connectors, SD errors) and the result of the open trailing split
+    """
+
+    models, keyed = f_error_models(error_model)
+    low_flow_limits = tuple(np.asarray(low_flow_limits, dtype=float).ravel())
+    if len(low_flow_limits) != 2 or not np.all(np.isfinite(low_flow_limits)):
+        raise ValueError('f_stream_init: low_flow_limits must be the (obs, sim) limits of low flow')
+
+    state = {
+        'split_frequency': split_frequency,
+        'searchrange': round((PERC / 100) * split_frequency),
+        'weights': (weight_nfc, weight_rds, weight_sdt, weight_sdv),
+        'error_model': error_model,
+        'low_flow_limits': low_flow_limits,
+        'backend': backend,
+        'obs': np.empty(1024),  # sample buffers, the capacity is doubled when they are full
+        'sim': np.empty(1024),
+        'n': 0,  # number of samples received
+        'timeseries_splits': [0],  # split points placed so far (the open split starts at the last one)
+        'next_candidate': split_frequency,  # next candidate split point (see f_FindSplitPoints)
+        'closed': {
+            'segs_obs_opt': [],  # SegmentTables of the closed splits
+            'segs_sim_opt': [],
+            'cons': {key: [] for key in CON_KEYS},  # connector arrays of each closed split (concatenated by f_stream_results)
+            'e_sd_t_all': [],
+            'e_sd_q_all': {model: [] for model in models} if keyed else []
+        },
+        'open_result': None  # result of the open trailing split (see f_coarse_graining_split)
+    }
+
+    return state
+
+
+def _extend_buffer(buffer, n, values):
+    """
+    Writes values behind the first n entries of buffer, returns the (possibly enlarged) buffer
+    """
+
+    if n + len(values) > len(buffer):
+        buffer = np.concatenate((buffer[:n], np.empty(max(n + len(values), 2 * len(buffer)) - n)))
+    buffer[n:n + len(values)] = values
+
+    return buffer
+
+
+def _add_split_result(results, split_result, error_model):
+    """
+    Adds the result of one split to the accumulated results (as the merge in f_coarse_graining_continuous)
+    """
+
+    if split_result is None:  # the split could not be trimmed
+        return
+
+    models, keyed = f_error_models(error_model)
+    e_sd_rise_opt = split_result['e_sd_rise_opt']
+    e_sd_fall_opt = split_result['e_sd_fall_opt']
+
+    results['segs_obs_opt'].append(split_result['segs_obs_opt'])
+    results['segs_sim_opt'].append(split_result['segs_sim_opt'])
+    for key in CON_KEYS:
+        results['cons'][key].append(split_result['cons'][key])
+    results['e_sd_t_all'].extend([e_sd_rise_opt[0], e_sd_fall_opt[0]])
+    if keyed:
+        for model in models:
+            results['e_sd_q_all'][model].extend([e_sd_rise_opt[1][model], e_sd_fall_opt[1][model]])
+    else:
+        results['e_sd_q_all'].extend([e_sd_rise_opt[1], e_sd_fall_opt[1]])
+
+
+def f_stream_append(state, obs_new, sim_new):
+    """
+    Appends new obs/sim samples: places the split points that can be decided, coarse-grains the newly closed splits
+    and recomputes the open trailing split
+
+    INPUT
+        state: see f_stream_init (updated in place)
+        obs_new, sim_new: arrays with the new observed and simulated values (same length, prepared as the input of
+                          f_coarse_graining_continuous, e.g. smoothed and without equal neighbours)
+    OUTPUT
+        closed_results: list with the results of the splits closed by these samples (see f_coarse_graining_split)
+    METHOD
+        The candidate split points are the multiples of split_frequency, as in f_FindSplitPoints. A candidate is decided
+        with the same rules (best rank sum in its search range, low flow or too many segments since the last split point)
+        as soon as the samples up to candidate + split_frequency have arrived, so the split points of a record do not depend
+        on how it was appended. A new split point closes the split before it: it is coarse-grained once and its segments,
+        connectors and SD errors are added to the accumulated results. Only the open trailing split (from the last split
+        point to the last sample) is coarse-grained again on each call, so the cost of a call depends on the length of the
+        open split and not on the length of the record.
+        With the same low_flow_limits as f_FindSplitPoints (MAX_QUANTILE quantiles of the entire record), f_stream_results
+        gives the same results as f_FindSplitPoints and f_coarse_graining_continuous on the entire record.
+        The splits are coarse-grained in this process, without progress output.
+    """
+
+    obs_new = np.asarray(obs_new, dtype=float).ravel()
+    sim_new = np.asarray(sim_new, dtype=float).ravel()
+    if len(obs_new) != len(sim_new):
+        raise ValueError('f_stream_append: obs_new and sim_new must have the same length')
+
+    n = state['n']
+    state['obs'] = _extend_buffer(state['obs'], n, obs_new)
+    state['sim'] = _extend_buffer(state['sim'], n, sim_new)
+    n = state['n'] = n + len(obs_new)
+
+    obs = state['obs'][:n]
+    sim = state['sim'][:n]
+    split_frequency = state['split_frequency']
+    searchrange = state['searchrange']
+    timeseries_splits = state['timeseries_splits']
+
+    if state['backend'] is not None:
+        f_set_backend(state['backend'])
+    weights = state['weights']
+    error_model = state['error_model']
+    obs_max, sim_max = state['low_flow_limits']
+
+    # decide all candidate split points whose decision does not change anymore
+    closed_results = []
+    while state['next_candidate'] < n - split_frequency:
+        candidate = state['next_candidate']
+        state['next_candidate'] += split_frequency
+
+        # best split time within the search range of the candidate
+        window = slice(candidate - searchrange, candidate + searchrange + 1)
+        ranks = np.argsort(np.argsort(obs[window])) + np.argsort(np.argsort(sim[window]))
+        best_split_time = candidate - searchrange + int(np.argmin(ranks))
+
+        if (obs[best_split_time] <= obs_max) and (sim[best_split_time] <= sim_max):
+            keep = True
+        else:
+            # number of segments since the last split point (extremes of obs/ sim from the last split point on)
+            first = timeseries_splits[-1] + 1
+            last = max(best_split_time, first)
+            cum_extremes_obs = f_cum_extremes(obs[first - 1:last + 1])
+            cum_extremes_sim = f_cum_extremes(sim[first - 1:last + 1])
+            num_segs_obs = 1 + cum_extremes_obs[last - first + 1] - cum_extremes_obs[1]
+            num_segs_sim = 1 + cum_extremes_sim[last - first + 1] - cum_extremes_sim[1]
+            keep = (num_segs_obs >= MAX_NUM_SEGS) or (num_segs_sim >= MAX_NUM_SEGS)
+
+        if keep:
+            # close the split before the new split point
+            timeseries_splits.append(best_split_time)
+            split_result = f_coarse_graining_split(obs, sim, len(timeseries_splits) - 2, timeseries_splits, *weights, error_model, show_progress=False)
+            _add_split_result(state['closed'], split_result, error_model)
+            closed_results.append(split_result)
+
+    # recompute the open trailing split (ends at the last sample, as the last split of f_FindSplitPoints)
+    splits_open = timeseries_splits + [n - 1]
+    state['open_result'] = None
+    if n - 1 > timeseries_splits[-1]:
+        state['open_result'] = f_coarse_graining_split(obs, sim, len(splits_open) - 2, splits_open, *weights, error_model, show_progress=False)
+
+    return closed_results
+
+
+def f_stream_results(state):
+    """
+    Results of all samples received so far: the closed splits and the open trailing split
+
+    INPUT
+        state: see f_stream_init and f_stream_append
+    OUTPUT
+        timeseries_splits: list with the split points (start and end of the samples included, as f_FindSplitPoints)
+        segs_obs_opt_all, segs_sim_opt_all, cons_all, e_sd_t_all, e_sd_q_all: see f_coarse_graining_continuous
+    """
+
+    closed = state['closed']
+    results = {
+        'segs_obs_opt': list(closed['segs_obs_opt']),
+        'segs_sim_opt': list(closed['segs_sim_opt']),
+        'cons': {key: list(values) for key, values in closed['cons'].items()},
+        'e_sd_t_all': list(closed['e_sd_t_all']),
+        'e_sd_q_all': {model: list(values) for model, values in closed['e_sd_q_all'].items()} if isinstance(closed['e_sd_q_all'], dict) else list(closed['e_sd_q_all'])
+    }
+    _add_split_result(results, state['open_result'], state['error_model'])
+
+    timeseries_splits = list(state['timeseries_splits'])
+    if state['n'] - 1 > timeseries_splits[-1]:
+        timeseries_splits.append(state['n'] - 1)
+
+    segs_obs_opt_all = SegmentTable.concatenate(results['segs_obs_opt'])
+    segs_sim_opt_all = SegmentTable.concatenate(results['segs_sim_opt'])
+    cons_all = [{key: np.concatenate(results['cons'][key]) for key in CON_KEYS}] if results['segs_obs_opt'] else []
+
+    return timeseries_splits, segs_obs_opt_all, segs_sim_opt_all, cons_all, results['e_sd_t_all'], results['e_sd_q_all']
\ No newline at end of file
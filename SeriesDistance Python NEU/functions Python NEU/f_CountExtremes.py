@@ -0,0 +1,35 @@
+import numpy as np
+
+def f_count_extremes(y):
+    """
+    Counts the local extremes of a series
+
+    INPUT
+        y: (n,1) array with values
+    OUTPUT
+        local_mins: number of positive sign changes of the first differences (drop-rise: valleys)
+        local_maxs: number of negative sign changes of the first differences (rise-drop: peaks)
+    """
+
+    sign_change = np.diff(np.sign(np.diff(y)))
+    local_mins = int(np.count_nonzero(sign_change == 2))
+    local_maxs = int(np.count_nonzero(sign_change == -2))
+
+    return local_mins, local_maxs
+
+
+def f_cum_extremes(y):
+    """
+    Prefix counts of the local extremes (peaks and valleys, see f_segment_bounds) of a series
+
+    INPUT
+        y: (n,1) array with values
+    OUTPUT
+        cum_extremes: (n+1,) array, cum_extremes[k] = number of extremes at the points 0 ... k-1
+        Note: y[a:b+1] has 1 + cum_extremes[b] - cum_extremes[a+1] segments (the extremes strictly between a and b)
+    """
+
+    dQ = np.diff(y)
+    extremes = ((dQ[:-1] > 0) & (dQ[1:] < 0)) | ((dQ[:-1] < 0) & (dQ[1:] > 0))  # peaks and valleys at the points 1 ... n-2
+
+    return np.concatenate(([0, 0], np.cumsum(extremes), [np.sum(extremes)]))
\ No newline at end of file
@@ -0,0 +1,54 @@
+import os
+import numpy as np
+from f_dp1d import f_dp1d
+
+def f_dp_index(xy, filename=None):
+    """
+    Insertion order of all points of a line by the Douglas-Peucker algorithm of f_dp1d (one full run)
+
+    INPUT
+        xy: (n,2) array with x- and y-data of a line (x in ascending order)
+        filename: optional .npz file to store the index in. If it exists and was built for the same xy, the index is loaded instead
+    OUTPUT
+        dp_index: dictionary with 'order', 'maxdev' and 'nse' of all n points (see f_dp1d)
+    METHOD
+        f_dp1d inserts the points in a fixed order, so the simplification to any level (tol, numpoints or nselimit) is a prefix
+        of the full insertion order. The index is built once and every level is then extracted with f_dp_level.
+    """
+
+    if filename is not None and os.path.exists(filename):
+        with np.load(filename) as stored:
+            if np.array_equal(stored['xy'], xy):
+                return {key: stored[key] for key in ['order', 'maxdev', 'nse']}
+
+    _, dp_index = f_dp1d(xy, numpoints=len(xy), return_index=True)
+
+    if filename is not None:
+        np.savez(filename, xy=xy, **dp_index)
+
+    return dp_index
+
+
+def f_dp_level(xy, dp_index, tol=None, numpoints=None, nselimit=None):
+    """
+    Simplified line of a single level, extracted from the insertion order index
+
+    INPUT
+        xy: (n,2) array with x- and y-data of the line the index was built for
+        dp_index: see f_dp_index
+        tol, numpoints, nselimit: stopping criterion, as in f_dp1d (nselimit before numpoints before tol)
+    OUTPUT
+        xy_dp: (m,2) array with the simplified line, identical to f_dp1d(xy, tol, numpoints, nselimit)
+    """
+
+    order = dp_index['order']
+    if nselimit is not None:  # first number of points whose NSE reaches the limit
+        reached = np.nonzero(dp_index['nse'][1:] >= nselimit)[0]
+        numpoints = reached[0] + 2 if len(reached) else len(order)
+    elif numpoints is None:  # first point whose deviation does not exceed the tolerance is not inserted anymore
+        reached = np.nonzero(~(dp_index['maxdev'][2:] > tol))[0]
+        numpoints = reached[0] + 2 if len(reached) else len(order)
+
+    numpoints = min(max(numpoints, 2), len(order))
+
+    return xy[np.sort(order[:numpoints])]
\ No newline at end of file
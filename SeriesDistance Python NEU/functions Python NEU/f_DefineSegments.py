@@ -1,7 +1,9 @@
 import numpy as np
-from f_calc_hyd_case import f_calc_hyd_case
+from f_SegmentBounds import f_segment_bounds
+from f_SegmentTable import SegmentTable
+from f_DiffIndex import f_diff_index, f_segment_dQ
 
-def f_define_segments(x, y):
+def f_define_segments(x, y, diff_index=None):
     """
     Defines all segments in an event (starttime, endtime, relative duration, relative magnitude change (dQ fraction), importance)
     Uwe Ehret, 15.Nov.2013, modified Simon Seibert, March 2014
@@ -9,49 +11,25 @@ def f_define_segments(x, y):
     INPUT
         x: (n,1) array with time position (x-position) of values
         y: (n,1) array with values
+        diff_index: optional, cumulative differences of y (see f_diff_index), built here if not given
     OUTPUT
-        segs: list of dictionaries, where each dictionary represents a segment found in the entire event
+        segs: SegmentTable with one row per segment found in the entire event
         Note: A segment always includes its first and last point (start, valley, peak or end) --> peaks and valleys are used twice!
     """
 
-    # Initialize structure
-    segs = []
+    # Find all segments (start and end point of each segment)
+    starts, ends = f_segment_bounds(y)
 
-    # Find all segments
-    segs.append({
-        'starttime_global': x[0],
-        'starttime_local': 0
-    })
+    # Compute segment properties (two lookups in the cumulative differences of the series per segment)
+    if diff_index is None:
+        diff_index = f_diff_index(y)
+    rel_length = (ends - starts) / (len(y) - 1)  # relative length to the entire time series [0,1]
+    sum_dQ, rel_dQ = f_segment_dQ(diff_index, starts, ends)  # sum of segment slopes, sum of slopes relative to entire event [0,1]
 
-    hydcase = f_calc_hyd_case(y)
-    for z in range(1, len(y) - 1):  # loop over all values except the first and last
-        if hydcase[z] == 2 or hydcase[z] == -2:  # peak or valley
-            segs[-1]['endtime_global'] = x[z]
-            segs[-1]['endtime_local'] = z
-            segs.append({
-                'starttime_global': x[z],
-                'starttime_local': z
-            })
-
-    segs[-1]['endtime_global'] = x[-1]
-    segs[-1]['endtime_local'] = len(y) - 1
-
-    # Compute segment properties
-    for seg in segs:
-        # Length of the segment
-        seg['length'] = seg['endtime_local'] - seg['starttime_local']
-        # Relative length to the entire time series [0,1]
-        seg['rel_length'] = (seg['endtime_local'] - seg['starttime_local']) / (len(y) - 1)
-        # Sum of segment slopes
-        seg['sum_dQ'] = np.sum(np.diff(y[seg['starttime_local']:seg['endtime_local'] + 1]))
-        # Sum of slopes relative to entire event [0,1]
-        seg['rel_dQ'] = np.sum(np.abs(np.diff(y[seg['starttime_local']:seg['endtime_local'] + 1]))) / np.sum(np.abs(np.diff(y)))
-        # Relative importance of the segment
-        seg['relevance'] = np.sqrt(seg['rel_length']**2 + seg['rel_dQ']**2)  # relevance as the Euclidean distance of rel_length and rel_dQ
+    # Relative importance of the segment
+    relevance = np.sqrt(rel_length**2 + rel_dQ**2)  # relevance as the Euclidean distance of rel_length and rel_dQ
 
     # Normalize the segment relevance with overall relevance of the entire event [0,1]
-    total_relevance = np.sum([seg['relevance'] for seg in segs])
-    for seg in segs:
-        seg['relevance'] = seg['relevance'] / total_relevance
+    relevance = relevance / np.sum(relevance)
 
-    return segs
\ No newline at end of file
+    return SegmentTable(np.column_stack((starts, ends, x[starts], x[ends])), np.column_stack((rel_length, sum_dQ, rel_dQ, relevance)))
\ No newline at end of file
@@ -0,0 +1,45 @@
+import numpy as np
+
+def f_diff_index(y):
+    """
+    Cumulative index of the first differences of a series, built once per event or time series split
+
+    INPUT
+        y: (n,1) array with values
+    OUTPUT
+        diff_index: dictionary with
+            'cum_dQ': (n,) array, cum_dQ[k] = sum(np.diff(y[0:k+1])) (cumulative signed differences, cum_dQ[0] = 0)
+            'cum_abs_dQ': (n,) array, cum_abs_dQ[k] = sum(abs(np.diff(y[0:k+1]))) (cumulative absolute differences)
+    METHOD
+        the sums of the (absolute) differences between any two time steps are then two lookups (see f_segment_dQ)
+    """
+
+    dQ = np.diff(y)
+    diff_index = {
+        'cum_dQ': np.concatenate(([0.0], np.cumsum(dQ))),
+        'cum_abs_dQ': np.concatenate(([0.0], np.cumsum(np.abs(dQ))))
+    }
+
+    return diff_index
+
+
+def f_segment_dQ(diff_index, start, end):
+    """
+    Sum of slopes (sum_dQ) and sum of absolute slopes relative to the entire series (rel_dQ) of the values y[start] ... y[end]
+
+    INPUT
+        diff_index: see f_diff_index
+        start: index (or array of indices) of the first value
+        end: index (or array of indices) of the last value (included)
+    OUTPUT
+        sum_dQ: sum(np.diff(y[start:end+1]))
+        rel_dQ: sum(abs(np.diff(y[start:end+1]))) / sum(abs(np.diff(y)))
+    """
+
+    cum_dQ = diff_index['cum_dQ']
+    cum_abs_dQ = diff_index['cum_abs_dQ']
+
+    sum_dQ = cum_dQ[end] - cum_dQ[start]
+    rel_dQ = (cum_abs_dQ[end] - cum_abs_dQ[start]) / cum_abs_dQ[-1]
+
+    return sum_dQ, rel_dQ
\ No newline at end of file
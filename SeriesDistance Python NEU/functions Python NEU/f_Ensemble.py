@@ -0,0 +1,172 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from f_smooth_DP import f_smooth_DP
+from f_dp1d import f_dp1d
+from f_CountExtremes import f_count_extremes
+from f_ReplaceEqualNeighbours import f_ReplaceEqualNeighbours
+from f_FindSplitPoints import f_FindSplitPoints
+from f_SD import f_error_models
+from f_Backend import f_set_backend
+from f_CoarseGraining_SD_Continuous import f_coarse_graining_split, f_merge_split_results
+
+# obs levels, members and their splits of the worker processes (set once per worker by _init_worker)
+_obs_levels = None
+_sim_members = None
+_member_level = None
+_member_splits = None
+
+
+def _init_worker(obs_levels, sim_members, member_level, member_splits, backend=None):
+    global _obs_levels, _sim_members, _member_level, _member_splits
+    _obs_levels = obs_levels
+    _sim_members = sim_members
+    _member_level = member_level
+    _member_splits = member_splits
+    if backend is not None:
+        f_set_backend(backend)
+
+
+def _ensemble_split(args):
+    """
+    Coarse-graining and SD of split i of one member, executed in a worker process (see f_coarse_graining_split)
+    """
+
+    member, i, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model = args
+
+    return f_coarse_graining_split(_obs_levels[_member_level[member]], _sim_members[member], i, _member_splits[member],
+                                   weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model)
+
+
+def _error_rows(member, component, e):
+    e = np.asarray(e, dtype=float).flatten()
+    return {
+        'member': member,
+        'component': component,
+        'count': len(e),
+        'mean': np.mean(e) if len(e) else np.nan,
+        'mean_abs': np.mean(np.abs(e)) if len(e) else np.nan,
+        'std': np.std(e) if len(e) else np.nan,
+        'median': np.median(e) if len(e) else np.nan
+    }
+
+
+def f_ensemble_continuous(obs, sim_members, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, split_frequency=250, timeseries_splits=None,
+                          smooth_flag=True, nse_smooth_limit=0.99, smooth_criterion='numpoints', num_workers=None, backend=None):
+    """
+    Continuous mode SD analysis of an ensemble: several simulated members against the same observation
+
+    INPUT
+        obs: (n,) array with observed discharge (not smoothed)
+        sim_members: (k,n) array with the simulated discharge of k members (member x time)
+        weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, num_workers, backend: see f_coarse_graining_continuous
+        split_frequency: distance of the split points placed by f_FindSplitPoints for each member (default=250)
+        timeseries_splits: optional, split points used for all members (e.g. read with f_read_splits)
+        smooth_flag, nse_smooth_limit, smooth_criterion: smoothing of obs, see f_smooth_DP (default as in SD_Analysis_Continuous)
+    OUTPUT
+        summary: DataFrame with one row per member and error component ('t', 'q' or 'q_<model>' with a set of error models) and the
+                 columns member, component, count, mean, mean_abs, std, median. The rows of member 'ensemble' summarize the
+                 errors of all members pooled.
+        members: list with one dictionary per member: 'obs' (smoothed obs the member was compared with), 'sim', 'timeseries_splits'
+                 and 'segs_obs_opt_all', 'segs_sim_opt_all', 'cons_all', 'e_sd_t_all', 'e_sd_q_all' (see f_coarse_graining_continuous)
+    METHOD
+        The smoothing of obs is shared between the members: with smooth_criterion='numpoints', obs is simplified to the number
+        of extremes of each member. The Douglas-Peucker insertion order of obs is determined once, up to the largest number of
+        extremes, and each member's simplification is a prefix of it (see f_dp_level). Members with the same number of extremes
+        share the smoothed obs ('obs level'), which is smoothed and prepared with f_ReplaceEqualNeighbours once. With
+        smooth_criterion='nse' all members share one level.
+        The splits of all members are independent of each other: they are distributed over one pool of num_workers processes,
+        which receive the obs levels and all members once, and the result of each member is identical to
+        f_coarse_graining_continuous with the smoothed obs and sim of that member.
+    """
+
+    obs = np.asarray(obs, dtype=float).ravel()
+    sim_members = np.atleast_2d(np.asarray(sim_members, dtype=float))
+    if sim_members.shape[1] != len(obs):
+        raise ValueError('f_ensemble_continuous: sim_members must be a (members x time) array with the length of obs')
+    num_members = len(sim_members)
+
+    # obs level of each member: the number of points of the smoothed obs (as in f_smooth_DP: the number of extremes of sim with
+    # 'numpoints', the same for all members with 'nse' or without smoothing)
+    if smooth_flag and smooth_criterion == 'numpoints':
+        level_of = [sum(f_count_extremes(sim)) + 2 for sim in sim_members]
+    else:
+        level_of = [0] * num_members
+
+    # smoothed obs of each level: the Douglas-Peucker insertion order of obs is determined once, up to the finest level
+    if smooth_flag and smooth_criterion == 'numpoints':
+        _, dp_index = f_dp1d(np.column_stack((np.arange(1, len(obs) + 1), obs)), numpoints=max(level_of), return_index=True)
+    else:
+        dp_index = None
+
+    levels = sorted(set(level_of))
+    obs_levels = []
+    for level in levels:
+        sim = sim_members[level_of.index(level)]  # any member of this level
+        obs_smoothed, _ = f_smooth_DP(obs, sim, nse_smooth_limit, smooth_criterion, dp_index) if smooth_flag else (obs.copy(), sim)
+        obs_levels.append(f_ReplaceEqualNeighbours(obs_smoothed))
+    member_level = [levels.index(level) for level in level_of]
+    sims = [f_ReplaceEqualNeighbours(sim.copy()) for sim in sim_members]  # sim is not smoothed by f_smooth_DP
+
+    # split points of each member
+    if timeseries_splits is not None:
+        member_splits = [timeseries_splits] * num_members
+    else:
+        member_splits = [f_FindSplitPoints(obs_levels[member_level[member]], sims[member], split_frequency) for member in range(num_members)]
+
+    # all splits of all members
+    tasks = [(member, i, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model)
+             for member in range(num_members) for i in range(len(member_splits[member]) - 1)]
+
+    if num_workers is None:
+        num_workers = os.cpu_count()
+
+    initargs = (obs_levels, sims, member_level, member_splits, backend)
+    if num_workers <= 1 or len(tasks) <= 1:
+        _init_worker(*initargs)
+        split_results = [_ensemble_split(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker, initargs=initargs) as executor:
+            split_results = list(executor.map(_ensemble_split, tasks, chunksize=max(1, len(tasks) // (4 * num_workers))))
+
+    # results of each member (splits in split order)
+    by_member = [[] for _ in range(num_members)]
+    for task, split_result in zip(tasks, split_results):
+        by_member[task[0]].append(split_result)
+
+    models, keyed = f_error_models(error_model)
+    members = []
+    rows = []
+    pooled = {}
+    for member in range(num_members):
+        segs_obs_opt_all, segs_sim_opt_all, cons_all, e_sd_t_all, e_sd_q_all = f_merge_split_results(by_member[member], error_model)
+        members.append({
+            'obs': obs_levels[member_level[member]],
+            'sim': sims[member],
+            'timeseries_splits': member_splits[member],
+            'segs_obs_opt_all': segs_obs_opt_all,
+            'segs_sim_opt_all': segs_sim_opt_all,
+            'cons_all': cons_all,
+            'e_sd_t_all': e_sd_t_all,
+            'e_sd_q_all': e_sd_q_all
+        })
+
+        # SD error summaries of this member (errors of all splits, rise and fall)
+        errors = {'t': e_sd_t_all}
+        if keyed:
+            errors.update({f'q_{model}': e_sd_q_all[model] for model in models})
+        else:
+            errors['q'] = e_sd_q_all
+        for component, e in errors.items():
+            e = np.concatenate([np.ravel(part) for part in e] + [np.empty(0)])
+            pooled.setdefault(component, []).append(e)
+            rows.append(_error_rows(member, component, e))
+
+    # ensemble: errors of all members pooled
+    for component, e in pooled.items():
+        rows.append(_error_rows('ensemble', component, np.concatenate(e)))
+
+    summary = pd.DataFrame(rows)
+
+    return summary, members
\ No newline at end of file
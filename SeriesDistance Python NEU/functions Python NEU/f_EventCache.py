@@ -0,0 +1,90 @@
+import os
+import glob
+import pickle
+import hashlib
+import tempfile
+import numpy as np
+
+# part of every key: increase when the results of f_CoarseGraining_Event or f_sd change, so old cache entries are not used anymore
+CACHE_VERSION = 2
+
+
+def f_event_cache_key(obs, obs_eventindex, sim, sim_eventindex, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model):
+    """
+    Content address of the SD result of one event
+
+    INPUT
+        obs, sim: (n,1) arrays with observed and simulated discharge (entire time series)
+        obs_eventindex, sim_eventindex: arrays with the (global) time steps of the obs and sim event
+        weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model: see f_CoarseGraining_Event
+    OUTPUT
+        key: hex string, sha256 hash of the event slices of obs and sim, their time steps, the weights and the error model
+    """
+
+    h = hashlib.sha256()
+    h.update(repr((CACHE_VERSION, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model)).encode())
+    for values in (obs[obs_eventindex], np.asarray(obs_eventindex), sim[sim_eventindex], np.asarray(sim_eventindex)):
+        values = np.ascontiguousarray(values)
+        h.update(repr((values.dtype.str, values.shape)).encode())
+        h.update(values.tobytes())
+
+    return h.hexdigest()
+
+
+def f_cache_load(cache_dir, key):
+    """
+    Returns the cached result of 'key', or None if it is not in the cache (marks the entry as recently used)
+    """
+
+    filename = os.path.join(cache_dir, key + '.pkl')
+    try:
+        with open(filename, 'rb') as file:
+            result = pickle.load(file)
+        os.utime(filename)  # least recently used entries are evicted first
+    except (OSError, EOFError, pickle.UnpicklingError):  # not cached, or evicted by another process in the meantime
+        return None
+
+    return result
+
+
+def f_cache_store(cache_dir, key, result):
+    """
+    Stores the result of 'key' (the cache size is limited by f_cache_evict)
+
+    METHOD
+        The entry is written to a temporary file and renamed, so concurrent worker processes never read a partly written entry.
+    """
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_filename = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as file:
+        pickle.dump(result, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_filename, os.path.join(cache_dir, key + '.pkl'))
+
+
+def f_cache_evict(cache_dir, max_bytes):
+    """
+    Evicts the least recently used entries (oldest modification time first) until the cache does not exceed max_bytes
+
+    METHOD
+        The entries are listed once, so this is called once per batch of events (see f_run_events), not per stored entry.
+        Entries deleted by another process during the eviction are skipped.
+    """
+
+    entries = []
+    for filename in glob.glob(os.path.join(cache_dir, '*.pkl')):
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, filename))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, filename in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+        total -= size
\ No newline at end of file
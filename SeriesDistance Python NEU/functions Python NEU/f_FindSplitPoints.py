@@ -1,5 +1,11 @@
 import numpy as np
-from f_define_segments import f_define_segments
+from numpy.lib.stride_tricks import sliding_window_view
+from f_CountExtremes import f_cum_extremes
+
+# parameters of the split point search (also used by the streaming mode, see f_ContinuousStream)
+MAX_QUANTILE = 0.50  # candidate split points are only kept if both the obs and sim value are low enough to be below this probability of unexceedance of the entire time series
+MAX_NUM_SEGS = 15    # a candidate split point is kept if since the last split point, more segments are contained in the obs or sim series
+PERC = 15            # the region around a split point used for searching the optimal split point (percent of the split frequency)
 
 def f_FindSplitPoints(obs, sim, split_frequency):
     """
@@ -20,9 +26,9 @@ def f_FindSplitPoints(obs, sim, split_frequency):
         print('Warning: split_frequency IS EITHER MISSING OR NaN')
         return []
 
-    max_quantile = 0.50  # candidate split points are only kept if both the obs and sim value are low enough to be below this probability of unexceedance of the entire time series
-    max_num_segs = 15    # a candidate split point is kept if since the last split point, more segments are contained in the obs or sim series
-    perc = 15            # the region around a split point used for searching the optimal split point (percent of the split frequency)
+    max_quantile = MAX_QUANTILE
+    max_num_segs = MAX_NUM_SEGS
+    perc = PERC
 
     searchrange = round((perc / 100) * split_frequency)
 
@@ -35,47 +41,40 @@ def f_FindSplitPoints(obs, sim, split_frequency):
     # add the start of the time series (mandatory)
     timeseries_splits = [0]
 
-    for i in range(split_frequency, len(obs) - split_frequency, split_frequency):
-        obs_sample = obs[i - searchrange : i + searchrange + 1]
-        sim_sample = sim[i - searchrange : i + searchrange + 1]
-        obs_ranks = np.argsort(np.argsort(obs_sample))
-        sim_ranks = np.argsort(np.argsort(sim_sample))
-        best_split_time = np.argmin(obs_ranks + sim_ranks)
-        best_split_time = i - searchrange + best_split_time
+    # candidate split points and the best split time within the searchrange of each of them
+    # (ranks of all search windows at once, the windows are a strided view of obs and sim)
+    candidates = np.arange(split_frequency, len(obs) - split_frequency, split_frequency)
+    if len(candidates) == 0:
+        timeseries_splits.append(len(obs) - 1)
+        return timeseries_splits
+
+    window_starts = candidates - searchrange
+    obs_windows = sliding_window_view(obs, 2 * searchrange + 1)[window_starts]
+    sim_windows = sliding_window_view(sim, 2 * searchrange + 1)[window_starts]
+    obs_ranks = np.argsort(np.argsort(obs_windows, axis=1), axis=1)
+    sim_ranks = np.argsort(np.argsort(sim_windows, axis=1), axis=1)
+    best_split_times = window_starts + np.argmin(obs_ranks + sim_ranks, axis=1)
+
+    # candidates where both obs and sim are small enough
+    low_flow = (obs[best_split_times] <= obs_max_global) & (sim[best_split_times] <= sim_max_global)
 
-        if (obs[best_split_time] <= obs_max_global) and (sim[best_split_time] <= sim_max_global):
+    # prefix counts of the peaks and valleys (see f_cum_extremes): the number of segments between two points in time is
+    # 1 + the number of extremes strictly between them
+    cum_extremes_obs = f_cum_extremes(obs)
+    cum_extremes_sim = f_cum_extremes(sim)
+
+    for best_split_time, is_low_flow in zip(best_split_times, low_flow):
+        if is_low_flow:
             # if at the candidate split point, both obs and sim are small enough, add the point in time to the list
             timeseries_splits.append(best_split_time)
         else:
             # if there are many segments in obs or sim since the last split point, keep the split point anyways
-            times = np.arange(timeseries_splits[-1], best_split_time + 1)
-            vals_obs = obs[times]
-            vals_sim = sim[times]
-
-            # print('Input for f_define_segments:')
-            # print('type times: ', type(times))
-            # print('dtype times: ', times.dtype)
-            # print('shape times: ', times.shape)
-            # print('\n')
-            # print('type vals_obs: ', type(vals_obs))
-            # print('dtype vals_obs: ', vals_obs.dtype)
-            # print('shape vals_obs: ', vals_obs.shape)
-            # print('\n')
-            # print('type vals_sim: ', type(vals_sim))
-            # print('dtype vals_sim: ', vals_sim.dtype)
-            # print('shape vals_sim: ', vals_sim.shape)
-            # print('\n')
-
-            segs_obs = f_define_segments(times, vals_obs)
-            segs_sim = f_define_segments(times, vals_sim)
-
-            # print('Output of f_define_segments:')
-            # print('type segs_obs: ', type(segs_obs))
-            # print('\n')
-            # print('type segs_sim: ', type(segs_sim))
-            # print('\n')
-
-            if (len(segs_obs) >= max_num_segs) or (len(segs_sim) >= max_num_segs):
+            first = timeseries_splits[-1] + 1
+            last = max(best_split_time, first)
+            num_segs_obs = 1 + cum_extremes_obs[last] - cum_extremes_obs[first]
+            num_segs_sim = 1 + cum_extremes_sim[last] - cum_extremes_sim[first]
+
+            if (num_segs_obs >= max_num_segs) or (num_segs_sim >= max_num_segs):
                 timeseries_splits.append(best_split_time)
 
     # add the end of the time series (mandatory)
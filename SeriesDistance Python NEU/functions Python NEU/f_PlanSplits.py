@@ -0,0 +1,102 @@
+import numpy as np
+from f_CountExtremes import f_cum_extremes
+
+def f_split_costs(obs, sim, timeseries_splits):
+    """
+    Predicted coarse-graining cost of each time series split
+
+    INPUT
+        obs: (n,1) array with observed discharge
+        sim: (n,1) array with simulated discharge
+        timeseries_splits: list with the split points (as returned by f_FindSplitPoints or f_plan_splits)
+    OUTPUT
+        split_costs: dictionary with one entry per split (obs[timeseries_splits[i]:timeseries_splits[i+1]], as in f_coarse_graining_continuous)
+            'num_segs_obs': (s,) array with the number of segments of obs
+            'num_segs_sim': (s,) array with the number of segments of sim
+            'predicted_cost': (s,) array with the predicted cost (relative units)
+    METHOD
+        Each coarse-graining step erases one segment and evaluates all (m,m) candidate combinations of obs and sim segments,
+        so the cost of a split grows with the cube of its number of segments: cost = max(num_segs_obs, num_segs_sim)^3.
+        The number of segments is counted from the prefix counts of the extremes (f_cum_extremes).
+    """
+
+    splits = np.asarray(timeseries_splits, dtype=int)
+    first = splits[:-1] + 1  # first point that can be an extreme within the split
+    last = np.maximum(splits[1:] - 1, first)  # last point of the split
+
+    cum_extremes_obs = f_cum_extremes(obs)
+    cum_extremes_sim = f_cum_extremes(sim)
+    num_segs_obs = 1 + cum_extremes_obs[last] - cum_extremes_obs[first]
+    num_segs_sim = 1 + cum_extremes_sim[last] - cum_extremes_sim[first]
+
+    split_costs = {
+        'num_segs_obs': num_segs_obs,
+        'num_segs_sim': num_segs_sim,
+        'predicted_cost': np.maximum(num_segs_obs, num_segs_sim).astype(float) ** 3
+    }
+
+    return split_costs
+
+
+def f_plan_splits(obs, sim, max_num_segs=None, max_cost=None, max_quantile=0.50, perc=15):
+    """
+    Places the time series splits so that the coarse-graining cost of each split stays within a budget
+
+    INPUT
+        obs: (n,1) array with observed discharge
+        sim: (n,1) array with simulated discharge
+        max_num_segs: maximum number of segments of obs and sim per split
+        max_cost: maximum predicted cost per split (see f_split_costs). If both budgets are given, the stricter one is used
+        max_quantile: split points should be below this probability of unexceedance of obs and sim (low flow, default=0.50)
+        perc: the last 'perc' percent of the largest split within the budget are searched for the split point (default=15)
+    OUTPUT
+        split_plan: dictionary with
+            'timeseries_splits': list with the split points (start and end of the time series included, as f_FindSplitPoints)
+            'num_segs_obs', 'num_segs_sim', 'predicted_cost': see f_split_costs
+    METHOD
+        Starting at the last split point, the split is extended as far as the segment budget allows (searchsorted on the prefix
+        counts of the extremes). Within the last 'perc' percent of this range, the split is placed at the time step with the
+        smallest sum of the global ranks of obs and sim among the low-flow time steps (both below 'max_quantile'), or among
+        all time steps if there is no low-flow time step. No split exceeds the budget, and the splits are as long as possible.
+    """
+
+    if max_cost is not None:
+        num_segs_cost = int(np.floor(max_cost ** (1 / 3) + 1e-9))  # segment budget equivalent to the cost budget
+        max_num_segs = num_segs_cost if max_num_segs is None else min(max_num_segs, num_segs_cost)
+    if max_num_segs is None or max_num_segs < 1:
+        raise ValueError('f_plan_splits: max_num_segs or max_cost must allow at least 1 segment per split')
+
+    n = len(obs)
+    cum_extremes_obs = f_cum_extremes(obs)
+    cum_extremes_sim = f_cum_extremes(sim)
+
+    # global ranks and low-flow time steps
+    ranks = np.argsort(np.argsort(obs)) + np.argsort(np.argsort(sim))
+    low_flow = (obs <= np.quantile(obs, max_quantile)) & (sim <= np.quantile(sim, max_quantile))
+
+    timeseries_splits = [0]
+    start = 0
+    while True:
+        # last point of the longest split from 'start' that stays within the budget (segments of obs[start:end])
+        last_obs = np.searchsorted(cum_extremes_obs, cum_extremes_obs[start + 1] + max_num_segs - 1, side='right') - 1
+        last_sim = np.searchsorted(cum_extremes_sim, cum_extremes_sim[start + 1] + max_num_segs - 1, side='right') - 1
+        end_max = min(last_obs, last_sim) + 1
+
+        if end_max >= n - 1:  # the remainder of the time series fits into the budget
+            break
+
+        # search the best split point in the last 'perc' percent of the range
+        window = np.arange(max(start + 1, end_max - round((perc / 100) * (end_max - start))), end_max + 1)
+        if np.any(low_flow[window]):
+            window = window[low_flow[window]]
+        end = int(window[np.argmin(ranks[window])])
+
+        timeseries_splits.append(end)
+        start = end
+
+    timeseries_splits.append(n - 1)
+
+    split_plan = {'timeseries_splits': timeseries_splits}
+    split_plan.update(f_split_costs(obs, sim, timeseries_splits))
+
+    return split_plan
\ No newline at end of file
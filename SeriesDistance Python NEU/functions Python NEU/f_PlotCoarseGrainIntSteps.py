@@ -1,5 +1,6 @@
 import matplotlib.pyplot as plt
 import numpy as np
+from f_SegmentTable import f_segment_table
 
 def f_PlotCoarseGrainIntSteps(obs, segs_obs, sim, segs_sim, connectors, titlestring):
     """
@@ -7,9 +8,9 @@ def f_PlotCoarseGrainIntSteps(obs, segs_obs, sim, segs_sim, connectors, titlestr
     
     Parameters:
     obs: array-like, observed time series
-    segs_obs: list of dictionaries, segments of the observed time series
+    segs_obs: SegmentTable (or list of dictionaries), segments of the observed time series
     sim: array-like, simulated time series
-    segs_sim: list of dictionaries, segments of the simulated time series
+    segs_sim: SegmentTable (or list of dictionaries), segments of the simulated time series
     connectors: dictionary, containing matching points between obs and sim
     titlestring: string, title of the plot
     
@@ -19,6 +20,9 @@ def f_PlotCoarseGrainIntSteps(obs, segs_obs, sim, segs_sim, connectors, titlestr
     
     show_connectors = True
 
+    segs_obs = f_segment_table(segs_obs)
+    segs_sim = f_segment_table(segs_sim)
+
     print('connectors:', connectors)
     print('\n')
     # Distance vectors between matching points obs/sim
@@ -32,8 +36,8 @@ def f_PlotCoarseGrainIntSteps(obs, segs_obs, sim, segs_sim, connectors, titlestr
     plt.figure()
 
     # Plot the time series
-    plt.plot(range(segs_obs[0]['starttime_global'], segs_obs[-1]['endtime_global'] + 1), obs, '-b')
-    plt.plot(range(segs_sim[0]['starttime_global'], segs_sim[-1]['endtime_global'] + 1), sim, '--r')
+    plt.plot(range(segs_obs['starttime_global'][0], segs_obs['endtime_global'][-1] + 1), obs, '-b')
+    plt.plot(range(segs_sim['starttime_global'][0], segs_sim['endtime_global'][-1] + 1), sim, '--r')
 
     # Plot Feature Distance lines
     # Distance vectors between matching points obs/sim
@@ -46,11 +50,11 @@ def f_PlotCoarseGrainIntSteps(obs, segs_obs, sim, segs_sim, connectors, titlestr
 
     cmap_count = 0
     for z in range(num_segs):
-        xes_global = range(segs_obs[z]['starttime_global'], segs_obs[z]['endtime_global'] + 1)
-        plt.plot(xes_global, obs[segs_obs[z]['starttime_local']:segs_obs[z]['endtime_local'] + 1], '-', color=cmap[cmap_count], linewidth=2)
+        xes_global = range(segs_obs['starttime_global'][z], segs_obs['endtime_global'][z] + 1)
+        plt.plot(xes_global, obs[segs_obs['starttime_local'][z]:segs_obs['endtime_local'][z] + 1], '-', color=cmap[cmap_count], linewidth=2)
         
-        xes_global = range(segs_sim[z]['starttime_global'], segs_sim[z]['endtime_global'] + 1)
-        plt.plot(xes_global, sim[segs_sim[z]['starttime_local']:segs_sim[z]['endtime_local'] + 1], '--', color=cmap[cmap_count], linewidth=2)
+        xes_global = range(segs_sim['starttime_global'][z], segs_sim['endtime_global'][z] + 1)
+        plt.plot(xes_global, sim[segs_sim['starttime_local'][z]:segs_sim['endtime_local'][z] + 1], '--', color=cmap[cmap_count], linewidth=2)
         
         cmap_count += 1
         if cmap_count >= len(cmap):
@@ -1,5 +1,6 @@
 import matplotlib.pyplot as plt
 import numpy as np
+from f_SegmentTable import f_segment_table
 
 def f_PlotConnectedSeries(obs, segs_obs, sim, segs_sim, connectors, showEventIndex=False):
     """
@@ -9,6 +10,10 @@ def f_PlotConnectedSeries(obs, segs_obs, sim, segs_sim, connectors, showEventInd
 
     show_connectors = True
 
+    # segments as tables (lists of dictionaries are converted)
+    segs_obs = f_segment_table(segs_obs)
+    segs_sim = f_segment_table(segs_sim)
+
     # Distance vectors between matching points obs/sim
     if show_connectors:
         # Original code der Übersetzung
@@ -46,11 +51,11 @@ def f_PlotConnectedSeries(obs, segs_obs, sim, segs_sim, connectors, showEventInd
 
     cmap_count = 0
     for z in range(num_segs):
-        xes_global = np.arange(segs_obs[z]['starttime_global'], segs_obs[z]['endtime_global'] + 1)
+        xes_global = np.arange(segs_obs['starttime_global'][z], segs_obs['endtime_global'][z] + 1)
         yes_global = obs[xes_global - 1]  # Adjust for 0-based indexing in Python
         ax.plot(xes_global, yes_global, '-', color=cmap[cmap_count], linewidth=2)
 
-        xes_global = np.arange(segs_sim[z]['starttime_global'], segs_sim[z]['endtime_global'] + 1)
+        xes_global = np.arange(segs_sim['starttime_global'][z], segs_sim['endtime_global'][z] + 1)
         yes_global = sim[xes_global - 1]  # Adjust for 0-based indexing in Python
         ax.plot(xes_global, yes_global, '--', color=cmap[cmap_count], linewidth=2)
 
@@ -70,9 +75,9 @@ def f_PlotConnectedSeries(obs, segs_obs, sim, segs_sim, connectors, showEventInd
 
     # Add event index to plot
     if showEventIndex:
-        event_ind = [0] + list(np.where(np.diff([seg['eventID'] for seg in segs_obs]) == 1)[0] + 1)
+        event_ind = [0] + list(np.where(np.diff(segs_obs['eventID']) == 1)[0] + 1)
         for kk in range(len(event_ind)):
-            ax.text(segs_obs[event_ind[kk]]['starttime_global'], 0, f'# {kk + 1}')
+            ax.text(segs_obs['starttime_global'][event_ind[kk]], 0, f'# {kk + 1}')
     plt.box(True)
     # ax.hold(False)
     plt.show()
\ No newline at end of file
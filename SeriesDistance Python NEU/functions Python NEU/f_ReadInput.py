@@ -0,0 +1,177 @@
+import os
+import glob
+import hashlib
+import tempfile
+import itertools
+import numpy as np
+
+# part of every sidecar name: increase when the format of the sidecar files changes
+SIDECAR_VERSION = 1
+CHUNK_ROWS = 1000000  # default number of lines parsed at once by f_read_timeseries
+
+
+def _sidecar_names(filename, usecols, skip_rows, max_rows, dtype):
+    """
+    Name of the sidecar of a time series file (read parameters and file state) and the pattern of its outdated versions
+    """
+
+    stat = os.stat(filename)
+    parameters = hashlib.sha256(repr((SIDECAR_VERSION, tuple(usecols), skip_rows, max_rows, np.dtype(dtype).str)).encode()).hexdigest()[:12]
+    state = hashlib.sha256(repr((stat.st_size, stat.st_mtime_ns)).encode()).hexdigest()[:12]
+
+    return f'{filename}.{parameters}-{state}.sd.npy', f'{glob.escape(filename)}.{parameters}-*.sd.npy'
+
+
+def _parse_timeseries(filename, usecols, skip_rows, max_rows, dtype, chunk_rows):
+    """
+    Parses the columns usecols of a semicolon-separated file in chunks of chunk_rows lines, returns a (k,n) array
+    """
+
+    chunks = []
+    with open(filename) as file:
+        lines = itertools.islice(file, skip_rows, None if max_rows is None else skip_rows + max_rows)
+        while True:
+            chunk = list(itertools.islice(lines, chunk_rows))
+            if not chunk:
+                break
+            chunks.append(np.loadtxt(chunk, delimiter=';', usecols=usecols, dtype=dtype, ndmin=2).T)
+
+    if not chunks:
+        return np.empty((len(usecols), 0), dtype=dtype)
+
+    return np.ascontiguousarray(np.concatenate(chunks, axis=1))
+
+
+def f_read_timeseries(filename, usecols=(2, 3), skip_rows=1, max_rows=None, dtype=np.float64, chunk_rows=CHUNK_ROWS, sidecar=True):
+    """
+    Reads the obs and sim time series (HOST format: dts;tms;obs;sim) in one pass
+
+    INPUT
+        filename: semicolon-separated text file, one time step per line
+        usecols: columns to read (default: obs and sim of the HOST format)
+        skip_rows: number of lines skipped at the beginning of the file (default: the header line)
+        max_rows: optional, maximum number of lines read after the skipped lines (default: all)
+        dtype: float type of the values, e.g. np.float32 to halve the memory of long series (default=np.float64)
+        chunk_rows: number of lines parsed at once, so the text of multi-gigabyte files is never held in memory entirely
+        sidecar: True: use (and write) a binary sidecar file next to 'filename' (default=True)
+    OUTPUT
+        series: tuple with one 1D array per column of usecols, e.g. (obs, sim)
+    METHOD
+        The parsed columns are stored as a .npy sidecar ('filename.<parameters>-<state>.sd.npy'). Its name contains a hash of
+        the read parameters and of the size and modification time of 'filename', so the sidecar is only used as long as the text
+        file is unchanged; outdated sidecars of the same parameters are deleted. The sidecar is memory-mapped (copy-on-write),
+        so repeated runs start without parsing and only the used parts of the series are read from disk.
+        If the sidecar cannot be written (e.g. read-only directory), the parsed values are returned all the same.
+    """
+
+    usecols = [usecols] if np.isscalar(usecols) else list(usecols)
+
+    if not sidecar:
+        return tuple(_parse_timeseries(filename, usecols, skip_rows, max_rows, dtype, chunk_rows))
+
+    sidecar_name, outdated = _sidecar_names(filename, usecols, skip_rows, max_rows, dtype)
+    try:
+        data = np.load(sidecar_name, mmap_mode='c')
+    except (OSError, ValueError):  # no (valid) sidecar yet
+        data = _parse_timeseries(filename, usecols, skip_rows, max_rows, dtype, chunk_rows)
+        try:
+            for name in glob.glob(outdated):
+                os.remove(name)
+            fd, tmp_name = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as file:
+                np.save(file, data)
+            os.replace(tmp_name, sidecar_name)  # concurrent runs never read a partly written sidecar
+        except OSError:
+            pass
+
+    return tuple(np.asarray(column) for column in data)
+
+
+def _read_integer_table(filename, num_columns, skip_rows, caller):
+    """
+    Reads a semicolon-separated table of integers (e.g. event start and end times), returns an (m,num_columns) int64 array
+    """
+
+    try:
+        values = np.loadtxt(filename, delimiter=';', skiprows=skip_rows, dtype=np.float64, ndmin=2)
+    except ValueError as error:
+        raise ValueError(f'{caller}: {filename} is not a table of numbers ({error})')
+
+    if values.size == 0:
+        values = values.reshape(0, num_columns)
+    if values.shape[1] != num_columns:
+        raise ValueError(f'{caller}: {filename} must have {num_columns} column(s), found {values.shape[1]}')
+    if not np.all(np.isfinite(values)) or np.any(values != np.round(values)):
+        raise ValueError(f'{caller}: {filename} must only contain integer time steps')
+    if np.any(values < 0):
+        raise ValueError(f'{caller}: {filename} contains negative time steps')
+
+    return values.astype(np.int64)
+
+
+def f_read_events(filename, skip_rows=0, n=None):
+    """
+    Reads the start and end times of the events of one time series
+
+    INPUT
+        filename: semicolon-separated text file, one event per line: start;end
+        skip_rows: number of lines skipped at the beginning of the file (e.g. a header line)
+        n: optional, length of the time series, to check that the events lie within it
+    OUTPUT
+        events: (m,2) int64 array, [m,0]=start, [m,1]=end
+    """
+
+    events = _read_integer_table(filename, 2, skip_rows, 'f_read_events')
+
+    if np.any(events[:, 1] < events[:, 0]):
+        raise ValueError(f'f_read_events: {filename} contains events that end before they start')
+    if n is not None and np.any(events[:, 1] >= n):
+        raise ValueError(f'f_read_events: {filename} contains events beyond the end of the time series ({n} time steps)')
+
+    return events
+
+
+def f_read_pairing(filename, skip_rows=0, obs_events=None, sim_events=None):
+    """
+    Reads the pairs of obs and sim events that belong together
+
+    INPUT
+        filename: semicolon-separated text file, one event pair per line: start of the obs event;start of the sim event
+        skip_rows: number of lines skipped at the beginning of the file (e.g. a header line)
+        obs_events, sim_events: optional, events of obs and sim (see f_read_events), to check that the pairs refer to their starts
+    OUTPUT
+        obs_sim_pairing: (p,2) int64 array, [p,0]=start time of the obs event, [p,1]=start time of the sim event
+    """
+
+    obs_sim_pairing = _read_integer_table(filename, 2, skip_rows, 'f_read_pairing')
+
+    for column, events, name in ((0, obs_events, 'obs'), (1, sim_events, 'sim')):
+        if events is not None and not np.all(np.isin(obs_sim_pairing[:, column], events[:, 0])):
+            raise ValueError(f'f_read_pairing: {filename} contains pairs that are not the start of a {name} event')
+
+    return obs_sim_pairing
+
+
+def f_read_splits(filename, skip_rows=0, n=None):
+    """
+    Reads the time series splits defined by the user
+
+    INPUT
+        filename: text file, one split point per line (including the first and the last time step)
+        skip_rows: number of lines skipped at the beginning of the file (e.g. a header line)
+        n: optional, length of the time series, to check that the splits lie within it (the split points are the bounds of the
+           slices of the splits, so the last one may be n)
+    OUTPUT
+        timeseries_splits: 1D int64 array with the split points
+    """
+
+    timeseries_splits = _read_integer_table(filename, 1, skip_rows, 'f_read_splits')[:, 0]
+
+    if np.any(np.diff(timeseries_splits) <= 0):
+        raise ValueError(f'f_read_splits: the split points in {filename} must be strictly increasing')
+    if len(timeseries_splits) < 2:
+        raise ValueError(f'f_read_splits: {filename} must contain at least the first and the last time step')
+    if n is not None and timeseries_splits[-1] > n:
+        raise ValueError(f'f_read_splits: {filename} contains split points beyond the end of the time series ({n} time steps)')
+
+    return timeseries_splits
\ No newline at end of file
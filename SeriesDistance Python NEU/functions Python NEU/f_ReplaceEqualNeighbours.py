@@ -8,21 +8,44 @@ def f_ReplaceEqualNeighbours(vals):
     INPUT
         vals: (n,1) numpy array of values
     OUTPUT
-        vals: (n,1) numpy array, same as input, but equal neighbours replaced
-        count: number of found equal neighbours
+        vals: (n,1) numpy array, same as input, but equal neighbours replaced (the input array is changed in place)
     METHOD
         If a series of equal neighbouring values is found, they are successively increased by 1/1000
         --> in a sequence of equal values, the last one will be the largest
+        The runs of equal values are found in one pass and increased together, one position of all runs at a time (the runs sorted by
+        length, so the runs still to be increased are a prefix of them): each value is the previous value + 1/10000, by the same
+        sequence of additions as the point by point replacement, so the result is bit-identical to it. If the last (increased) value
+        of a run equals the following value, the run is carried on into the following values, as when replacing them point by point
+        from the start of the series
     """
 
-    count = 0
+    n = len(vals)
+    if n < 2:
+        return vals
 
-    for z in range(len(vals) - 1):  # Loop over all values
-        if vals[z] == vals[z + 1]:  # Equal neighbouring values?
-            count = 1
+    vals_org = vals.copy()
+    starts = np.flatnonzero(np.concatenate(([True], vals_org[1:] != vals_org[:-1])))  # first positions of the runs of equal values
+    ends = np.append(starts[1:], n)  # end (exclusive) of each run
 
-            while (z + count) < len(vals) and vals[z + count] == vals[z]:  # Loop over all neighbouring equal values
-                vals[z + count] = vals[z + count - 1] + 0.0001  # Increase the value of the previous point by 0.0001
-                count += 1
+    # increase the value of the previous point by 0.0001, position k of all runs that are longer than k at once
+    lengths = ends - starts
+    order = np.argsort(-lengths, kind='stable')
+    starts_sorted = starts[order]
+    num_longer = np.searchsorted(-lengths[order], -np.arange(1, np.max(lengths)), side='left')  # number of runs longer than k
+    for k in range(1, np.max(lengths)):
+        idx = starts_sorted[:num_longer[k - 1]] + k
+        vals[idx] = vals[idx - 1] + 0.0001
+
+    # runs whose first value equals the (increased) last value of the previous run: the previous run is carried on into them and
+    # from there on into the following runs, as long as their first value equals the new last value
+    carried = 0  # runs before this one have been carried on already
+    for r in np.flatnonzero(vals[starts[1:] - 1] == vals_org[starts[1:]]) + 1:
+        if r < carried:
+            continue
+        while r < len(starts) and vals[starts[r] - 1] == vals_org[starts[r]]:
+            # sequential additions (np.add.accumulate adds one value after the other)
+            vals[starts[r]:ends[r]] = np.add.accumulate(np.concatenate(([vals[starts[r] - 1]], np.full(lengths[r], 0.0001))))[1:]
+            r += 1
+        carried = r
 
     return vals
\ No newline at end of file
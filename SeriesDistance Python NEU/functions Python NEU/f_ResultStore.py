@@ -0,0 +1,264 @@
+import os
+import json
+import numpy as np
+from f_SegmentTable import SegmentTable
+
+FORMAT_VERSION = 2
+MANIFEST = 'manifest.json'
+
+# columns of each kind of item (suffixes of the .npy files, see _write_item)
+COLUMNS = {
+    'segments': ['.bounds', '.props'],
+    'segments+eventID': ['.bounds', '.props', '.eventID'],
+    'dict': [],  # the entries are items of their own
+    'array': [''],
+    'ragged': ['.values', '.offsets']
+}
+
+# per-event offsets (see f_write_results): index name --> items indexed by it
+EVENT_INDEX = {
+    'segs': ['segs_obs_opt_all', 'segs_sim_opt_all'],
+    'cons': ['connectors'],
+    'rise': ['e_sd_t_rise', 'e_sd_q_rise'],
+    'fall': ['e_sd_t_fall', 'e_sd_q_fall']
+}
+
+
+def _as_array(value):
+    """
+    value as a regular (not ragged) array, or None if it is ragged (e.g. a list of error lists of different lengths)
+    """
+
+    try:
+        array = np.asarray(value)
+    except ValueError:  # inhomogeneous nesting
+        array = None
+
+    if array is None or array.dtype == object:  # e.g. None or bool within numbers: stored as float (None --> NaN)
+        try:
+            array = np.asarray(value, dtype=float)
+        except (ValueError, TypeError):
+            return None
+
+    return array
+
+
+def _write_item(path, name, value, items):
+    """
+    Writes one result item as one or several typed columns (.npy files) and records its kind in 'items'
+    """
+
+    if isinstance(value, SegmentTable):
+        items[name] = 'segments' if value.eventID is None else 'segments+eventID'
+        np.save(os.path.join(path, f'{name}.bounds.npy'), value.bounds)
+        np.save(os.path.join(path, f'{name}.props.npy'), value.props)
+        if value.eventID is not None:
+            np.save(os.path.join(path, f'{name}.eventID.npy'), value.eventID)
+    elif isinstance(value, dict):  # e.g. connectors, or magnitude errors keyed by error model
+        items[name] = 'dict'
+        for key, entry in value.items():
+            _write_item(path, f'{name}.{key}', entry, items)
+    else:
+        array = _as_array(value)
+        if array is not None:
+            items[name] = 'array'
+            np.save(os.path.join(path, f'{name}.npy'), array)
+        else:  # ragged: values of all entries one after the other and the offsets of the entries
+            items[name] = 'ragged'
+            entries = [np.asarray(entry, dtype=float).ravel() for entry in value]
+            np.save(os.path.join(path, f'{name}.values.npy'), np.concatenate(entries) if entries else np.empty(0))
+            np.save(os.path.join(path, f'{name}.offsets.npy'), np.concatenate(([0], np.cumsum([len(entry) for entry in entries]))).astype(np.int64))
+
+
+def f_write_results(path, results, parameters=None, event_results=None):
+    """
+    Writes the results of a run as typed columnar arrays, one .npy file per column in the directory 'path'
+
+    INPUT
+        path: output directory (created if necessary, existing columns are overwritten, columns of a previous run in
+              'path' that are not part of these results are deleted)
+        results: dictionary with the result items, e.g. obs, sim, segs_obs_opt_all, connectors, e_sd_t_rise, ...
+                 - arrays and regular lists (also rows with None, stored as NaN): one column
+                 - SegmentTables: columns 'name.bounds', 'name.props' (and 'name.eventID')
+                 - dictionaries (connectors, errors keyed by error model): one item per key ('name.key')
+                 - ragged lists (e.g. the errors of each split): columns 'name.values' and 'name.offsets'
+        parameters: optional dictionary with the run parameters (JSON types: numbers, strings, lists, None)
+        event_results: optional list with the results of the events (see f_run_events), writes the per-event offsets of the
+                       segments, connectors and rise/fall errors (index '_event_index', see EVENT_INDEX and f_read_event)
+    METHOD
+        The columns are uncompressed .npy files (not zipped as in .npz), so they can be memory-mapped by the readers.
+        A manifest (JSON) lists the items with their kind and the parameters.
+    """
+
+    os.makedirs(path, exist_ok=True)
+
+    # columns of a previous run in this directory
+    try:
+        with open(os.path.join(path, MANIFEST)) as file:
+            items_old = json.load(file)['items']
+    except (OSError, ValueError, KeyError):
+        items_old = {}
+
+    items = {}
+    for name, value in results.items():
+        _write_item(path, name, value, items)
+
+    if event_results is not None:
+        counts = {
+            'segs': [len(result['segs_obs_opt']) for result in event_results],
+            'cons': [len(result['cons']['x_match_obs_global']) for result in event_results],
+            'rise': [len(result['e_t_rise']) for result in event_results],
+            'fall': [len(result['e_t_fall']) for result in event_results]
+        }
+        _write_item(path, '_event_index', {key: np.concatenate(([0], np.cumsum(count))).astype(np.int64) for key, count in counts.items()}, items)
+
+    manifest = {'format_version': FORMAT_VERSION, 'items': items, 'top': list(results) + (['_event_index'] if event_results is not None else []),
+                'parameters': parameters or {}}
+    with open(os.path.join(path, MANIFEST), 'w') as file:
+        json.dump(manifest, file, indent=1)
+
+    # delete the columns of the previous run that were not written again (stale columns)
+    columns = {f'{name}{suffix}' for name, kind in items.items() for suffix in COLUMNS[kind]}
+    for name, kind in items_old.items():
+        for column in (f'{name}{suffix}' for suffix in COLUMNS.get(kind, [])):
+            if column not in columns:
+                try:
+                    os.remove(os.path.join(path, f'{column}.npy'))
+                except OSError:
+                    pass
+
+
+def f_open_results(path):
+    """
+    Opens a result directory written by f_write_results (reads only the manifest)
+
+    OUTPUT
+        store: dictionary with 'path', 'items' (name --> kind), 'top' (names of the result items) and 'parameters'
+    """
+
+    with open(os.path.join(path, MANIFEST)) as file:
+        manifest = json.load(file)
+
+    if manifest['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"f_open_results: unsupported format version {manifest['format_version']}")
+
+    return {'path': path, 'items': manifest['items'], 'top': manifest['top'], 'parameters': manifest['parameters']}
+
+
+def _column(store, name):
+    return np.load(os.path.join(store['path'], f'{name}.npy'), mmap_mode='r')
+
+
+def f_read_item(store, name, start=None, stop=None):
+    """
+    Reads one result item, memory-mapped (only the rows that are used are read from the file)
+
+    INPUT
+        store: see f_open_results
+        name: name of the item (e.g. 'segs_obs_opt_all', 'connectors' or 'e_sd_q_rise.relative')
+        start, stop: optional, rows start ... stop-1 of the item (all columns, keys or entries of a ragged item)
+    OUTPUT
+        item: array (memory-mapped), SegmentTable, dictionary of items or list of arrays (ragged) as written;
+              0-d arrays (parameters such as error_model) are returned as Python scalars
+    """
+
+    kind = store['items'][name]
+    rows = slice(start, stop)
+
+    if kind in ('segments', 'segments+eventID'):
+        return SegmentTable(_column(store, f'{name}.bounds')[rows], _column(store, f'{name}.props')[rows],
+                            _column(store, f'{name}.eventID')[rows] if kind == 'segments+eventID' else None)
+
+    if kind == 'dict':
+        prefix = f'{name}.'
+        keys = [key for key in store['items'] if key.startswith(prefix) and '.' not in key[len(prefix):]]
+        return {key[len(prefix):]: f_read_item(store, key, start, stop) for key in keys}
+
+    if kind == 'ragged':
+        values = _column(store, f'{name}.values')
+        offsets = np.asarray(_column(store, f'{name}.offsets'))
+        indices = range(len(offsets) - 1)[rows]
+        return [values[offsets[i]:offsets[i + 1]] for i in indices]
+
+    array = _column(store, name)
+    if array.ndim == 0:
+        return array.item()
+
+    return array[rows]
+
+
+def f_read_results(path, names=None):
+    """
+    Reads (memory-mapped) the result items of a run
+
+    INPUT
+        path: result directory written by f_write_results
+        names: optional list with the names of the items to read (default: all)
+    OUTPUT
+        results: dictionary with the items (see f_read_item)
+        parameters: dictionary with the run parameters
+    """
+
+    store = f_open_results(path)
+    names = store['top'] if names is None else names
+
+    return {name: f_read_item(store, name) for name in names}, store['parameters']
+
+
+def f_read_event(path, ii):
+    """
+    Reads the results of one event (0-based position in obs_sim_pairing) without loading the entire run
+
+    INPUT
+        path: result directory written by f_write_results with event_results
+        ii: event number (0-based)
+    OUTPUT
+        event: dictionary with the items of EVENT_INDEX (segments, connectors, rise and fall errors) of the event
+               that are in the results (magnitude errors keyed by error model, if the run used a set of error models)
+    """
+
+    store = f_open_results(path)
+    if '_event_index' not in store['items']:
+        raise ValueError('f_read_event: the results contain no per-event index (write them with event_results)')
+
+    event = {}
+    for index, names in EVENT_INDEX.items():
+        offsets = _column(store, f'_event_index.{index}')
+        for name in names:
+            if name in store['items']:
+                event[name] = f_read_item(store, name, int(offsets[ii]), int(offsets[ii + 1]))
+
+    return event
+
+
+def f_results_to_mat(path, matfile):
+    """
+    Converts a result directory to a MATLAB .mat file (optional, needs scipy)
+
+    INPUT
+        path: result directory written by f_write_results
+        matfile: name of the .mat file
+    METHOD
+        Segment tables are stored as struct arrays, ragged items as cell arrays and the parameters as variables, as the
+        notebooks did with savemat
+    """
+
+    try:
+        from scipy.io import savemat
+    except ImportError:
+        raise ImportError('f_results_to_mat needs scipy')
+
+    results, parameters = f_read_results(path)
+
+    def to_mat(value):
+        if isinstance(value, SegmentTable):
+            return value.to_dicts()
+        if isinstance(value, dict):
+            return {key: to_mat(entry) for key, entry in value.items()}
+        if isinstance(value, list):  # ragged
+            return [np.asarray(entry) for entry in value]
+        return np.asarray(value) if isinstance(value, np.ndarray) else value
+
+    mdict = {name: to_mat(value) for name, value in results.items() if not name.startswith('_')}
+    mdict.update({name: value for name, value in parameters.items() if name not in mdict and value is not None})
+    savemat(matfile, mdict)
\ No newline at end of file
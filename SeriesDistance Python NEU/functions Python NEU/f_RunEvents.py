@@ -0,0 +1,193 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from f_CoarseGraining_Event import f_CoarseGraining_Event
+from f_SegStats import f_SegStats
+from f_SD import f_sd, f_error_models
+from f_SegmentTable import SegmentTable
+from f_Backend import f_set_backend
+from f_EventCache import f_event_cache_key, f_cache_load, f_cache_store, f_cache_evict
+
+# obs and sim of the worker processes (set once per worker by _init_worker, not sent with every event)
+_obs = None
+_sim = None
+
+
+def _init_worker(obs, sim, backend=None):
+    global _obs, _sim
+    _obs = obs
+    _sim = sim
+    if backend is not None:
+        f_set_backend(backend)
+
+
+def f_event_indices(obs_events, sim_events, obs_sim_pairing):
+    """
+    Time steps of the paired events
+
+    INPUT
+        obs_events, sim_events, obs_sim_pairing: see f_run_events
+    OUTPUT
+        event_indices: list with one tuple (obs_eventindex, sim_eventindex) per row of obs_sim_pairing
+    """
+
+    event_indices = []
+    for ii in range(len(obs_sim_pairing)):
+        obs_eventindex = np.arange(obs_sim_pairing[ii, 0], obs_events[np.where(obs_events[:, 0] == obs_sim_pairing[ii, 0])[0][0], 1] + 1)
+        sim_eventindex = np.arange(obs_sim_pairing[ii, 1], sim_events[np.where(sim_events[:, 0] == obs_sim_pairing[ii, 1])[0][0], 1] + 1)
+        event_indices.append((obs_eventindex, sim_eventindex))
+
+    return event_indices
+
+
+def f_run_event(obs, sim, ii, obs_eventindex, sim_eventindex, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, plot_intermedSteps=False, cache_dir=None):
+    """
+    Coarse-graining and SD of a single event (row ii of obs_sim_pairing)
+
+    INPUT
+        obs, sim, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, plot_intermedSteps, cache_dir: see f_run_events
+        ii: position of the event in obs_sim_pairing (0-based)
+        obs_eventindex, sim_eventindex: time steps of the obs and sim event (see f_event_indices)
+    OUTPUT
+        result: dict with the segments, connectors, objective function values, segment statistics and errors of the event
+    """
+
+    # unchanged events are loaded from the cache (not when the intermediate steps are plotted, these need the coarse-graining)
+    if cache_dir is not None:
+        key = f_event_cache_key(obs, obs_eventindex, sim, sim_eventindex, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model)
+        if not plot_intermedSteps:
+            result = f_cache_load(cache_dir, key)
+            if result is not None:
+                result['seg_opt_statistics'][0] = ii + 1  # the same event can have another position in obs_sim_pairing
+                return result
+
+    # apply coarse-graining: determine the optimal level of aggregation of the event
+    segs_obs_opt, segs_sim_opt, cons_opt, connector_data, ObFuncVal, opt_step, CoarseGrain_segs, seg_raw_stats = \
+        f_CoarseGraining_Event(obs, obs_eventindex, sim, sim_eventindex, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, plot_intermedSteps)
+
+    # SD results for the optimized level of generalization
+    obs_fromto = np.arange(segs_obs_opt[0]['starttime_global'], segs_obs_opt[-1]['endtime_global'] + 1)
+    sim_fromto = np.arange(segs_sim_opt[0]['starttime_global'], segs_sim_opt[-1]['endtime_global'] + 1)
+    _, _, _, e_q_rise, e_t_rise, _, e_q_fall, e_t_fall, _, cons, _, _ = f_sd(obs[obs_fromto], segs_obs_opt, sim[sim_fromto], segs_sim_opt, error_model, 'true')
+
+    result = {
+        'segs_obs_opt': segs_obs_opt,
+        'segs_sim_opt': segs_sim_opt,
+        'cons_opt': cons_opt,
+        'cons': cons,
+        'ObFuncVal': ObFuncVal,
+        'opt_step': opt_step,
+        'seg_raw_statistics': seg_raw_stats,
+        'seg_opt_statistics': [ii + 1] + f_SegStats(segs_obs_opt) + [(len(ObFuncVal) > 1), opt_step] + f_SegStats(segs_sim_opt),
+        'e_t_rise': e_t_rise,
+        'e_q_rise': e_q_rise,
+        'e_t_fall': e_t_fall,
+        'e_q_fall': e_q_fall
+    }
+
+    if cache_dir is not None:
+        f_cache_store(cache_dir, key, result)
+
+    return result
+
+
+def _run_event(args):
+    """
+    Coarse-graining and SD of a single event, executed in a worker process (see f_run_event)
+    """
+
+    return f_run_event(_obs, _sim, *args)
+
+
+def f_collect_events(event_results, error_model):
+    """
+    Collects the results of the single events (see f_run_event)
+
+    INPUT
+        event_results: list with the results of the events, in the order of obs_sim_pairing
+        error_model: see f_run_events
+    OUTPUT
+        see f_run_events
+    """
+
+    # the arrays of the events are concatenated once
+    models, keyed = f_error_models(error_model)
+    seg_raw_statistics = [result['seg_raw_statistics'] for result in event_results]  # segment statistics
+    seg_opt_statistics = [result['seg_opt_statistics'] for result in event_results]  # segment statistics
+
+    def collect(key, model=None):
+        return np.concatenate([result[key][model] if keyed and model is not None else result[key] for result in event_results] + [np.empty(0)])
+
+    e_sd_t_rise = collect('e_t_rise')  # error distribution for events, rise, time component
+    e_sd_q_rise = {model: collect('e_q_rise', model) for model in models}  # error distribution for events, rise, magnitude component
+    e_sd_t_fall = collect('e_t_fall')  # error distribution for events, fall, time component
+    e_sd_q_fall = {model: collect('e_q_fall', model) for model in models}  # error distribution for events, fall, magnitude component
+
+    # connectors between matching points in 'obs' and 'sim'
+    connectors = {key: np.concatenate([result['cons'][key] for result in event_results] + [np.empty(0)])
+                  for key in ['x_match_obs_global', 'y_match_obs', 'x_match_sim_global', 'y_match_sim']}
+
+    # store the optimized segments of all events together with the event ID (needed for plotting)
+    eventIDs = np.arange(1, len(event_results) + 1)
+    segs_obs_opt_all = SegmentTable.concatenate([result['segs_obs_opt'] for result in event_results], eventIDs)
+    segs_sim_opt_all = SegmentTable.concatenate([result['segs_sim_opt'] for result in event_results], eventIDs)
+
+    if not keyed:  # a single error model: plain arrays
+        e_sd_q_rise, e_sd_q_fall = e_sd_q_rise[models[0]], e_sd_q_fall[models[0]]
+
+    return segs_obs_opt_all, segs_sim_opt_all, connectors, e_sd_t_rise, e_sd_q_rise, e_sd_t_fall, e_sd_q_fall, seg_raw_statistics, seg_opt_statistics, event_results
+
+
+def f_run_events(obs, sim, obs_events, sim_events, obs_sim_pairing, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, num_workers=None, plot_intermedSteps=False, backend=None, cache_dir=None, cache_max_bytes=2**30):
+    """
+    Applies coarse-graining and the SD method to all paired events, distributed over a pool of worker processes
+
+    INPUT
+        obs: (n,1) array with observed discharge
+        sim: (n,1) array with simulated discharge
+        obs_events: (m,2) array with start and end times of events in 'obs'
+        sim_events: (m,2) array with start and end times of events in 'sim'
+        obs_sim_pairing: (p,2) array with the start times of the obs and sim events that belong together
+        weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model: see f_CoarseGraining_Event
+        num_workers: number of worker processes. None: one per cpu core, 1: serial run without a process pool
+        plot_intermedSteps: plots intermediate coarse graining steps (forces a serial run, as worker processes cannot plot)
+        backend: optional, 'numpy' or 'numba' backend of the inner kernels (see f_set_backend). None: keep the current setting
+        cache_dir: optional directory of a persistent cache of the event results. None: no cache
+        cache_max_bytes: size limit of the cache, least recently used events are evicted first after all events are processed (default=1 GiB)
+    OUTPUT
+        segs_obs_opt_all: SegmentTable with the coarse-grained segments of 'obs' of all events (with 'eventID')
+        segs_sim_opt_all: SegmentTable with the coarse-grained segments of 'sim' of all events (with 'eventID')
+        connectors: dict with the SD connectors of all events (one array per key)
+        e_sd_t_rise, e_sd_q_rise, e_sd_t_fall, e_sd_q_fall: arrays with the SD errors of all events (rise/ fall, time/ magnitude)
+                                                            with a set of error models, e_sd_q_rise and e_sd_q_fall are dicts keyed by model
+        seg_raw_statistics: list with the segment statistics of each event before coarse-graining
+        seg_opt_statistics: list with the segment statistics of each event after coarse-graining
+        event_results: list with one dict per event (segments, connectors, objective function values, errors), e.g. for plotting
+    METHOD
+        The events are independent of each other. They are processed in parallel and the results are collected in event order,
+        so the output is identical to processing the events one after the other.
+        With a set of error models, each event is coarse-grained once (optimized for the first error model) and the magnitude
+        errors of all error models are computed from the same connectors (see f_sd).
+        With a cache, the result of each event is stored under a hash of its obs and sim values, time steps, weights and error
+        model (see f_EventCache). Events whose inputs did not change are loaded instead of coarse-grained again.
+    """
+
+    # start and end points of all events
+    tasks = [(ii, obs_eventindex, sim_eventindex, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, plot_intermedSteps, cache_dir)
+             for ii, (obs_eventindex, sim_eventindex) in enumerate(f_event_indices(obs_events, sim_events, obs_sim_pairing))]
+
+    if num_workers is None:
+        num_workers = os.cpu_count()
+
+    # apply coarse-graining and SD to each event (map returns the results in event order)
+    if num_workers <= 1 or len(tasks) <= 1 or plot_intermedSteps:
+        _init_worker(obs, sim, backend)
+        event_results = [_run_event(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker, initargs=(obs, sim, backend)) as executor:
+            event_results = list(executor.map(_run_event, tasks, chunksize=max(1, len(tasks) // (4 * num_workers))))
+
+    if cache_dir is not None:
+        f_cache_evict(cache_dir, cache_max_bytes)
+
+    return f_collect_events(event_results, error_model)
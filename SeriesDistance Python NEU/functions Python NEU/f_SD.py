@@ -1,4 +1,193 @@
 import numpy as np
+from f_SegmentTable import f_segment_table
+from f_Backend import f_use_numba, _sd_connectors_kernel, _sd_abs_errors_kernel
+
+ERROR_MODELS = ['standard', 'relative']
+
+
+def f_error_models(error_model):
+    """
+    Error models requested by the error_model argument of f_sd
+
+    INPUT
+        error_model: a single error model ('standard' or 'relative') or a set of error models (list, tuple or set)
+    OUTPUT
+        models: list with the error models (in the given order; a set is ordered as ERROR_MODELS)
+        keyed: True if a set of error models was given, i.e. the magnitude errors are returned as dict keyed by model
+    """
+
+    keyed = not isinstance(error_model, str)
+    if not keyed:
+        models = [error_model]
+    elif isinstance(error_model, (list, tuple)):
+        models = list(error_model)
+    else:
+        models = [model for model in ERROR_MODELS if model in error_model] + [model for model in error_model if model not in ERROR_MODELS]
+
+    if not models or any(model not in ERROR_MODELS for model in models):
+        raise ValueError('distance function not properly specified')
+
+    return models, keyed
+
+
+def f_sd_magnitude_errors(con_y_obs, con_y_sim, error_model):
+    """
+    Magnitude (value) distances of SD connectors for one error model (see f_sd). > 0 means obs is larger than sim
+    """
+
+    if error_model == 'standard':  # compute the simple difference
+        return con_y_obs - con_y_sim
+    elif error_model == 'relative':  # compute a scaled difference
+        return (con_y_obs - con_y_sim) / ((con_y_obs + con_y_sim) * 0.5)
+    else:
+        raise ValueError('distance function not properly specified')
+
+
+def f_sd_connector_counts(rel_obs, rel_sim, totnumcons, sum_rels):
+    """
+    Determines the number of SD connectors assigned to each pair of matching segments
+
+    INPUT
+        rel_obs: (k,) array with the relevance of the obs segments
+        rel_sim: (k,) array with the relevance of the matching sim segments
+        totnumcons: total number of connectors of the event (mean length of obs and sim)
+        sum_rels: overall sum of relevance of all obs and sim segments
+    OUTPUT
+        num: (k,) int array with the number of connectors per segment pair (at least 1)
+    METHOD
+        the share of connectors of each segment pair is proportional to its relative relevance
+        the shares are rounded half away from zero as with matlab's round (np.round rounds half to even); they are not negative
+    """
+
+    num = np.floor((rel_obs + rel_sim) * totnumcons / sum_rels + 0.5).astype(int)
+    num[num < 1] = 1  # each segment pair gets at least one connector
+
+    return num
+
+
+def f_sd_connector_positions(start, end, num):
+    """
+    Positions of the connectors of a set of segments, flattened (same values as np.linspace(start[k], end[k], num[k]) for each k)
+
+    INPUT
+        start: (k,) array with segment starts
+        end: (k,) array with segment ends
+        num: (k,) array with the number of connectors of each segment (>= 1)
+    OUTPUT
+        pos: (sum(num),) array with the connector positions of all segments, one segment after the other
+    """
+
+    num = np.asarray(num)
+    seg_id = np.repeat(np.arange(len(num)), num)  # segment of each connector
+    j = np.arange(len(seg_id)) - np.repeat(np.cumsum(num) - num, num)  # index of each connector within its segment
+
+    start = np.asarray(start, dtype=float)
+    end = np.asarray(end, dtype=float)
+    div = np.maximum(num - 1, 1)
+    step = (end - start) / div
+
+    pos = j * step[seg_id] + start[seg_id]
+    last = np.cumsum(num)[num > 1] - 1
+    pos[last] = end[num > 1]  # linspace sets the endpoint exactly
+
+    return pos
+
+
+def f_sd_pair_sums(y_obs, seg_bounds_obs, y_sim, seg_bounds_sim, num, error_model):
+    """
+    Sums of absolute SD timing and magnitude errors for a set of (not necessarily consecutive) obs/sim segment pairs
+
+    INPUT
+        y_obs: (n,) array with observed values
+        seg_bounds_obs: (k,4) array with starttime_local, endtime_local, starttime_global, endtime_global of the obs segment of each pair
+        y_sim: (m,) array with simulated values
+        seg_bounds_sim: (k,4) array, same as seg_bounds_obs for the sim segment of each pair
+        num: (k,) array with the number of connectors of each pair (see f_sd_connector_counts)
+        error_model: 'standard' or 'relative' (see f_sd)
+    OUTPUT
+        sum_e_t: (k,) array with the sum of absolute timing errors of each pair
+        sum_e_q: (k,) array with the sum of absolute magnitude errors of each pair
+    METHOD
+        the connectors of each pair are placed exactly as in f_sd, so summing the pairs of a segmentation and dividing by the
+        total number of connectors gives the mean absolute errors f_sd returns for that segmentation.
+        All connectors of all pairs are handled in one flat array: positions by index arithmetic, values by one interpolation
+        per series (a segment is a contiguous part of the series, so interpolating on the whole series is the same)
+        With the numba backend (see f_set_backend), the absolute errors of all connectors are computed in one compiled loop
+    """
+
+    seg_bounds_obs = np.asarray(seg_bounds_obs)
+    seg_bounds_sim = np.asarray(seg_bounds_sim)
+    num = np.asarray(num)
+    first = np.cumsum(num) - num  # position of the first connector of each pair
+
+    if error_model not in ERROR_MODELS:
+        raise ValueError('distance function not properly specified')
+
+    if f_use_numba():
+        abs_e_t, abs_e_q = _sd_abs_errors_kernel(np.asarray(y_obs, dtype=np.float64), seg_bounds_obs.astype(np.int64), np.asarray(y_sim, dtype=np.float64),
+                                                 seg_bounds_sim.astype(np.int64), num.astype(np.int64), error_model == 'relative')
+        return np.add.reduceat(abs_e_t, first), np.add.reduceat(abs_e_q, first)
+
+    # time (x) distances
+    e_t = f_sd_connector_positions(seg_bounds_obs[:, 2], seg_bounds_obs[:, 3], num) - \
+          f_sd_connector_positions(seg_bounds_sim[:, 2], seg_bounds_sim[:, 3], num)
+
+    # magnitude distances
+    con_y_obs = np.interp(f_sd_connector_positions(seg_bounds_obs[:, 0], seg_bounds_obs[:, 1], num), np.arange(len(y_obs)), y_obs)
+    con_y_sim = np.interp(f_sd_connector_positions(seg_bounds_sim[:, 0], seg_bounds_sim[:, 1], num), np.arange(len(y_sim)), y_sim)
+    e_q = f_sd_magnitude_errors(con_y_obs, con_y_sim, error_model)
+
+    # sum per pair
+    sum_e_t = np.add.reduceat(np.abs(e_t), first)
+    sum_e_q = np.add.reduceat(np.abs(e_q), first)
+
+    return sum_e_t, sum_e_q
+
+
+def _f_sd_flat(y_obs, bounds_obs, y_sim, bounds_sim, sum_dQ_obs, segs_cons, error_model):
+    """
+    f_sd with the numba backend: the connectors of all segments are computed at once and split into rise and fall afterwards
+    """
+
+    y_obs = np.asarray(y_obs, dtype=np.float64)
+    y_sim = np.asarray(y_sim, dtype=np.float64)
+    x_obs_global, con_y_obs, x_sim_global, con_y_sim = _sd_connectors_kernel(y_obs, bounds_obs.astype(np.int64), y_sim, bounds_sim.astype(np.int64), segs_cons.astype(np.int64))
+
+    # time (x) and magnitude distances of all connectors (magnitude: one array per error model)
+    e_t = x_obs_global - x_sim_global  # > 0 means obs is later than sim
+    models, keyed = f_error_models(error_model)
+    e_q = {model: f_sd_magnitude_errors(con_y_obs, con_y_sim, model) for model in models}
+
+    # connectors of rising segments
+    rise = np.repeat(sum_dQ_obs > 0, segs_cons)
+
+    # vertical 1D errors of the time steps shared by the obs and sim segment (one concatenation per limb)
+    e_MD = [np.arange(max(bounds_obs[z, 0], bounds_sim[z, 0]), min(bounds_obs[z, 1], bounds_sim[z, 1]) + 1) for z in range(len(segs_cons))]
+    e_MD = [(y_obs[xint] - y_sim[xint]) / ((y_obs[xint] + y_sim[xint]) * 0.5) for xint in e_MD]
+    e_rise_MD = np.concatenate([e for e, is_rise in zip(e_MD, sum_dQ_obs > 0) if is_rise] + [np.empty(0)])
+    e_fall_MD = np.concatenate([e for e, is_rise in zip(e_MD, sum_dQ_obs > 0) if not is_rise] + [np.empty(0)])
+
+    cons = {
+        'x_match_obs_global': x_obs_global,
+        'y_match_obs': con_y_obs,
+        'x_match_sim_global': x_sim_global,
+        'y_match_sim': con_y_sim
+    }
+
+    e_t_rise, e_ysim_rise = e_t[rise], con_y_sim[rise]
+    e_t_fall, e_ysim_fall = e_t[~rise], con_y_sim[~rise]
+    e_q_rise = {model: e_q[model][rise] for model in models}
+    e_q_fall = {model: e_q[model][~rise] for model in models}
+
+    e_q = {model: np.concatenate([e_q_rise[model], e_q_fall[model]]) for model in models}
+    e_t = np.concatenate([e_t_rise, e_t_fall])
+    e_ysim = np.concatenate([e_ysim_rise, e_ysim_fall])
+
+    if not keyed:  # a single error model: plain arrays
+        e_q, e_q_rise, e_q_fall = e_q[models[0]], e_q_rise[models[0]], e_q_fall[models[0]]
+
+    return e_q, e_t, e_ysim, e_q_rise, e_t_rise, e_ysim_rise, e_q_fall, e_t_fall, e_ysim_fall, cons, e_rise_MD, e_fall_MD
+
 
 def f_sd(y_obs, segs_obs, y_sim, segs_sim, error_model, printflag=False):
     """
@@ -21,16 +210,19 @@ def f_sd(y_obs, segs_obs, y_sim, segs_sim, error_model, printflag=False):
         cons          # SD connectors
         e_rise_MD     # 1D magnitude errors of corresponding rising limb sections
         e_fall_MD     # 1D magnitude errors of corresponding falling limbs sections
+        Note: all errors are float arrays and cons is a dict with one float array per key (preallocated, see METHOD)
 
     INPUT
         y_obs: (n,1) array with observed values
-        segs_obs: list of dictionaries with observed segments, where each dictionary represents a segment
+        segs_obs: SegmentTable (or list of dictionaries) with observed segments
         y_sim: (m,1) array with simulated values
-        segs_sim: list of dictionaries with simulated segments, where each dictionary represents a segment
+        segs_sim: SegmentTable (or list of dictionaries) with simulated segments
         error_model: string, sets the way the magnitude distance among obs and sim is computed
                      if 'relative': dist_v = (obs - sim) / ((obs + sim)*0.5)
                      if 'standard': dist_v = (obs - sim)
                      Default: 'standard'
+                     a set of error models (e.g. ['standard', 'relative']) returns e_q, e_q_rise and e_q_fall as dicts keyed by
+                     model, all computed from the same connectors (the other outputs do not depend on the error model)
         printflag: boolean, if true, the connector points of series distance will be stored in the global variables *_match_*
 
     METHOD
@@ -39,14 +231,12 @@ def f_sd(y_obs, segs_obs, y_sim, segs_sim, error_model, printflag=False):
         - The order of the segment types of obs and sim has to be equal: either both start with a 'rise' or a 'fall'
         the total number of connectors for the event equals mean(length(obs_event),length(sim_event))
         the number of connectors per segment is determined by the mean importance of the segment (mean of obs and sim relevance)
+        as the number of connectors per segment is known before the loop over the segments, all outputs are allocated once
+        with their final size and filled segment by segment
     """
 
-    cons = {
-        'x_match_obs_global': [],
-        'y_match_obs': [],
-        'x_match_sim_global': [],
-        'y_match_sim': []
-    }
+    segs_obs = f_segment_table(segs_obs)
+    segs_sim = f_segment_table(segs_sim)
 
     # specify connectors
 
@@ -60,7 +250,7 @@ def f_sd(y_obs, segs_obs, y_sim, segs_sim, error_model, printflag=False):
     # print('num_segs', num_segs)
     segs_cons = np.full(num_segs, np.nan)  # variable for the number of connectors assigned to each segment
     # print('segs_cons 1', segs_cons)
-    sum_rels = sum([seg['relevance'] for seg in segs_obs]) + sum([seg['relevance'] for seg in segs_sim])  # the overall sum of relevance (as relevance is already normalized, should be 1 + 1 = 2)
+    sum_rels = np.sum(segs_obs['relevance']) + np.sum(segs_sim['relevance'])  # the overall sum of relevance (as relevance is already normalized, should be 1 + 1 = 2)
     # print('sum_rels', sum_rels)
 
     # the share of connectors for each segment is proportional to its relative relevance
@@ -73,20 +263,51 @@ def f_sd(y_obs, segs_obs, y_sim, segs_sim, error_model, printflag=False):
 
     # original code der Übersetzung
     # segs_cons = np.round(([seg['relevance'] for seg in segs_obs] + [seg['relevance'] for seg in segs_sim]) * int(np.round(totnumcons)) / sum_rels)
-    segs_cons = ([seg['relevance'] for seg in segs_obs] + [seg['relevance'] for seg in segs_sim]) * int(np.round(totnumcons)) / sum_rels
+    # NOTE: adding the two python lists concatenated them instead of adding the relevances element-wise, which left a single connector per segment
+    segs_cons = f_sd_connector_counts(segs_obs['relevance'], segs_sim['relevance'], totnumcons, sum_rels)
     # print('segs_cons 2', segs_cons)
     # print('\n')
 
-    # initialize output variables   
+    # segment boundaries: starttime_local, endtime_local, starttime_global, endtime_global
+    bounds_obs = segs_obs.bounds
+    bounds_sim = segs_sim.bounds
+    sum_dQ_obs = segs_obs['sum_dQ']
+
+    models, keyed = f_error_models(error_model)  # error models of the magnitude errors
+
+    if f_use_numba():
+        # all connectors of all segments in one compiled loop (same values as the loop below)
+        return _f_sd_flat(y_obs, bounds_obs, y_sim, bounds_sim, sum_dQ_obs, segs_cons, error_model)
+
+    # initialize output variables: the sizes are known from the number of connectors of each segment,
+    # so all outputs are preallocated arrays which are filled segment by segment
+    rise = sum_dQ_obs > 0  # rising segments (of obs)
+    num_rise = int(np.sum(segs_cons[rise]))  # number of connectors in rising limbs
+    num_fall = int(np.sum(segs_cons[~rise]))  # number of connectors in falling limbs
+    num_MD = np.maximum(np.minimum(bounds_obs[:, 1], bounds_sim[:, 1]) - np.maximum(bounds_obs[:, 0], bounds_sim[:, 0]) + 1, 0)  # time steps shared by the obs and sim segment
+    
+    e_q_rise = {model: np.empty(num_rise) for model in models}  # magnitude errors in rising limbs
+    e_t_rise = np.empty(num_rise)      # time errors in rising limbs
+    e_q_fall = {model: np.empty(num_fall) for model in models}  # magnitude errors in falling limbs
+    e_t_fall = np.empty(num_fall)      # time errors in falling limbs
+    e_ysim_rise = np.empty(num_rise)   # simulated discharge for rising limbs, corresponding to each error (needed to subdivide errors in discharge classes)
+    e_ysim_fall = np.empty(num_fall)   # simulated discharge for falling limbs, corresponding to each error (needed to subdivide errors in discharge classes)
+    e_rise_MD = np.empty(int(np.sum(num_MD[rise])))   # 1D magnitude errors in corresponding rising limb sections 
+    e_fall_MD = np.empty(int(np.sum(num_MD[~rise])))  # 1D magnitude errors in corresponding falling limb sections 
 
-    e_q_rise = []      # magnitude errors in rising limbs
-    e_t_rise = []      # time errors in rising limbs
-    e_q_fall = []      # magnitude errors in falling limbs
-    e_t_fall = []      # time errors in falling limbs
-    e_ysim_rise = []   # simulated discharge for rising limbs, corresponding to each error (needed to subdivide errors in discharge classes)
-    e_ysim_fall = []   # simulated discharge for falling limbs, corresponding to each error (needed to subdivide errors in discharge classes)
-    e_rise_MD = []     # 1D magnitude errors in corresponding rising limb sections 
-    e_fall_MD = []     # 1D magnitude errors in corresponding falling limb sections 
+    cons = {
+        'x_match_obs_global': np.empty(num_rise + num_fall),
+        'y_match_obs': np.empty(num_rise + num_fall),
+        'x_match_sim_global': np.empty(num_rise + num_fall),
+        'y_match_sim': np.empty(num_rise + num_fall)
+    }
+
+    # next free position in the outputs
+    i_con = 0
+    i_rise = 0
+    i_fall = 0
+    i_rise_MD = 0
+    i_fall_MD = 0
 
     # loop over all segments
     for z in range(num_segs):
@@ -95,11 +316,7 @@ def f_sd(y_obs, segs_obs, y_sim, segs_sim, error_model, printflag=False):
         
         # Original code der Übersetzung
         # num = int(segs_cons[z])
-
-        if segs_cons[z] < 1:
-            num = 1
-        else:
-            num = int(segs_cons[z])
+        num = segs_cons[z]
 
         # print('con_x_obs_global_seg berechnung')
         # print('num', num)
@@ -113,22 +330,22 @@ def f_sd(y_obs, segs_obs, y_sim, segs_sim, error_model, printflag=False):
         # print('segs_obs[0][endtime_global]', segs_obs[0]['endtime_global'])
         # print('\n')
 
-        con_x_obs_global_seg = np.linspace(segs_obs[z]['starttime_global'], segs_obs[z]['endtime_global'], num)
-        con_x_sim_global_seg = np.linspace(segs_sim[z]['starttime_global'], segs_sim[z]['endtime_global'], num)  
+        con_x_obs_global_seg = np.linspace(bounds_obs[z, 2], bounds_obs[z, 3], num)
+        con_x_sim_global_seg = np.linspace(bounds_sim[z, 2], bounds_sim[z, 3], num)  
 
         # print('con_x_obs_global_seg', con_x_obs_global_seg)
         # print('\n')
 
         # determine the LOCAL x-location (time) of the connectors in the current segment     
-        con_x_obs_local_seg = np.linspace(segs_obs[z]['starttime_local'], segs_obs[z]['endtime_local'], num)
-        con_x_sim_local_seg = np.linspace(segs_sim[z]['starttime_local'], segs_sim[z]['endtime_local'], num)      
+        con_x_obs_local_seg = np.linspace(bounds_obs[z, 0], bounds_obs[z, 1], num)
+        con_x_sim_local_seg = np.linspace(bounds_sim[z, 0], bounds_sim[z, 1], num)      
 
         # determine the local x-locations of the segment
-        x_obs_local_seg = np.arange(segs_obs[z]['starttime_local'], segs_obs[z]['endtime_local'] + 1)
-        x_sim_local_seg = np.arange(segs_sim[z]['starttime_local'], segs_sim[z]['endtime_local'] + 1)    
+        x_obs_local_seg = np.arange(bounds_obs[z, 0], bounds_obs[z, 1] + 1)
+        x_sim_local_seg = np.arange(bounds_sim[z, 0], bounds_sim[z, 1] + 1)    
 
-        xobs = np.arange(segs_obs[z]['starttime_local'], segs_obs[z]['endtime_local'] + 1)
-        xsim = np.arange(segs_sim[z]['starttime_local'], segs_sim[z]['endtime_local'] + 1)
+        xobs = np.arange(bounds_obs[z, 0], bounds_obs[z, 1] + 1)
+        xsim = np.arange(bounds_sim[z, 0], bounds_sim[z, 1] + 1)
         xint = np.intersect1d(xobs, xsim)
 
         # show vertically compared segments 
@@ -149,46 +366,40 @@ def f_sd(y_obs, segs_obs, y_sim, segs_sim, error_model, printflag=False):
         con_y_sim_seg = np.interp(con_x_sim_local_seg, x_sim_local_seg, y_sim_seg)     
 
         # find out whether the current segment is 'rise' or 'fall'
-        if segs_obs[z]['sum_dQ'] > 0:   # rise
+        if sum_dQ_obs[z] > 0:   # rise
             # calculate the length of the connectors (distance between connector points on obs and sim) in the current segment    
             # time (x) distances 
             e_t_rise_seg = (con_x_obs_global_seg - con_x_sim_global_seg)  # > 0 means obs is later than sim
 
-            # magnitude distances
-            if error_model == 'standard':  # compute the simple difference 
-                e_q_rise_seg = (con_y_obs_seg - con_y_sim_seg)  # > 0 means obs is larger than sim
-            elif error_model == 'relative':  # compute a scaled difference
-                e_q_rise_seg = (con_y_obs_seg - con_y_sim_seg) / ((con_y_obs_seg + con_y_sim_seg) * 0.5)  # > 0 means obs is larger than sim
-            else:
-                raise ValueError('distance function not properly specified')
+            # magnitude distances (each error model from the same connectors)
+            for model in models:
+                e_q_rise[model][i_rise:i_rise + num] = f_sd_magnitude_errors(con_y_obs_seg, con_y_sim_seg, model)
 
             # add the errors of the segment to the overall errors of the event
-            e_q_rise.extend(e_q_rise_seg)
-            e_t_rise.extend(e_t_rise_seg)  
-            e_ysim_rise.extend(con_y_sim_seg)
+            e_t_rise[i_rise:i_rise + num] = e_t_rise_seg
+            e_ysim_rise[i_rise:i_rise + num] = con_y_sim_seg
+            i_rise += num
 
             # add vertical 1D error to output array
-            e_rise_MD.extend((y_obs[xint] - y_sim[xint]) / ((y_obs[xint] + y_sim[xint]) * 0.5))
+            e_rise_MD[i_rise_MD:i_rise_MD + len(xint)] = (y_obs[xint] - y_sim[xint]) / ((y_obs[xint] + y_sim[xint]) * 0.5)
+            i_rise_MD += len(xint)
         else:  # fall
             # calculate the length of the connectors (distance between connector points on obs and sim) in the current segment    
             # time (x) distances
             e_t_fall_seg = (con_x_obs_global_seg - con_x_sim_global_seg)  # > 0 means obs is later than sim
 
-            # magnitude distances
-            if error_model == 'standard':  # compute the simple difference
-                e_q_fall_seg = (con_y_obs_seg - con_y_sim_seg)  # > 0 means obs is larger than sim
-            elif error_model == 'relative':  # compute a scaled difference
-                e_q_fall_seg = (con_y_obs_seg - con_y_sim_seg) / ((con_y_obs_seg + con_y_sim_seg) * 0.5)  # > 0 means obs is larger than sim
-            else:
-                raise ValueError('distance function not properly specified')
+            # magnitude distances (each error model from the same connectors)
+            for model in models:
+                e_q_fall[model][i_fall:i_fall + num] = f_sd_magnitude_errors(con_y_obs_seg, con_y_sim_seg, model)
 
             # add the errors of the segment to the overall errors of the event
-            e_q_fall.extend(e_q_fall_seg)
-            e_t_fall.extend(e_t_fall_seg) 
-            e_ysim_fall.extend(con_y_sim_seg)
+            e_t_fall[i_fall:i_fall + num] = e_t_fall_seg
+            e_ysim_fall[i_fall:i_fall + num] = con_y_sim_seg
+            i_fall += num
 
             # add vertical 1D error to output array
-            e_fall_MD.extend((y_obs[xint] - y_sim[xint]) / ((y_obs[xint] + y_sim[xint]) * 0.5))
+            e_fall_MD[i_fall_MD:i_fall_MD + len(xint)] = (y_obs[xint] - y_sim[xint]) / ((y_obs[xint] + y_sim[xint]) * 0.5)
+            i_fall_MD += len(xint)
 
         # add matching points(x,y) of the segment to overall matching points(for plotting)
         # print('cons')
@@ -198,14 +409,18 @@ def f_sd(y_obs, segs_obs, y_sim, segs_sim, error_model, printflag=False):
         # print('con_y_sim_seg', con_y_sim_seg)
         # print('\n')
 
-        cons['x_match_obs_global'].extend(con_x_obs_global_seg)
-        cons['y_match_obs'].extend(con_y_obs_seg)
-        cons['x_match_sim_global'].extend(con_x_sim_global_seg)
-        cons['y_match_sim'].extend(con_y_sim_seg)
+        cons['x_match_obs_global'][i_con:i_con + num] = con_x_obs_global_seg
+        cons['y_match_obs'][i_con:i_con + num] = con_y_obs_seg
+        cons['x_match_sim_global'][i_con:i_con + num] = con_x_sim_global_seg
+        cons['y_match_sim'][i_con:i_con + num] = con_y_sim_seg
+        i_con += num
 
     # combine all case-specific error distributions to one for magnitude and one for time
-    e_q = np.concatenate([e_q_rise, e_q_fall])
+    e_q = {model: np.concatenate([e_q_rise[model], e_q_fall[model]]) for model in models}
     e_t = np.concatenate([e_t_rise, e_t_fall])
     e_ysim = np.concatenate([e_ysim_rise, e_ysim_fall])
 
+    if not keyed:  # a single error model: plain arrays
+        e_q, e_q_rise, e_q_fall = e_q[models[0]], e_q_rise[models[0]], e_q_fall[models[0]]
+
     return e_q, e_t, e_ysim, e_q_rise, e_t_rise, e_ysim_rise, e_q_fall, e_t_fall, e_ysim_fall, cons, e_rise_MD, e_fall_MD
\ No newline at end of file
@@ -12,8 +12,8 @@ def f_SD_1dNoEventError(obs, sim, obs_events, sim_events, obs_sim_events_mapped,
     for i in range(obs_sim_events_mapped.shape[0]):
         start_obs = obs_sim_events_mapped[i, 0]
         start_sim = obs_sim_events_mapped[i, 1]
-        end_obs = obs_events[np.where(obs_events[:, 0] == start_obs), 1][0]
-        end_sim = sim_events[np.where(sim_events[:, 0] == start_sim), 1][0]
+        end_obs = obs_events[np.where(obs_events[:, 0] == start_obs)[0][0], 1]
+        end_sim = sim_events[np.where(sim_events[:, 0] == start_sim)[0][0], 1]
 
         bad_start = min(start_obs, start_sim)  # find the earlier start of the related obs and sim event
         bad_end = max(end_obs, end_sim)        # find the later end of the related obs and sim event
@@ -0,0 +1,24 @@
+import numpy as np
+
+def f_segment_bounds(y):
+    """
+    Start and end points of all segments of a series, found from the sign changes of the first differences
+
+    INPUT
+        y: (n,1) array with values
+    OUTPUT
+        starts: (k,) array with the (local) start point of each segment
+        ends: (k,) array with the (local) end point of each segment
+        Note: A segment always includes its first and last point (start, valley, peak or end) --> peaks and valleys are used twice!
+    METHOD
+        peaks (rise-drop) and valleys (drop-rise) are the points where the sign of np.diff(y) changes strictly from + to - or
+        from - to +, i.e. the points with hydcase 2 or -2 in f_calc_hyd_case. Each of them ends one segment and starts the next.
+    """
+
+    dQ = np.diff(y)
+    extremes = np.where(((dQ[:-1] > 0) & (dQ[1:] < 0)) | ((dQ[:-1] < 0) & (dQ[1:] > 0)))[0] + 1  # peaks and valleys
+
+    starts = np.concatenate(([0], extremes))
+    ends = np.concatenate((extremes, [len(y) - 1]))
+
+    return starts, ends
@@ -0,0 +1,109 @@
+import numpy as np
+
+# columns of a segment table: integer time positions and float segment properties
+BOUND_KEYS = ['starttime_local', 'endtime_local', 'starttime_global', 'endtime_global']
+PROPERTY_KEYS = ['rel_length', 'sum_dQ', 'rel_dQ', 'relevance']
+
+
+class SegmentTable:
+    """
+    Segments of a series as a struct of arrays, one row per segment
+
+    bounds: (k,4) int32 array with starttime_local, endtime_local, starttime_global, endtime_global
+    props: (k,4) float64 array with rel_length, sum_dQ, rel_dQ, relevance
+    eventID: optional (k,) int32 array with the event of each segment (event mode, only needed for plotting)
+
+    Access
+        segs['relevance']: column as array (a view, 'length' is computed as endtime_local - starttime_local)
+        segs[z]: segment z as a dictionary (same keys as the list of dictionaries of f_define_segments used to return)
+        segs[a:b]: segments a ... b-1 as a table (a view)
+        len(segs): number of segments
+    """
+
+    def __init__(self, bounds, props, eventID=None):
+        self.bounds = np.asarray(bounds, dtype=np.int32).reshape(-1, 4)
+        self.props = np.asarray(props, dtype=np.float64).reshape(-1, 4)
+        self.eventID = None if eventID is None else np.asarray(eventID, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):  # column
+            if key in BOUND_KEYS:
+                return self.bounds[:, BOUND_KEYS.index(key)]
+            if key in PROPERTY_KEYS:
+                return self.props[:, PROPERTY_KEYS.index(key)]
+            if key == 'length':
+                return self.bounds[:, 1] - self.bounds[:, 0]
+            if key == 'eventID' and self.eventID is not None:
+                return self.eventID
+            raise KeyError(key)
+
+        if isinstance(key, (int, np.integer)):  # single segment as dictionary
+            seg = {name: int(value) for name, value in zip(BOUND_KEYS, self.bounds[key])}
+            seg['length'] = seg['endtime_local'] - seg['starttime_local']
+            seg.update({name: float(value) for name, value in zip(PROPERTY_KEYS, self.props[key])})
+            if self.eventID is not None:
+                seg['eventID'] = int(self.eventID[key])
+            return seg
+
+        # slice or index array: sub-table
+        return SegmentTable(self.bounds[key], self.props[key], None if self.eventID is None else self.eventID[key])
+
+    def __iter__(self):
+        for z in range(len(self)):
+            yield self[z]
+
+    def copy(self):
+        return SegmentTable(self.bounds.copy(), self.props.copy(), None if self.eventID is None else self.eventID.copy())
+
+    def merge(self, first, last, rel_length, sum_dQ, rel_dQ, relevance):
+        """
+        Joins the segments first ... last to a single segment with the given properties (returns a new table)
+        """
+
+        bounds = np.array([[self.bounds[first, 0], self.bounds[last, 1], self.bounds[first, 2], self.bounds[last, 3]]])
+        props = np.array([[rel_length, sum_dQ, rel_dQ, relevance]])
+        eventID = None
+        if self.eventID is not None:
+            eventID = np.concatenate((self.eventID[:first + 1], self.eventID[last + 1:]))
+
+        return SegmentTable(np.concatenate((self.bounds[:first], bounds, self.bounds[last + 1:])),
+                            np.concatenate((self.props[:first], props, self.props[last + 1:])), eventID)
+
+    def to_dicts(self):
+        """
+        Converts the table to a list of dictionaries (e.g. for savemat)
+        """
+
+        return [self[z] for z in range(len(self))]
+
+    @staticmethod
+    def concatenate(tables, eventIDs=None):
+        """
+        Appends several tables, optionally with the event ID of each table
+        """
+
+        eventID = None
+        if eventIDs is not None:
+            eventID = np.concatenate([np.full(len(table), ID) for table, ID in zip(tables, eventIDs)]) if tables else np.empty(0)
+
+        return SegmentTable(np.concatenate([table.bounds for table in tables]) if tables else np.empty((0, 4)),
+                            np.concatenate([table.props for table in tables]) if tables else np.empty((0, 4)), eventID)
+
+
+def f_segment_table(segs):
+    """
+    Returns the segments as a SegmentTable (converts a list of dictionaries, a table is returned as it is)
+    """
+
+    if isinstance(segs, SegmentTable):
+        return segs
+
+    segs = list(segs)
+    bounds = [[seg[key] for key in BOUND_KEYS] for seg in segs]
+    props = [[seg[key] for key in PROPERTY_KEYS] for seg in segs]
+    eventID = [seg['eventID'] for seg in segs] if segs and all('eventID' in seg for seg in segs) else None
+
+    return SegmentTable(bounds, props, eventID)
\ No newline at end of file
@@ -0,0 +1,124 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from f_smooth_DP import f_smooth_DP
+from f_DPIndex import f_dp_index
+from f_ReplaceEqualNeighbours import f_ReplaceEqualNeighbours
+from f_RunEvents import f_event_indices, f_run_event, f_collect_events
+from f_SD_1dNoEventError import f_SD_1dNoEventError
+from f_SD import f_error_models
+from f_Backend import f_set_backend
+
+# smoothed obs of all levels and sim of the worker processes (set once per worker by _init_worker)
+_obs_levels = None
+_sim = None
+
+
+def _init_worker(obs_levels, sim, backend=None):
+    global _obs_levels, _sim
+    _obs_levels = obs_levels
+    _sim = sim
+    if backend is not None:
+        f_set_backend(backend)
+
+
+def _sweep_event(args):
+    """
+    Coarse-graining and SD of a single event of one smoothing level, executed in a worker process (see f_run_event)
+    """
+
+    level, event_args = args[0], args[1:]
+
+    return f_run_event(_obs_levels[level], _sim, *event_args)
+
+
+def f_smoothing_sweep(obs, sim, obs_events, sim_events, obs_sim_pairing, nse_smooth_limits, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, num_workers=None, backend=None):
+    """
+    Event mode SD analysis for several smoothing levels of 'obs' (sensitivity study of nse_smooth_limit)
+
+    INPUT
+        obs: (n,1) array with observed discharge (not smoothed)
+        sim: (n,1) array with simulated discharge
+        obs_events, sim_events, obs_sim_pairing: see f_run_events
+        nse_smooth_limits: list with the smoothing levels (NSE between smoothed and original obs, see f_smooth_DP with smooth_criterion='nse')
+        weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model, num_workers, backend: see f_run_events
+    OUTPUT
+        summary: DataFrame with one row per smoothing level and error component ('t_rise', 'q_rise', 't_fall', 'q_fall', 'lowFlow'; with a
+                 set of error models 'q_rise_<model>', 'q_fall_<model>', 'lowFlow_<model>' per model) and the columns nse_smooth_limit,
+                 num_points (points of the simplified obs), component, count, mean, mean_abs, std, median
+        results: dict with the smoothed obs, the full f_run_events output and the low-flow errors of each smoothing level (key: nse_smooth_limit)
+    METHOD
+        Only 'obs' depends on the smoothing level. The Douglas-Peucker insertion order of obs is determined once (f_dp_index) and each
+        level is a prefix of it, sim is prepared once. The events of all levels are processed in one pool of worker processes, which
+        receive the smoothed obs of all levels and sim once; the results of each level are identical to f_run_events.
+    """
+
+    models, keyed = f_error_models(error_model)
+
+    # stages that do not depend on the smoothing level
+    xy = np.column_stack((np.arange(1, len(obs) + 1), obs))
+    dp_index = f_dp_index(xy)
+    sim_prepared = f_ReplaceEqualNeighbours(sim.copy())
+    event_indices = f_event_indices(obs_events, sim_events, obs_sim_pairing)
+
+    # smoothed obs of all levels (sim is not smoothed by f_smooth_DP)
+    obs_levels = []
+    num_points = []
+    for nse_smooth_limit in nse_smooth_limits:
+        obs_smoothed, _, numpoints = f_smooth_DP(obs, sim, nse_smooth_limit, 'nse', dp_index, return_numpoints=True)
+        obs_levels.append(f_ReplaceEqualNeighbours(obs_smoothed))
+        num_points.append(numpoints)
+
+    # all events of all levels
+    tasks = [(level, ii, obs_eventindex, sim_eventindex, weight_nfc, weight_rds, weight_sdt, weight_sdv, error_model)
+             for level in range(len(obs_levels)) for ii, (obs_eventindex, sim_eventindex) in enumerate(event_indices)]
+
+    if num_workers is None:
+        num_workers = os.cpu_count()
+
+    if num_workers <= 1 or len(tasks) <= 1:
+        _init_worker(obs_levels, sim_prepared, backend)
+        event_results = [_sweep_event(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker, initargs=(obs_levels, sim_prepared, backend)) as executor:
+            event_results = list(executor.map(_sweep_event, tasks, chunksize=max(1, len(tasks) // (4 * num_workers))))
+
+    rows = []
+    results = {}
+    num_events = len(event_indices)
+    for level, nse_smooth_limit in enumerate(nse_smooth_limits):
+        obs_smoothed = obs_levels[level]
+        run_results = f_collect_events(event_results[level * num_events:(level + 1) * num_events], error_model)
+        _, _, _, e_sd_t_rise, e_sd_q_rise, e_sd_t_fall, e_sd_q_fall, _, _, _ = run_results
+
+        # low-flow errors (keyed by error model, if a set of error models is given)
+        e_sd_lowFlow = {}
+        for model in models:
+            e_sd_lowFlow[model], _ = f_SD_1dNoEventError(obs_smoothed, sim_prepared, obs_events, sim_events, obs_sim_pairing, model)
+        if not keyed:
+            e_sd_lowFlow = e_sd_lowFlow[models[0]]
+
+        results[nse_smooth_limit] = {'obs': obs_smoothed, 'run_results': run_results, 'e_sd_lowFlow': e_sd_lowFlow}
+
+        # SD error summaries of this level
+        errors = {'t_rise': e_sd_t_rise, 'q_rise': e_sd_q_rise, 't_fall': e_sd_t_fall, 'q_fall': e_sd_q_fall, 'lowFlow': e_sd_lowFlow}
+        if keyed:  # one row per error model for the magnitude and low-flow errors
+            errors = {(f'{component}_{model}' if isinstance(e, dict) else component): (e[model] if isinstance(e, dict) else e)
+                      for component, e in errors.items() for model in (models if isinstance(e, dict) else models[:1])}
+        for component, e in errors.items():
+            e = np.asarray(e, dtype=float).flatten()
+            rows.append({
+                'nse_smooth_limit': nse_smooth_limit,
+                'num_points': num_points[level],
+                'component': component,
+                'count': len(e),
+                'mean': np.mean(e) if len(e) else np.nan,
+                'mean_abs': np.mean(np.abs(e)) if len(e) else np.nan,
+                'std': np.std(e) if len(e) else np.nan,
+                'median': np.median(e) if len(e) else np.nan
+            })
+
+    summary = pd.DataFrame(rows)
+
+    return summary, results
\ No newline at end of file
@@ -24,13 +24,19 @@ def f_trim_series(obs, obs_eventindex, sim, sim_eventindex):
     hydcase_obs = f_calc_hyd_case(obs)  # -2=valley -1=drop 0=no feature 1=rise 2=peak
     hydcase_sim = f_calc_hyd_case(sim)
 
+    # all rise and fall positions (searched only once for the start and end points)
+    obs_rise = np.where(hydcase_obs == 1)[0]
+    sim_rise = np.where(hydcase_sim == 1)[0]
+    obs_fall = np.where(hydcase_obs == -1)[0]
+    sim_fall = np.where(hydcase_sim == -1)[0]
+
     # find the best starting points
-    pos_obs_rise = np.where(hydcase_obs == 1)[0][0]
-    pos_sim_rise = np.where(hydcase_sim == 1)[0][0]
+    pos_obs_rise = obs_rise[0]
+    pos_sim_rise = sim_rise[0]
     sum_pos_rise = pos_obs_rise + pos_sim_rise
 
-    pos_obs_fall = np.where(hydcase_obs == -1)[0][0]
-    pos_sim_fall = np.where(hydcase_sim == -1)[0][0]
+    pos_obs_fall = obs_fall[0]
+    pos_sim_fall = sim_fall[0]
     sum_pos_fall = pos_obs_fall + pos_sim_fall
 
     # choose the starting point pair where the least trimming is required
@@ -42,12 +48,12 @@ def f_trim_series(obs, obs_eventindex, sim, sim_eventindex):
         start_sim = pos_sim_fall
 
     # find the best end points
-    pos_obs_rise = np.where(hydcase_obs == 1)[0][-1]
-    pos_sim_rise = np.where(hydcase_sim == 1)[0][-1]
+    pos_obs_rise = obs_rise[-1]
+    pos_sim_rise = sim_rise[-1]
     sum_pos_rise = pos_obs_rise + pos_sim_rise
 
-    pos_obs_fall = np.where(hydcase_obs == -1)[0][-1]
-    pos_sim_fall = np.where(hydcase_sim == -1)[0][-1]
+    pos_obs_fall = obs_fall[-1]
+    pos_sim_fall = sim_fall[-1]
     sum_pos_fall = pos_obs_fall + pos_sim_fall
 
     # choose the end point pair where the least trimming is required
@@ -69,8 +75,4 @@ def f_trim_series(obs, obs_eventindex, sim, sim_eventindex):
     sim = sim[start_sim:end_sim + 1]  # sim trimmed
     x_sim = np.arange(offset_sim, offset_sim + len(sim))  # the global time position of sim
 
-    # update flow condition index/ hydrological cases
-    hydcase_obs = f_calc_hyd_case(obs)
-    hydcase_sim = f_calc_hyd_case(sim)
-
     return obs, x_obs, sim, x_sim
\ No newline at end of file
@@ -0,0 +1,45 @@
+def f_weight_sweep(root, num_steps, weight_vectors, candidates, choose, step):
+    """
+    Greedy coarse-graining for several weight vectors of the objective function at once
+
+    INPUT
+        root: state before the first coarse-graining step
+        num_steps: number of coarse-graining steps
+        weight_vectors: list with the weight vectors (weight_nfc, weight_rds, weight_sdt, weight_sdv)
+        candidates: function(state) --> criteria of all candidate merges of the state (e.g. f_candidate_criteria)
+        choose: function(criteria, weight_vector) --> the merge chosen for this weight vector (hashable, e.g. (pos_obs, pos_sim))
+        step: function(state, choice, z) --> (state after the merge in step z, record of the step)
+    OUTPUT
+        paths: list with one list of step records (num_steps entries) per weight vector
+    METHOD
+        All weight vectors start on the same path. In each step, the criteria of the candidate merges are computed once per
+        state and the weight vectors are grouped by the merge they choose. The path only branches where the chosen merges differ,
+        so weight vectors that agree on the first steps share their computation, and the result of each weight vector is
+        identical to a separate run with that weight vector.
+        Records of shared steps are shared between the paths (not copied).
+    """
+
+    paths = [None] * len(weight_vectors)
+
+    # depth-first search: (state, records of the steps so far, weight vectors on this path)
+    stack = [(root, [], list(range(len(weight_vectors))))]
+    while stack:
+        state, records, members = stack.pop()
+
+        if len(records) == num_steps:
+            for member in members:
+                paths[member] = records
+            continue
+
+        criteria = candidates(state)
+
+        # group the weight vectors by their chosen merge (in order of the first weight vector choosing it)
+        groups = {}
+        for member in members:
+            groups.setdefault(choose(criteria, weight_vectors[member]), []).append(member)
+
+        for choice, group in groups.items():
+            next_state, record = step(state, choice, len(records))
+            stack.append((next_state, records + [record], group))
+
+    return paths
\ No newline at end of file
@@ -1,4 +1,5 @@
 import numpy as np
+from f_Backend import f_use_numba, _hyd_case_kernel
 
 def f_calc_hyd_case(vals):
     """
@@ -12,8 +13,13 @@ def f_calc_hyd_case(vals):
     METHOD
         for each point, calculates the gradient to the previous and the next value
         drop-rise: valley   drop-drop: drop   rise-rise: rise   rise-drop : peak  
+        with the numba backend (see f_set_backend), a compiled loop over all timesteps is used
     """
 
+    vals = np.asarray(vals)
+    if f_use_numba():
+        return _hyd_case_kernel(vals.astype(np.float64))
+
     len_vals = len(vals)
     hydcase = np.full(len_vals, np.nan)  # initialize result array
 
@@ -28,15 +34,13 @@ def f_calc_hyd_case(vals):
     else:
         hydcase[-1] = 1
 
-    # Find hydrological case for each timestep
-    for z in range(1, len_vals - 1):  # loop over all values except the first and last
-        if (vals[z] - vals[z - 1]) < 0 and (vals[z + 1] - vals[z]) > 0:
-            hydcase[z] = -2  # drop-rise: valley
-        elif (vals[z] - vals[z - 1]) < 0 and (vals[z + 1] - vals[z]) < 0:
-            hydcase[z] = -1  # drop-drop: drop
-        elif (vals[z] - vals[z - 1]) > 0 and (vals[z + 1] - vals[z]) > 0:
-            hydcase[z] = 1   # rise-rise: rise
-        elif (vals[z] - vals[z - 1]) > 0 and (vals[z + 1] - vals[z]) < 0:
-            hydcase[z] = 2   # rise-drop: peak
+    # Find hydrological case for each timestep (all values except the first and last at once)
+    dQ_prev = vals[1:-1] - vals[:-2]  # gradient to the previous value
+    dQ_next = vals[2:] - vals[1:-1]   # gradient to the next value
+    hydcase_inner = hydcase[1:-1]     # view on hydcase
+    hydcase_inner[(dQ_prev < 0) & (dQ_next > 0)] = -2  # drop-rise: valley
+    hydcase_inner[(dQ_prev < 0) & (dQ_next < 0)] = -1  # drop-drop: drop
+    hydcase_inner[(dQ_prev > 0) & (dQ_next > 0)] = 1   # rise-rise: rise
+    hydcase_inner[(dQ_prev > 0) & (dQ_next < 0)] = 2   # rise-drop: peak
 
     return hydcase
\ No newline at end of file
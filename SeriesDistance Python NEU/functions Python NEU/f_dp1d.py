@@ -1,7 +1,7 @@
+import heapq
 import numpy as np
-from scipy.interpolate import interp1d
 
-def f_dp1d(xy, tol=None, numpoints=None, nselimit=None):
+def f_dp1d(xy, tol=None, numpoints=None, nselimit=None, return_index=False):
     """
     Linienvereinfachung mit einem modifizierten Douglas-Peucker-Algorithmus
     Uwe Ehret, 15. Nov. 2013
@@ -12,15 +12,26 @@ def f_dp1d(xy, tol=None, numpoints=None, nselimit=None):
         numpoints:    optional: gibt an, mit wie vielen Punkten die Linie approximiert werden soll. Wenn numpoints gesetzt ist, wird tol nicht verwendet
         nselimit:     optional: gibt an, welcher Nash-Sutcliffe-Effizienz zwischen der Original- und der vereinfachten Linie erreicht werden soll.
                       Wenn nselimit gesetzt ist, werden tol und numpoints nicht verwendet
+        return_index: optional: wenn True, wird zusätzlich die Einfügereihenfolge der Punkte zurückgegeben (siehe dp_index)
 
     AUSGABE
         xy_dp:       (m,2) Vektor mit m x- und y-Daten der vereinfachten Linie (x in aufsteigender Reihenfolge) m <= n
                       xy_dp[:,0] --> x-Werte der vereinfachten Serie
                       xy_dp[:,1] --> y-Werte der vereinfachten Serie
+        dp_index:     nur mit return_index: Dictionary mit
+                      'order': (m,) Indizes der Punkte von xy in Einfügereihenfolge (Rang), beginnend mit dem ersten und letzten Punkt
+                      'maxdev': (m,) maximaler Abstand beim Einfügen des Punkts jedes Rangs (inf für den ersten und letzten Punkt)
+                      'nse': (m,) NSE der vereinfachten Linie aus den Punkten der Ränge 0 ... r (nan für den ersten Punkt)
+                      Jede gröbere Vereinfachung ist ein Anfang von 'order' (siehe f_dp_level)
     METHODE
         Diese Funktion approximiert eine Linie durch weniger ihrer Punkte
         Die vereinfachte Linie beginnt mit dem ersten und dem letzten Punkt von xy, dann werden die Punkte mit dem maximalen Abstand sukzessive hinzugefügt, bis
         das ausgewählte Abbruchkriterium erfüllt ist (tol, numpoints oder nselimit)
+        Der maximale Abstand jedes Intervalls zwischen zwei benachbarten Punkten der vereinfachten Linie wird in einem Heap gehalten.
+        Nach dem Einfügen eines Punkts werden nur die beiden neuen Teilintervalle untersucht (statt die ganze Linie neu zu interpolieren).
+        Bei gleichen Abständen wird, wie mit np.argmax über die ganze Linie, der Punkt mit dem kleineren x-Wert gewählt.
+        Für nselimit wird zusätzlich die Summe der quadrierten Abweichungen jedes Intervalls gespeichert, so dass die NSE nach dem Einfügen
+        eines Punkts nur im geteilten Intervall neu berechnet werden muss: NSE = 1 - sum(SSE der Intervalle) / sum((y - mean(y))^2)
     """
 
     # Überprüfen der Eingabe
@@ -31,60 +42,78 @@ def f_dp1d(xy, tol=None, numpoints=None, nselimit=None):
     else:
         calccase = 1
 
+    x = xy[:, 0]
+    y = xy[:, 1]
+
     # Initialisieren der vereinfachten Linie mit dem ersten und letzten Wert
-    xy_dp = np.array([xy[0], xy[-1]])
+    nodes = [0, len(xy) - 1]  # Indizes der Punkte der vereinfachten Linie (in Einfügereihenfolge)
+    maxdev = [np.inf, np.inf]  # maximaler Abstand beim Einfügen jedes Punkts
+
+    # Heap mit dem maximalen Abstand jedes offenen Intervalls: (-Abstand, Index des Punkts, Intervallanfang, Intervallende)
+    heap = []
+    sse = {0: _push_interval(heap, x, y, 0, len(xy) - 1)}  # Summe der quadrierten Abweichungen jedes Intervalls (Schlüssel: Intervallanfang)
+    sse_all = sse[0]
+    sst = np.sum((y - np.mean(y)) ** 2)
+    nse = [np.nan, 1 - sse_all / sst]  # NSE nach dem Einfügen jedes Punkts
 
     alldone = False
     while not alldone:
-        # Abtasten der vereinfachten Linie an allen x-Positionen der Original-Linie
-        interp_func = interp1d(xy_dp[:, 0], xy_dp[:, 1], kind='linear', fill_value="extrapolate")
-        intp_dp = interp_func(xy[:, 0])
+        if not heap:  # alle Punkte sind Teil der vereinfachten Linie
+            break
 
-        # Finden des maximalen Abstands zwischen der vereinfachten und der Original-Linie
-        d = np.abs(xy[:, 1] - intp_dp)  # Bestimmen des absoluten Abstands an jeder x-Position der Original-Linie (vertikal, d.h. in y-Richtung)
-        index = np.argmax(d)  # Finden des Maximums der Abstände
+        d_max = -heap[0][0]  # maximaler Abstand zwischen der vereinfachten und der Original-Linie
 
         if calccase == 1:  # max tol Limit
-            if d[index] > tol:  # wenn der maximale Abstand die Toleranz überschreitet ...
-                x_add = xy[index, 0]  # Finden des x-Werts des maximalen Abstands
-                y_add = xy[index, 1]  # Finden des y-Werts des maximalen Abstands
-                if x_add > xy_dp[-1, 0]:  # wenn der maximale Wert am Ende der Linie liegt (sollte nicht, da wir die ersten und letzten als Anfangswerte nehmen)
-                    xy_dp = np.vstack([xy_dp, [x_add, y_add]])
-                else:
-                    insertpos = np.searchsorted(xy_dp[:, 0], x_add)  # Finden der Position, an der der neue Punkt eingefügt werden soll
-                    xy_dp = np.vstack([xy_dp[:insertpos], [x_add, y_add], xy_dp[insertpos:]])  # Hinzufügen des neuen Punkts zur vereinfachten Linie
-            else:  # wenn der maximale Abstand kleiner als die Toleranz ist
-                alldone = True  # wir sind fertig
-
+            alldone = not d_max > tol  # fertig, wenn der maximale Abstand die Toleranz nicht überschreitet
         elif calccase == 2:  # numpoints Limit
-            if len(xy_dp) < numpoints:  # wenn die Anzahl der Punkte nicht ausreicht ...
-                x_add = xy[index, 0]  # Finden des x-Werts des maximalen Abstands
-                y_add = xy[index, 1]  # Finden des y-Werts des maximalen Abstands
-                if x_add > xy_dp[-1, 0]:  # wenn der maximale Wert am Ende der Linie liegt (sollte nicht, da wir die ersten und letzten als Anfangswerte nehmen)
-                    xy_dp = np.vstack([xy_dp, [x_add, y_add]])
-                else:
-                    insertpos = np.searchsorted(xy_dp[:, 0], x_add)  # Finden der Position, an der der neue Punkt eingefügt werden soll
-                    xy_dp = np.vstack([xy_dp[:insertpos], [x_add, y_add], xy_dp[insertpos:]])  # Hinzufügen des neuen Punkts zur vereinfachten Linie
-            else:  # wenn die vereinfachte Linie aus numpoints besteht
-                alldone = True  # wir sind fertig
-
+            alldone = not len(nodes) < numpoints  # fertig, wenn die vereinfachte Linie aus numpoints besteht
         elif calccase == 3:  # nse Limit
-            # Berechnen der NSE
-            A = xy[:, 0]
-            B = intp_dp
-            C = np.column_stack((A, B))
-            nse, metric_id = f_nashsutcliffe(xy, C)
-            ########################### FUNKTION F_NASHSUTCLIFFE IST NICHT VORHANDEN!!!!! ###########################
-
-            if nse < nselimit:  # die NSE ist noch nicht gut genug ...
-                x_add = xy[index, 0]  # Finden des x-Werts des maximalen Abstands
-                y_add = xy[index, 1]  # Finden des y-Werts des maximalen Abstands
-                if x_add > xy_dp[-1, 0]:  # wenn der maximale Wert am Ende der Linie liegt (sollte nicht, da wir die ersten und letzten als Anfangswerte nehmen)
-                    xy_dp = np.vstack([xy_dp, [x_add, y_add]])
-                else:
-                    insertpos = np.searchsorted(xy_dp[:, 0], x_add)  # Finden der Position, an der der neue Punkt eingefügt werden soll
-                    xy_dp = np.vstack([xy_dp[:insertpos], [x_add, y_add], xy_dp[insertpos:]])  # Hinzufügen des neuen Punkts zur vereinfachten Linie
-            else:  # wenn die NSE gut genug ist
-                alldone = True  # wir sind fertig
-
-    return xy_dp
\ No newline at end of file
+            alldone = not nse[-1] < nselimit  # fertig, wenn die NSE der vereinfachten Linie gut genug ist
+
+        if not alldone:
+            # Hinzufügen des Punkts mit dem maximalen Abstand, nur die beiden neuen Teilintervalle werden neu untersucht
+            _, index, start, end = heapq.heappop(heap)
+            nodes.append(index)
+            maxdev.append(d_max)
+            sse_start = _push_interval(heap, x, y, start, index)
+            sse_index = _push_interval(heap, x, y, index, end)
+
+            # Aktualisieren der quadrierten Abweichungen: nur das geteilte Intervall ändert sich
+            sse_all = sse_all - sse[start] + sse_start + sse_index
+            sse[start] = sse_start
+            sse[index] = sse_index
+            nse.append(1 - sse_all / sst)
+
+    xy_dp = xy[np.sort(nodes)]
+
+    if return_index:
+        dp_index = {'order': np.array(nodes), 'maxdev': np.array(maxdev), 'nse': np.array(nse)}
+        return xy_dp, dp_index
+
+    return xy_dp
+
+
+def _interval_line(x, y, start, end, inner):
+    """
+    Werte der Geraden zwischen den Punkten start und end an den Positionen inner (wie interp1d)
+    """
+
+    slope = (y[end] - y[start]) / (x[end] - x[start])
+    return slope * (x[inner] - x[start]) + y[start]
+
+
+def _push_interval(heap, x, y, start, end):
+    """
+    Legt den Punkt mit dem maximalen Abstand zwischen start und end (ohne die Endpunkte) auf den Heap
+    und gibt die Summe der quadrierten Abweichungen innerhalb des Intervalls zurück
+    """
+
+    if end - start < 2:  # keine Punkte innerhalb des Intervalls
+        return 0.0
+
+    inner = np.arange(start + 1, end)
+    d = np.abs(y[inner] - _interval_line(x, y, start, end, inner))
+    index = np.argmax(d)
+    heapq.heappush(heap, (-d[index], start + 1 + index, start, end))
+
+    return np.sum(d ** 2)
\ No newline at end of file
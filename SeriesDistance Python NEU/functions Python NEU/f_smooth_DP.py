@@ -1,8 +1,14 @@
 import numpy as np
 from scipy.interpolate import interp1d
 from f_dp1d import f_dp1d
-
-def f_smooth_DP(obs, sim, nse_smooth_limit):
+from f_DPIndex import f_dp_level
+from f_CountExtremes import f_count_extremes
+
+def f_smooth_DP(obs, sim, nse_smooth_limit, smooth_criterion='numpoints', dp_index=None, return_numpoints=False):
+    # smooth_criterion: 'numpoints' (Standard): obs wird mit so vielen Punkten vereinfacht, wie sim Extremwerte hat
+    #                   'nse': obs wird vereinfacht, bis die NSE zwischen geglätteter und ursprünglicher Zeitreihe nse_smooth_limit erreicht
+    # dp_index: optional: Einfügereihenfolge der Punkte von obs (siehe f_dp_index), z.B. um obs mehrfach mit verschiedenen Niveaus zu glätten
+    # return_numpoints: optional: gibt zusätzlich die Anzahl der Punkte der vereinfachten Linie zurück
     # Berechne Statistiken, um die ursprüngliche und geglättete Zeitreihe zu vergleichen
     # Anzahl der Extremwerte
 
@@ -10,8 +16,7 @@ def f_smooth_DP(obs, sim, nse_smooth_limit):
     # local_mins = len(np.where(np.diff(np.sign(np.diff(obs))) == 2)[0]) + 1  # Anzahl der positiven Vorzeichenwechsel in der zeitlichen Ableitung von obs (lokale Maxima)
     # local_maxs = len(np.where(np.diff(np.sign(np.diff(obs))) == -2)[0]) + 1  # Anzahl der negativen Vorzeichenwechsel in der zeitlichen Ableitung von obs (lokale Minima)
     
-    local_mins = len(np.where(np.diff(np.sign(np.diff(obs))) == 2)[0])
-    local_maxs = len(np.where(np.diff(np.sign(np.diff(obs))) == -2)[0])
+    local_mins, local_maxs = f_count_extremes(obs)
 
     obs_tot_extremes = local_mins + local_maxs
 
@@ -19,9 +24,9 @@ def f_smooth_DP(obs, sim, nse_smooth_limit):
     # print('local_maxs: ', local_maxs)
     # print('obs_tot_extremes: ', obs_tot_extremes)
 
-    local_mins = len(np.where(np.diff(np.sign(np.diff(sim))) == 2)[0]) + 1  # dasselbe für sim
-    local_maxs = len(np.where(np.diff(np.sign(np.diff(sim))) == -2)[0]) + 1  # dasselbe für sim
-    sim_tot_extremes = local_mins + local_maxs
+    # sim wird nicht geglättet: Extremwerte und Summe der Änderungen nur einmal bestimmen
+    local_mins, local_maxs = f_count_extremes(sim)
+    sim_tot_extremes = (local_mins + 1) + (local_maxs + 1)  # dasselbe für sim
 
     SumAbsSIM = np.sum(np.abs(np.diff(sim)))
     SumAbsOBS = np.sum(np.abs(np.diff(obs)))
@@ -47,15 +52,24 @@ def f_smooth_DP(obs, sim, nse_smooth_limit):
     # print('shape xy: ', xy.shape)
     # print('\n')
 
-    # füge hinzu: vereinfache obs bis zu einem Punktzahlkriterium
-    xy_dp = f_dp1d(xy, -999, sim_tot_extremes)
+    if smooth_criterion not in ['numpoints', 'nse']:
+        raise ValueError('smoothing criterion not properly specified')
+
+    if dp_index is not None:
+        # die vereinfachte Linie ist ein Anfang der Einfügereihenfolge: kein neuer Durchlauf von f_dp1d
+        if smooth_criterion == 'numpoints':
+            xy_dp = f_dp_level(xy, dp_index, -999, sim_tot_extremes)
+        else:
+            xy_dp = f_dp_level(xy, dp_index, nselimit=nse_smooth_limit)
+    elif smooth_criterion == 'numpoints':
+        # füge hinzu: vereinfache obs bis zu einem Punktzahlkriterium
+        xy_dp = f_dp1d(xy, -999, sim_tot_extremes)
+    else:
+        # vereinfache obs bis zu einem NSE-Übereinstimmungsniveau, das durch 'nse_smooth_limit' angegeben wird
+        xy_dp = f_dp1d(xy, nselimit=nse_smooth_limit)
 
     # print('xy_dp: ', xy_dp[99:109])
 
-    # frühere Version:
-    # vereinfache obs bis zu einem NSE-Übereinstimmungsniveau, das durch 'nse_limit_obs' angegeben wird
-    # xy_dp = f_dp1d(xy, -999, -999, nse_smooth_limit)
-
     # print('output data for f_dp1d:')
     # # print("xy_dp: ", xy_dp)
     # print('type xy_dp: ', type(xy_dp))
@@ -68,19 +82,16 @@ def f_smooth_DP(obs, sim, nse_smooth_limit):
     obs = interp_func(xes)
 
     # Anzahl der Extremwerte der geglätteten Zeitreihe
-    local_mins = len(np.where(np.diff(np.sign(np.diff(obs))) == 2)[0]) + 1  # Anzahl der positiven Vorzeichenwechsel (lokale Maxima)
-    local_maxs = len(np.where(np.diff(np.sign(np.diff(obs))) == -2)[0]) + 1  # Anzahl der negativen Vorzeichenwechsel (lokale Minima)
-    obs_tot_extremes = local_mins + local_maxs
+    local_mins, local_maxs = f_count_extremes(obs)  # Anzahl der positiven/ negativen Vorzeichenwechsel (lokale Minima/ Maxima)
+    obs_tot_extremes = (local_mins + 1) + (local_maxs + 1)
 
-    local_mins = len(np.where(np.diff(np.sign(np.diff(sim))) == 2)[0]) + 1  # Anzahl der positiven Vorzeichenwechsel (lokale Maxima)
-    local_maxs = len(np.where(np.diff(np.sign(np.diff(sim))) == -2)[0]) + 1  # Anzahl der negativen Vorzeichenwechsel (lokale Minima)
-    sim_tot_extremes = local_mins + local_maxs
-
-    SumAbsSIM = np.sum(np.abs(np.diff(sim)))
     SumAbsOBS = np.sum(np.abs(np.diff(obs)))
 
     # Statistiken im Befehlsfenster ausgeben
     print(f'smoothed obs: var: {np.var(obs)}, # extremes: {obs_tot_extremes}, diff(obs)={SumAbsOBS}')
     print(f'smoothed sim: var: {np.var(sim)}, # extremes: {sim_tot_extremes}, diff(sim)={SumAbsSIM}')
 
+    if return_numpoints:
+        return obs, sim, len(xy_dp)
+
     return obs, sim
\ No newline at end of file